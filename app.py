@@ -4,10 +4,10 @@ import config
 # 获取配置
 config_obj = config.config['default']()
 
-# 创建Flask应用实例
-app = create_app()
-
 if __name__ == '__main__':
+    # 创建Flask应用实例（分词进程池以 spawn 方式启动时会重新导入本脚本，不能在导入时创建应用）
+    app = create_app()
+    
     # 启动应用 - 从配置文件读取设置
     app.run(
         debug=config_obj.DEBUG,
@@ -13,7 +13,8 @@ def create_app():
     # 创建Flask应用
     app = Flask(__name__)
     
-    # 配置应用
+    # 配置应用（先加载config.py中的通用配置，再覆盖应用专属设置）
+    app.config.from_object('config.Config')
     app.config['SECRET_KEY'] = 'your-secret-key'
     # 使用应用内部的数据库路径
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(app.root_path, 'data', 'app.db')
@@ -23,6 +24,9 @@ def create_app():
     db.init_app(app)
     login_manager.init_app(app)
     
+    from .jobs import job_manager
+    job_manager.init_app(app)
+    
     # 确保数据目录存在
     os.makedirs(os.path.join(app.root_path, 'data'), exist_ok=True)
     os.makedirs(os.path.join(app.root_path, 'static'), exist_ok=True)
@@ -38,30 +42,13 @@ def create_app():
     
     # 创建数据库表
     with app.app_context():
-        db.create_all()
-        
-        # 检查并更新数据库结构
-        from sqlalchemy import text
-        
-        # 检查ScrapedData表是否有user_id字段
-        with db.engine.connect() as conn:
-            result = conn.execute(text("PRAGMA table_info(scraped_data)"))
-            columns = result.fetchall()
-            has_user_id = any(col[1] == 'user_id' for col in columns)
-            
-            if not has_user_id:
-                conn.execute(text("ALTER TABLE scraped_data ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1"))
-                conn.commit()
+        # 按配置为每个新连接设置 SQLite PRAGMA（WAL、synchronous 等）
+        from .sqlite_profile import apply_sqlite_profile
+        apply_sqlite_profile(db.engine, app.config.get('SQLITE_PRAGMAS'))
         
-        # 检查ReportData表是否有user_id字段
-        with db.engine.connect() as conn:
-            result = conn.execute(text("PRAGMA table_info(report_data)"))
-            columns = result.fetchall()
-            has_user_id = any(col[1] == 'user_id' for col in columns)
-            
-            if not has_user_id:
-                conn.execute(text("ALTER TABLE report_data ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1"))
-                conn.commit()
+        # 按结构版本执行数据库迁移，已是最新版本时直接跳过
+        from .migrations import migrate
+        migrate()
         
         # 创建默认管理员用户
         from .models import User, hash_password
@@ -70,4 +57,17 @@ def create_app():
             db.session.add(admin)
             db.session.commit()
     
+    # 抓取共用的HTTP响应缓存和按主机限速器
+    from .http_cache import init_http_cache
+    init_http_cache(app)
+    from .scraper import init_rate_limiter
+    init_rate_limiter(app)
+    
+    # 数据库表就绪后再启动单写线程和重新抓取调度器
+    from .writer import write_queue
+    write_queue.init_app(app)
+    
+    from .recrawl import recrawl_scheduler
+    recrawl_scheduler.init_app(app)
+    
     return app
@@ -0,0 +1,156 @@
+"""
+数据分析的增量累加器
+
+逐条加入数据、最后一次性得到统计结果，DataAnalyzer 的各项分析和流式分析共用：
+- LengthStats：长度的最小/最大/均值，以及按长度计数的直方图求中位数等分位数。
+  长度是取值有限的整数，直方图的大小与数据量无关，结果与 numpy 对全部数据计算的完全相同
+- TopK：按键保留最大的k条数据（小根堆），键相同时保留先加入的
+- KeywordCounter：关键词词频。保存时已分词的数据按批汇总词频表，其余数据的文本缓冲到一定字数后分词
+"""
+import heapq
+from collections import Counter
+
+from . import features
+from .segmentation import count_words
+
+# 未分词文本的缓冲字数，达到后分词（足够大时分词会使用多进程）
+TEXT_BUFFER_CHARS = 2000000
+
+
+class LengthStats:
+    """整数长度的在线统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        # 大于0的最小值（正文统计时不计空正文）
+        self.positive_min = None
+        self.histogram = Counter()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.histogram[value] += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value > 0 and (self.positive_min is None or value < self.positive_min):
+            self.positive_min = value
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q):
+        """分位数（线性插值，与 numpy.quantile 默认方法相同）"""
+        if not self.count:
+            return None
+        position = q * (self.count - 1)
+        low_rank = int(position)
+        high_rank = min(low_rank + 1, self.count - 1)
+        low = high = None
+        seen = 0
+        for value in sorted(self.histogram):
+            seen += self.histogram[value]
+            if low is None and seen > low_rank:
+                low = value
+            if seen > high_rank:
+                high = value
+                break
+        return low + (high - low) * (position - low_rank)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def to_dict(self, positive_min=False):
+        """DataAnalyzer.analyze_text_length 使用的统计结果"""
+        return {
+            'min': self.positive_min if positive_min else self.min,
+            'max': self.max,
+            'avg': round(self.mean(), 1),
+            'median': round(self.median(), 1)
+        }
+
+
+class TopK:
+    """保留键最大的k条数据"""
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._sequence = 0
+
+    def add(self, key, item):
+        # 键相同时序号大（后加入）的先被淘汰
+        entry = (key, -self._sequence, item)
+        self._sequence += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        """按键从大到小（相同时按加入顺序）返回数据"""
+        return [item for _, _, item in sorted(self._heap, key=lambda x: (-x[0], -x[1]))]
+
+
+class KeywordCounter:
+    """关键词词频累加器"""
+
+    def __init__(self, stop_words, workers=None):
+        self.stop_words = stop_words
+        self.workers = workers
+        self._term_totals = Counter()
+        self._word_counts = Counter()
+        self._ids = []
+        self._texts = []
+        self._chars = 0
+
+    def add(self, item, fill_content=False):
+        """
+        加入一条数据
+
+        已分词的数据只记录ID，不读取正文；fill_content 为 True 时按 clean_data 的规则补全缺失的正文。
+        """
+        if getattr(item, 'token_count', None) is not None and getattr(item, 'id', None) is not None:
+            self.add_ids([item.id])
+            return
+        title = item.title or ''
+        content = getattr(item, 'content', '') or ''
+        if fill_content:
+            content = features.analysis_content(item.title, content)
+        self._texts.append(title)
+        self._texts.append(content)
+        self._chars += len(title) + len(content)
+        if self._chars >= TEXT_BUFFER_CHARS:
+            self._flush_texts()
+
+    def add_ids(self, ids):
+        """加入一组已分词数据的ID"""
+        self._ids.extend(ids)
+        if len(self._ids) >= features.QUERY_BATCH_SIZE:
+            self._flush_ids()
+
+    def _flush_ids(self):
+        if self._ids:
+            self._term_totals.update(features.stored_term_totals(self._ids))
+            self._ids = []
+
+    def _flush_texts(self):
+        if self._texts:
+            self._word_counts.update(count_words(self._texts, self.stop_words, workers=self.workers))
+            self._texts, self._chars = [], 0
+
+    def result(self):
+        """返回 Counter({词: 词频})：词频表的汇总在前，分词得到的词频随后合并"""
+        self._flush_ids()
+        self._flush_texts()
+        word_counts = features.named_term_counts(self._term_totals) if self._term_totals else Counter()
+        word_counts.update(self._word_counts)
+        if self._term_totals:
+            # 词频表按默认停用词过滤，这里去掉另外添加的停用词
+            for word in [word for word in word_counts if word in self.stop_words]:
+                del word_counts[word]
+        return word_counts
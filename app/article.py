@@ -0,0 +1,175 @@
+"""
+正文抓取与提取
+
+对搜索结果中的每个 url 并发抓取原文页面（共享连接池、限制单页大小），
+快速识别 UTF-8/GBK/GB18030 编码，并用线性时间的文本密度算法提取正文，
+不为每个页面构建完整的 BeautifulSoup 树。
+"""
+import codecs
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+from urllib.parse import urlparse
+
+from .scraper import create_session
+
+# 默认单页大小上限（字节）
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+
+# GBK/GB2312 统一按其超集 GB18030 解码
+_ENCODING_ALIASES = {'gb2312': 'gb18030', 'gbk': 'gb18030', 'x-gbk': 'gb18030', 'utf8': 'utf-8'}
+
+_CHARSET_HEADER = re.compile(r'charset=["\']?([\w-]+)', re.I)
+_CHARSET_META = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+_NOISE_BLOCKS = re.compile(
+    r'<(script|style|noscript|head|header|footer|nav|aside|iframe|form)\b.*?</\1\s*>|<!--.*?-->',
+    re.I | re.S
+)
+_BLOCK_BREAK = re.compile(r'<(?:/p|br\s*/?|/div|/li|/h[1-6]|/tr|/section|/article|/ul|/table)\b[^>]*>', re.I)
+_ANCHOR = re.compile(r'<a\b[^>]*>(.*?)</a\s*>', re.I | re.S)
+_TAG = re.compile(r'<[^>]+>')
+_SPACES = re.compile(r'[ \t\r\f\v　\xa0]+')
+
+
+def _normalize_encoding(name):
+    if not name:
+        return None
+    name = name.strip().lower()
+    name = _ENCODING_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_encoding(raw, content_type=None):
+    """
+    快速判断页面编码
+
+    依次检查 BOM、Content-Type 头、页面前2KB中的 meta charset，
+    都没有时尝试按 UTF-8 严格解码，失败则使用 GB18030。
+    """
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if content_type:
+        match = _CHARSET_HEADER.search(content_type)
+        encoding = _normalize_encoding(match.group(1)) if match else None
+        if encoding:
+            return encoding
+    match = _CHARSET_META.search(raw[:2048])
+    if match:
+        encoding = _normalize_encoding(match.group(1).decode('ascii', 'ignore'))
+        if encoding:
+            return encoding
+    try:
+        raw.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # 单页大小截断可能切断最后一个多字节字符
+        if e.start >= len(raw) - 3:
+            return 'utf-8'
+        return 'gb18030'
+
+
+def extract_main_text(html, block_width=3, max_link_ratio=0.5):
+    """
+    基于行块文本密度的正文提取（线性时间）
+
+    1. 去掉脚本、样式、导航等噪声块，按块级标签切分为行
+    2. 丢弃链接文字占比超过 max_link_ratio 的行（导航、推荐列表等）
+    3. 以 block_width 行为窗口计算文本长度，取文本量最大的连续区域作为正文
+    """
+    html = _NOISE_BLOCKS.sub('', html)
+    lines = []
+    for segment in _BLOCK_BREAK.split(html):
+        text = _SPACES.sub(' ', unescape(_TAG.sub('', segment))).strip()
+        if not text:
+            lines.append('')
+            continue
+        link_text = sum(len(_TAG.sub('', anchor)) for anchor in _ANCHOR.findall(segment))
+        lines.append('' if link_text / len(text) > max_link_ratio else text)
+
+    if not lines:
+        return ''
+
+    # 行块长度：从第 i 行开始 block_width 行的文本长度之和
+    lengths = [len(line) for line in lines]
+    window = sum(lengths[:block_width])
+    blocks = []
+    for i in range(len(lines)):
+        blocks.append(window)
+        window -= lengths[i]
+        if i + block_width < len(lines):
+            window += lengths[i + block_width]
+
+    # 找出行块长度连续非零、文本总量最大的区域
+    best_start, best_end, best_total = 0, 0, 0
+    start, total = None, 0
+    for i, block in enumerate(blocks):
+        if block > 0:
+            if start is None:
+                start, total = i, 0
+            total += lengths[i]
+            if total > best_total:
+                best_start, best_end, best_total = start, i + 1, total
+        else:
+            start = None
+
+    return '\n'.join(line for line in lines[best_start:best_end] if line)
+
+
+class ArticleFetcher:
+    """
+    并发正文抓取器
+
+    - 共享带连接池的会话，全局 max_workers 个线程，每主机最多 per_host_limit 个并发
+    - 单页最多读取 max_bytes 字节，超出部分丢弃
+    """
+
+    def __init__(self, max_workers=8, per_host_limit=4, timeout=10,
+                 max_bytes=DEFAULT_MAX_BYTES, session=None):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.session = session or create_session(pool_size=max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='article')
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._host_lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def fetch_raw(self, url):
+        """抓取页面原始字节（不超过 max_bytes），返回 (raw, content_type)"""
+        with self._host_semaphore(url):
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                chunks, size = [], 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_bytes:
+                        break
+                return b''.join(chunks)[:self.max_bytes], response.headers.get('Content-Type')
+
+    def fetch_text(self, url):
+        """抓取页面并提取正文"""
+        raw, content_type = self.fetch_raw(url)
+        encoding = detect_encoding(raw, content_type)
+        return extract_main_text(raw.decode(encoding, errors='replace'))
+
+    def submit(self, url):
+        """提交一个正文抓取任务，返回 Future"""
+        return self.executor.submit(self.fetch_text, url)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
@@ -0,0 +1,113 @@
+"""
+批量抓取断点续抓
+
+把待抓取队列（每个关键词的每一页）和抓取进度保存在数据库中，
+进程中断后用相同参数重新运行，只会抓取尚未完成的页面。
+页面的完成状态与该页结果在同一事务中提交，不会出现“已标记完成但数据未入库”的情况。
+"""
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import text
+
+from . import db
+from .models import CrawlRun, CrawlTask
+
+
+def make_run_key(user_id, keywords, pages):
+    """根据用户、关键词列表（去重排序）和页数计算任务标识"""
+    payload = '\n'.join([str(user_id), str(pages)] + sorted(set(keywords)))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class CrawlCheckpoint:
+    """
+    批量抓取的断点记录
+
+    - open(): 找到相同参数的未完成任务则续抓，否则新建任务并写入全部待抓取页面
+    - pending_tasks(): 逐批读取尚未完成（pending/failed）的页面
+    - mark_done() / mark_failed(): 在调用方的事务中更新页面状态
+    """
+
+    def __init__(self, run_id, pages):
+        self.run_id = run_id
+        self.pages = pages
+
+    @classmethod
+    def open(cls, user_id, keywords, pages=1):
+        """创建或续抓批量任务，需要在应用上下文中调用"""
+        keywords = list(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))
+        run_key = make_run_key(user_id, keywords, pages)
+        run = CrawlRun.query.filter_by(run_key=run_key, status='running').order_by(CrawlRun.id.desc()).first()
+        if run is not None:
+            done = CrawlTask.query.filter_by(run_id=run.id, status='done').count()
+            print(f"续抓批量任务 {run.id}：已完成 {done} 页，跳过这些页面")
+            return cls(run.id, run.pages)
+
+        run = CrawlRun(run_key=run_key, user_id=user_id, pages=pages, status='running')
+        db.session.add(run)
+        db.session.flush()
+        db.session.bulk_insert_mappings(CrawlTask, [
+            {'run_id': run.id, 'keyword': keyword[:200], 'page': page, 'status': 'pending'}
+            for keyword in keywords
+            for page in range(pages)
+        ])
+        db.session.commit()
+        print(f"新建批量任务 {run.id}：{len(keywords)} 个关键词，每个 {pages} 页")
+        return cls(run.id, pages)
+
+    def pending_tasks(self, batch_size=1000):
+        """按插入顺序逐批返回未完成的 (keyword, page)，内存占用与任务总数无关"""
+        last_id = 0
+        while True:
+            rows = db.session.query(CrawlTask.id, CrawlTask.keyword, CrawlTask.page).filter(
+                CrawlTask.run_id == self.run_id,
+                CrawlTask.status != 'done',
+                CrawlTask.id > last_id
+            ).order_by(CrawlTask.id).limit(batch_size).all()
+            if not rows:
+                return
+            for task_id, keyword, page in rows:
+                yield keyword, page
+            last_id = rows[-1][0]
+
+    def mark_done(self, tasks):
+        """tasks 为 [(keyword, page, 结果数)]，不提交事务"""
+        if not tasks:
+            return
+        db.session.execute(text(
+            "UPDATE crawl_task SET status = 'done', attempts = attempts + 1, results = :results, "
+            "updated_at = :now WHERE run_id = :run_id AND keyword = :keyword AND page = :page"
+        ), [
+            {'run_id': self.run_id, 'keyword': keyword, 'page': page, 'results': results, 'now': datetime.utcnow()}
+            for keyword, page, results in tasks
+        ])
+
+    def mark_failed(self, tasks):
+        """tasks 为 [(keyword, page)]，失败的页面下次运行时会重试，不提交事务"""
+        if not tasks:
+            return
+        db.session.execute(text(
+            "UPDATE crawl_task SET status = 'failed', attempts = attempts + 1, updated_at = :now "
+            "WHERE run_id = :run_id AND keyword = :keyword AND page = :page"
+        ), [
+            {'run_id': self.run_id, 'keyword': keyword, 'page': page, 'now': datetime.utcnow()}
+            for keyword, page in tasks
+        ])
+
+    def progress(self):
+        """返回各状态的页面数"""
+        counts = dict(db.session.query(CrawlTask.status, db.func.count(CrawlTask.id)).filter(
+            CrawlTask.run_id == self.run_id
+        ).group_by(CrawlTask.status).all())
+        return {status: counts.get(status, 0) for status in ('pending', 'done', 'failed')}
+
+    def finish(self):
+        """所有页面完成时把任务标记为已完成，返回是否已全部完成"""
+        progress = self.progress()
+        run = CrawlRun.query.get(self.run_id)
+        run.updated_at = datetime.utcnow()
+        if progress['pending'] == 0 and progress['failed'] == 0:
+            run.status = 'done'
+        db.session.commit()
+        return run.status == 'done'
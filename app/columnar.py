@@ -0,0 +1,166 @@
+"""
+列式数据分析引擎
+
+ColumnarAnalyzer 对 ScrapedData 查询只读取分析需要的列（入库特征、标题、来源、日期等，不读取正文），
+放入 pandas DataFrame 后用向量化运算完成清洗和统计：
+- 去重：np.unique 按去重键分组，与 clean_data 一样保留每组最后一条、按首次出现的位置排序
+- 来源分布：pd.factorize + np.bincount（同数量的来源按首次出现的顺序，与 Counter.most_common 一致）
+- 时间分布：datetime64 日期差筛选最近几天后 np.unique 计数
+- 长度统计、内容摘要：直接在长度列上计算，摘要只读取最终选出的几条数据的正文
+关键词汇总词频表；缺少入库特征的少量数据（未迁移、未分词）按 DataAnalyzer 的方式逐条补算。
+返回结构与 DataAnalyzer.perform_full_analysis 相同，key_summaries 为 SummaryItem（同流式分析）。
+"""
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import case, func, or_
+
+from . import db, features
+from .accumulators import KeywordCounter
+from .data_analyzer import DataAnalyzer, SummaryItem
+from .models import ScrapedData
+
+# 缺少的特征以 -1 表示
+_MISSING = -1
+
+_FRAME_COLUMNS = ('id', 'title', 'source', 'created_date', 'title_length', 'content_length', 'dedup_key',
+                  'token_count', 'has_content', 'has_url', 'missing_key')
+
+
+def _flag(condition):
+    return case((condition, 1), else_=0)
+
+
+class ColumnarAnalyzer(DataAnalyzer):
+    """
+    列式数据分析器
+    perform_columnar_analysis(query) 传入 ScrapedData 的查询（可带过滤和排序条件）
+    """
+
+    def load_frame(self, query):
+        """按查询读取分析所需的列，返回 DataFrame（每行一条数据，顺序与查询一致）"""
+        statement = query.with_entities(
+            ScrapedData.id,
+            ScrapedData.title,
+            ScrapedData.source,
+            func.date(ScrapedData.created_at),
+            func.coalesce(ScrapedData.title_length, _MISSING),
+            func.coalesce(ScrapedData.content_length, _MISSING),
+            func.coalesce(ScrapedData.dedup_key, 0),
+            func.coalesce(ScrapedData.token_count, _MISSING),
+            _flag(or_(ScrapedData.body_hash.isnot(None), func.coalesce(ScrapedData._content, '') != '')),
+            _flag(func.coalesce(ScrapedData.url, '') != ''),
+            _flag(ScrapedData.dedup_key.is_(None))
+        ).statement
+        with db.session.no_autoflush:
+            rows = db.session.execute(statement).fetchall()
+        frame = pd.DataFrame.from_records(rows, columns=_FRAME_COLUMNS)
+        self._fill_missing_features(frame)
+        return frame
+
+    def _load_items(self, ids):
+        """按ID读取完整的数据对象（保持 ids 的顺序）"""
+        items = {}
+        with db.session.no_autoflush:
+            for start in range(0, len(ids), features.QUERY_BATCH_SIZE):
+                batch = [int(data_id) for data_id in ids[start:start + features.QUERY_BATCH_SIZE]]
+                items.update((item.id, item) for item in ScrapedData.query.filter(ScrapedData.id.in_(batch)))
+        return [items[int(data_id)] for data_id in ids if int(data_id) in items]
+
+    def _fill_missing_features(self, frame):
+        # 入库特征缺失的数据（迁移前写入且未补算）逐条计算
+        missing = ((frame['title_length'] == _MISSING) | (frame['content_length'] == _MISSING)
+                   | (frame['missing_key'] == 1))
+        if not missing.any():
+            return
+        items = {item.id: item for item in self._load_items(frame.loc[missing, 'id'].tolist())}
+        for index in frame.index[missing]:
+            item = items[frame.at[index, 'id']]
+            frame.at[index, 'title_length'] = len(item.title)
+            frame.at[index, 'content_length'] = self._analysis_content_length(item)
+            frame.at[index, 'dedup_key'] = self._dedup_key(item)
+
+    @staticmethod
+    def _dedup(frame):
+        """与 clean_data 相同：重复数据保留最后一条，位置为该组首次出现的位置"""
+        keys = frame['dedup_key'].to_numpy()
+        uniques, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        last_index = np.zeros(len(uniques), dtype=np.int64)
+        np.maximum.at(last_index, inverse.ravel(), np.arange(len(keys)))
+        return frame.iloc[last_index[np.argsort(first_index, kind='stable')]]
+
+    @staticmethod
+    def _length_stats(lengths, positive_min=False):
+        return {
+            'min': int(lengths[lengths > 0].min() if positive_min else lengths.min()),
+            'max': int(lengths.max()),
+            'avg': round(float(lengths.mean()), 1),
+            'median': round(float(np.median(lengths)), 1)
+        }
+
+    def perform_columnar_analysis(self, query, days=7, top_n=20, max_summaries=5):
+        """
+        列式执行完整的数据分析
+        返回结构与 perform_full_analysis 相同
+        """
+        frame = self.load_frame(query)
+        raw_count = len(frame)
+
+        # 清洗：去重后过滤标题过短、既没有内容也没有URL的数据
+        frame = self._dedup(frame)
+        titles = frame['title'].fillna('')
+        valid = (titles.str.strip().str.len() >= 5) & ((frame['has_content'] == 1) | (frame['has_url'] == 1))
+        frame = frame[valid.to_numpy()]
+        cleaned_count = len(frame)
+
+        # 来源分布（缺失的来源计为“未知来源”）
+        sources = frame['source'].fillna('').to_numpy(dtype=object)
+        sources[sources == ''] = "未知来源"
+        codes, labels = pd.factorize(sources)
+        counts = np.bincount(codes, minlength=len(labels))
+        source_distribution = self._source_result(Counter(dict(zip(labels, counts.tolist()))), cleaned_count)
+
+        # 时间分布：最近days天内每天的数据数
+        today = datetime.now().date()
+        dates = frame['created_date'].dropna().to_numpy(dtype=object)
+        recent = dates[(np.datetime64(today, 'D') - dates.astype('datetime64[D]')).astype(np.int64) <= days]
+        day_values, day_counts = np.unique(recent.astype(str), return_counts=True)
+        time_distribution = self._time_result(dict(zip(day_values.tolist(), day_counts.tolist())), today, days)
+
+        # 长度统计（与清洗后补全内容一致：没有正文时按代替文本计算长度，最小值不计空内容）
+        title_lengths = frame['title_length'].to_numpy(dtype=np.int64)
+        content_lengths = frame['content_length'].to_numpy(dtype=np.int64)
+        content_lengths = np.where(content_lengths == 0, title_lengths + len(features.analysis_content('', '')),
+                                   content_lengths)
+        text_length_stats = {
+            'title_stats': self._length_stats(title_lengths) if cleaned_count else None,
+            'content_stats': (self._length_stats(content_lengths, positive_min=True)
+                              if cleaned_count and content_lengths.sum() > 0 else None)
+        }
+
+        # 内容摘要：内容最长的几条（长度相同时按原顺序），只读取这几条的正文
+        order = np.argsort(-content_lengths, kind='stable')
+        order = order[content_lengths[order] > 20][:max_summaries]
+        key_summaries = [SummaryItem.from_item(item)
+                         for item in self._load_items(frame['id'].to_numpy()[order].tolist())]
+
+        # 关键词：已分词的数据汇总词频表，其余数据读取正文后分词
+        if cleaned_count:
+            counter = KeywordCounter(self.stop_words, self.workers)
+            segmented = frame['token_count'].to_numpy() != _MISSING
+            ids = frame['id'].to_numpy()
+            counter.add_ids(ids[segmented].tolist())
+            for item in self._load_items(ids[~segmented].tolist()):
+                counter.add(item, fill_content=True)
+            word_counts = counter.result()
+            keywords = self._keyword_result(word_counts.most_common(top_n), dict(word_counts), len(word_counts))
+        else:
+            keywords = {"top_keywords": [], "keyword_report": "暂无数据"}
+
+        avg_length = int(content_lengths.sum()) / cleaned_count if cleaned_count else None
+        insights_data = self._build_insights(cleaned_count, avg_length, keywords, source_distribution)
+
+        return self._assemble_result(raw_count, cleaned_count, keywords, time_distribution, source_distribution,
+                                     text_length_stats, key_summaries, insights_data)
@@ -0,0 +1,169 @@
+"""
+正文内容寻址存储
+
+相同的正文（同一搜索结果被多个用户抓取、重复抓取、报告中的拼接文本）只在 content_blob 表中保存一份：
+- 主键为正文 UTF-8 编码的 SHA1，scraped_data / report_data 通过 body_hash 引用，content 列留空
+- 不小于 CONTENT_COMPRESS_MIN_BYTES 的正文用 zlib 压缩保存（压缩后更小时）
+- refcount 由数据库触发器在插入、删除行或修改 body_hash 时维护，
+  引用数降为0的正文由 purge_unreferenced 随即删除，残留的由 collect_garbage 清理（compact_content_store.py）
+
+ORM 中 ScrapedData.content / ReportData.content 为属性，自动读取并解压，调用方无需关心存储方式。
+写入均在调用方的事务中执行，不提交。
+"""
+import hashlib
+import zlib
+
+from flask import current_app
+from sqlalchemy import text
+
+from . import db
+
+BLOB_TABLE = 'content_blob'
+
+# 引用正文的表（均使用 body_hash 列）
+REFERENCING_TABLES = ('scraped_data', 'report_data')
+
+# 默认压缩阈值（字节），可通过配置 CONTENT_COMPRESS_MIN_BYTES 修改，0 表示不压缩
+COMPRESS_MIN_BYTES = 512
+COMPRESS_LEVEL = 6
+
+# 迁移时每批移动的行数
+MOVE_BATCH_SIZE = 1000
+
+
+def encode_body(value, compress_min_bytes=COMPRESS_MIN_BYTES):
+    """返回 (哈希, 存储数据, 是否压缩, 原始字节数)"""
+    raw = value.encode('utf-8')
+    data, compressed = raw, False
+    if compress_min_bytes and len(raw) >= compress_min_bytes:
+        packed = zlib.compress(raw, COMPRESS_LEVEL)
+        if len(packed) < len(raw):
+            data, compressed = packed, True
+    return hashlib.sha1(raw).hexdigest(), data, compressed, len(raw)
+
+
+def decode_body(data, compressed):
+    if data is None:
+        return None
+    if compressed:
+        data = zlib.decompress(data)
+    return bytes(data).decode('utf-8')
+
+
+def _compress_min_bytes():
+    try:
+        return current_app.config.get('CONTENT_COMPRESS_MIN_BYTES', COMPRESS_MIN_BYTES)
+    except RuntimeError:
+        return COMPRESS_MIN_BYTES
+
+
+def store_bodies(values, conn=None):
+    """
+    把一组正文写入存储（已存在的忽略），返回 {正文: 哈希}，空正文不存储
+
+    新写入的正文 refcount 为0，由引用它的行插入时的触发器增加。
+    """
+    conn = conn if conn is not None else db.session
+    hashes, blobs = {}, []
+    compress_min_bytes = _compress_min_bytes()
+    for value in values:
+        if not value or value in hashes:
+            continue
+        digest, data, compressed, size = encode_body(value, compress_min_bytes)
+        hashes[value] = digest
+        blobs.append({'hash': digest, 'data': data, 'compressed': compressed, 'size': size})
+    if blobs:
+        conn.execute(text(
+            f"INSERT OR IGNORE INTO {BLOB_TABLE} (hash, data, compressed, size, refcount) "
+            f"VALUES (:hash, :data, :compressed, :size, 0)"
+        ), blobs)
+    return hashes
+
+
+def purge_unreferenced(hashes, conn=None):
+    """删除指定正文中已无引用的部分（如插入时因重复被忽略的行对应的正文），返回删除数"""
+    conn = conn if conn is not None else db.session
+    hashes = [h for h in set(hashes) if h]
+    if not hashes:
+        return 0
+    result = conn.execute(text(
+        f"DELETE FROM {BLOB_TABLE} WHERE hash = :hash AND refcount <= 0"
+    ), [{'hash': h} for h in hashes])
+    return max(result.rowcount, 0)
+
+
+def collect_garbage(conn=None):
+    """删除所有引用数为0的正文，返回删除数"""
+    conn = conn if conn is not None else db.session
+    result = conn.execute(text(f"DELETE FROM {BLOB_TABLE} WHERE refcount <= 0"))
+    return max(result.rowcount, 0)
+
+
+def select_body_sql(alias='s'):
+    """读取正文所需的列及连接，配合 row_body() 使用：(content, data, compressed)"""
+    return (f"{alias}.content, b.data, b.compressed",
+            f"LEFT JOIN {BLOB_TABLE} b ON b.hash = {alias}.body_hash")
+
+
+def row_body(content, data, compressed):
+    """由 select_body_sql() 查询出的三列得到正文"""
+    if data is not None:
+        return decode_body(data, compressed)
+    return content
+
+
+# ---------- 结构与迁移 ----------
+
+def add_body_columns(conn):
+    """为引用正文的表补充 body_hash 字段"""
+    for table in REFERENCING_TABLES:
+        columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+        if 'body_hash' not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN body_hash VARCHAR(40)"))
+
+
+def create_refcount_triggers(conn):
+    """插入、删除行及修改 body_hash 时维护 content_blob.refcount"""
+    for table in REFERENCING_TABLES:
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_body_insert AFTER INSERT ON {table} "
+            f"WHEN NEW.body_hash IS NOT NULL BEGIN "
+            f"UPDATE {BLOB_TABLE} SET refcount = refcount + 1 WHERE hash = NEW.body_hash; END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_body_delete AFTER DELETE ON {table} "
+            f"WHEN OLD.body_hash IS NOT NULL BEGIN "
+            f"UPDATE {BLOB_TABLE} SET refcount = refcount - 1 WHERE hash = OLD.body_hash; END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_body_update AFTER UPDATE OF body_hash ON {table} "
+            f"WHEN OLD.body_hash IS NOT NEW.body_hash BEGIN "
+            f"UPDATE {BLOB_TABLE} SET refcount = refcount - 1 WHERE hash = OLD.body_hash; "
+            f"UPDATE {BLOB_TABLE} SET refcount = refcount + 1 WHERE hash = NEW.body_hash; END"
+        ))
+
+
+def move_inline_bodies(conn):
+    """
+    把表中直接保存的正文移入存储，返回移动的行数
+
+    需要在 create_refcount_triggers() 之后调用，引用数由触发器计算。
+    report_data.content 在旧结构中不允许为空，移动后置为空字符串。
+    """
+    moved = 0
+    for table, emptied in (('scraped_data', None), ('report_data', '')):
+        last_id = 0
+        while True:
+            rows = conn.execute(text(
+                f"SELECT id, content FROM {table} WHERE body_hash IS NULL AND content IS NOT NULL "
+                f"AND content != '' AND id > :last_id ORDER BY id LIMIT :limit"
+            ), {'last_id': last_id, 'limit': MOVE_BATCH_SIZE}).fetchall()
+            if not rows:
+                break
+            hashes = store_bodies([content for _, content in rows], conn)
+            conn.execute(text(
+                f"UPDATE {table} SET body_hash = :body_hash, content = :content WHERE id = :id"
+            ), [{'id': row_id, 'body_hash': hashes[content], 'content': emptied} for row_id, content in rows])
+            moved += len(rows)
+            last_id = rows[-1][0]
+    return moved
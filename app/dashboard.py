@@ -0,0 +1,97 @@
+"""
+首页统计与最近活动
+
+每个用户在 user_stats 表中有一行物化的统计数据，首页只需一次主键查询：
+- saved_count / report_count 在保存数据、生成和删除报告时增量更新
+- activities 为最近活动的环形缓冲（JSON数组，最新的在前），
+  抓取、保存、生成报告时追加一条，超过 ACTIVITY_RING_SIZE 条时丢弃最早的记录
+
+record() 在调用方的事务中执行，应在写操作（app/writer.py）中调用，与数据变更一起提交。
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import text
+
+from . import db
+from .models import UserStats
+
+# 环形缓冲保留的活动条数及首页显示的条数
+ACTIVITY_RING_SIZE = 20
+RECENT_ACTIVITY_COUNT = 5
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M'
+
+
+def record(user_id, action=None, saved=0, reports=0):
+    """更新用户的计数（saved/reports 为增量）并追加一条活动，不提交事务"""
+    stats = UserStats.query.get(user_id)
+    if stats is None:
+        stats = UserStats(user_id=user_id, saved_count=0, report_count=0, activities='[]')
+        db.session.add(stats)
+        db.session.flush()
+    stats.saved_count = max(stats.saved_count + saved, 0)
+    stats.report_count = max(stats.report_count + reports, 0)
+    if action:
+        activities = json.loads(stats.activities or '[]')
+        activities.insert(0, {'time': datetime.utcnow().strftime(_TIME_FORMAT), 'action': action})
+        stats.activities = json.dumps(activities[:ACTIVITY_RING_SIZE], ensure_ascii=False)
+    stats.updated_at = datetime.utcnow()
+
+
+def get_dashboard(user_id, limit=RECENT_ACTIVITY_COUNT):
+    """返回 (已保存数据数, 报告数, 最近活动列表)"""
+    stats = UserStats.query.get(user_id)
+    if stats is None:
+        return 0, 0, []
+    return stats.saved_count, stats.report_count, json.loads(stats.activities or '[]')[:limit]
+
+
+def rebuild_stats(conn):
+    """
+    按现有数据重新计算所有用户的统计（迁移或修复计数时使用），返回用户数
+
+    最近活动取最近的抓取、保存和报告各3条合并排序。
+    """
+    def recent(sql, user_id):
+        return conn.execute(text(sql), {'user_id': user_id}).fetchall()
+
+    users = [row[0] for row in conn.execute(text("SELECT id FROM user"))]
+    conn.execute(text("DELETE FROM user_stats"))
+    for user_id in users:
+        saved_count = conn.execute(text(
+            "SELECT COUNT(*) FROM scraped_data WHERE user_id = :user_id AND saved = 1"
+        ), {'user_id': user_id}).scalar()
+        report_count = conn.execute(text(
+            "SELECT COUNT(*) FROM report_data WHERE user_id = :user_id"
+        ), {'user_id': user_id}).scalar()
+
+        activities = []
+        for created_at, keyword in recent(
+            "SELECT created_at, keyword FROM scraped_data WHERE user_id = :user_id AND saved = 0 "
+            "ORDER BY created_at DESC LIMIT 3", user_id
+        ):
+            activities.append({'time': str(created_at)[:16], 'action': f'爬取关键词: {keyword}'})
+        for created_at, title in recent(
+            "SELECT created_at, title FROM scraped_data WHERE user_id = :user_id AND saved = 1 "
+            "ORDER BY created_at DESC LIMIT 3", user_id
+        ):
+            activities.append({'time': str(created_at)[:16], 'action': f'保存数据: {title[:30]}...'})
+        for created_at, title in recent(
+            "SELECT created_at, title FROM report_data WHERE user_id = :user_id "
+            "ORDER BY created_at DESC LIMIT 3", user_id
+        ):
+            activities.append({'time': str(created_at)[:16], 'action': f'生成报告: {title[:30]}...'})
+        activities.sort(key=lambda x: x['time'], reverse=True)
+
+        conn.execute(text(
+            "INSERT INTO user_stats (user_id, saved_count, report_count, activities, updated_at) "
+            "VALUES (:user_id, :saved_count, :report_count, :activities, :updated_at)"
+        ), {
+            'user_id': user_id,
+            'saved_count': saved_count,
+            'report_count': report_count,
+            'activities': json.dumps(activities, ensure_ascii=False),
+            'updated_at': datetime.utcnow()
+        })
+    return len(users)
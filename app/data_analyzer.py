@@ -1,28 +1,47 @@
-import re
 import jieba
 import jieba.analyse
 from collections import Counter, defaultdict
 from datetime import datetime, timedelta
-import numpy as np
+from flask import current_app
+from sqlalchemy import func, or_
+
+from . import features
+from .accumulators import KeywordCounter, LengthStats, TopK
+from .models import ScrapedData
+from .segmentation import STOP_WORDS
+
+class SummaryItem:
+    """流式分析的内容摘要项（与数据对象相同的属性，正文和来源已按清洗规则补全）"""
+    
+    def __init__(self, title, content, source, url=None, created_at=None):
+        self.title = title
+        self.content = content
+        self.source = source
+        self.url = url
+        self.created_at = created_at
+    
+    @classmethod
+    def from_item(cls, item):
+        return cls(item.title, features.analysis_content(item.title, getattr(item, 'content', '')),
+                   getattr(item, 'source', '') or "未知来源", getattr(item, 'url', None),
+                   getattr(item, 'created_at', None))
 
 class DataAnalyzer:
     """
     数据分析器，提供数据清洗和分析功能
     """
     
-    def __init__(self):
+    def __init__(self, workers=None):
+        # 关键词分析的分词进程数，默认取配置 ANALYSIS_WORKERS（0或未设置时为CPU核数）
+        if workers is None:
+            try:
+                workers = current_app.config.get('ANALYSIS_WORKERS') or None
+            except RuntimeError:
+                workers = None
+        self.workers = workers
+        
         # 初始化停用词列表
-        self.stop_words = {
-            '的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到',
-            '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '与', '对', '吗', '呢', '吧',
-            '啊', '哦', '呀', '嘛', '啦', '嗯', '哼', '哈', '嘿', '喂', '哎', '哟', '哦', '哇', '哒', '啦',
-            '但是', '如果', '因为', '所以', '不过', '虽然', '但是', '而且', '并且', '然而', '可是', '或者',
-            '还是', '不仅', '而是', '就是', '只是', '不是', '关于', '对于', '为了', '随着', '通过', '由于',
-            '根据', '按照', '因此', '于是', '总之', '综上所述', '由此可见', '显而易见', '事实上', '实际上',
-            '其实', '确实', '看来', '据说', '听说', '据悉', '据悉', '据了解', '据报道', '据分析', '据估计',
-            '可以', '能够', '应该', '必须', '需要', '可能', '或许', '也许', '大概', '大约', '左右', '前后',
-            '上下', '之间', '其中', '之后', '之前', '当时', '现在', '将来', '过去', '目前', '最近', '未来'
-        }
+        self.stop_words = set(STOP_WORDS)
         
         # 初始化jieba
         self._init_jieba()
@@ -43,35 +62,15 @@ class DataAnalyzer:
         2. 过滤无效数据
         3. 处理缺失值
         """
-        # 去重 - 基于标题和URL/Source
+        # 去重 - 基于标题和URL/Source，入库时已计算去重键的数据直接使用
         unique_items = {}
         for item in data_items:
-            # 安全地构建用于去重的键
-            key = item.title
-            # 只有当item有url属性且不为None时才添加到key中
-            if hasattr(item, 'url') and item.url:
-                key = f"{item.title}_{item.url}"
-            elif hasattr(item, 'source') and item.source:
-                # 如果有source属性，可以用作备选去重条件
-                key = f"{item.title}_{item.source}"
-            unique_items[key] = item
+            unique_items[self._dedup_key(item)] = item
         
         cleaned_items = list(unique_items.values())
         
         # 过滤无效数据
-        valid_items = []
-        for item in cleaned_items:
-            # 确保有标题
-            if not item.title or len(item.title.strip()) < 5:
-                continue
-            
-            # 确保有内容或URL（安全地检查URL属性）
-            has_content = bool(getattr(item, 'content', ''))
-            has_url = hasattr(item, 'url') and bool(item.url)
-            if not has_content and not has_url:
-                continue
-            
-            valid_items.append(item)
+        valid_items = [item for item in cleaned_items if self._is_valid(item)]
         
         # 处理缺失值
         for item in valid_items:
@@ -85,6 +84,23 @@ class DataAnalyzer:
         
         return valid_items
     
+    @staticmethod
+    def _dedup_key(item):
+        key = getattr(item, 'dedup_key', None)
+        if key is None:
+            # 安全地构建用于去重的键（url/source 缺失时只按标题）
+            key = features.dedup_key(item.title, getattr(item, 'url', None), getattr(item, 'source', None))
+        return key
+    
+    @staticmethod
+    def _is_valid(item):
+        # 确保有标题
+        if not item.title or len(item.title.strip()) < 5:
+            return False
+        # 确保有内容或URL（安全地检查URL属性）
+        has_url = hasattr(item, 'url') and bool(item.url)
+        return features.has_content(item) or has_url
+    
     def analyze_keywords(self, data_items, top_n=20):
         """
         关键词分析 - 优化版
@@ -93,31 +109,33 @@ class DataAnalyzer:
         if not data_items:
             return {"top_keywords": [], "keyword_report": "暂无数据"}
         
-        # 合并所有文本内容
-        all_text = ''
+        # 保存时已分词的数据直接汇总词频表；其余数据的标题和内容分块交给多进程分词，
+        # 过滤停用词、单字符和非中文词后合并词频
+        counter = KeywordCounter(self.stop_words, self.workers)
         for item in data_items:
-            all_text += f"{item.title} "
-            all_text += f"{getattr(item, 'content', '')} "
-        
-        # 清理文本
-        all_text = re.sub(r'[\s\n\r\t]+', ' ', all_text)  # 替换空白字符
-        all_text = re.sub(r'[\xa0]+', ' ', all_text)  # 替换非断行空格
-        
-        # 使用jieba分词
-        words = jieba.lcut(all_text)
-        
-        # 过滤停用词和单字符
-        filtered_words = [
-            word for word in words 
-            if word not in self.stop_words 
-            and len(word) > 1 
-            and re.match(r'^[\u4e00-\u9fa5]+$', word)  # 只保留中文
-        ]
-        
-        # 统计词频
-        word_counts = Counter(filtered_words)
-        top_keywords_with_freq = word_counts.most_common(top_n)
-        
+            counter.add(item)
+        word_counts = counter.result()
+        return self._keyword_result(word_counts.most_common(top_n), dict(word_counts), len(word_counts))
+    
+    def analyze_user_keywords(self, user_id, top_n=20):
+        """
+        用户全部已保存数据的关键词分析
+        直接读取增量维护的用户词频表，不需要加载和分词数据；结构与 analyze_keywords 相同，
+        keyword_counts 只包含前 top_n 个词
+        """
+        # 词频表按默认停用词过滤，实例上另外添加的停用词在读取后去掉
+        extra_stop_words = self.stop_words - STOP_WORDS
+        top_keywords_with_freq = [
+            (word, freq) for word, freq in features.top_user_terms(user_id, top_n + len(extra_stop_words))
+            if word not in extra_stop_words
+        ][:top_n]
+        if not top_keywords_with_freq:
+            return {"top_keywords": [], "keyword_report": "暂无数据"}
+        return self._keyword_result(top_keywords_with_freq, dict(top_keywords_with_freq),
+                                    features.count_user_terms(user_id))
+    
+    @staticmethod
+    def _keyword_result(top_keywords_with_freq, keyword_counts, total_unique_words):
         # 生成格式化的关键词报告
         keyword_report = ""
         if top_keywords_with_freq:
@@ -130,12 +148,35 @@ class DataAnalyzer:
         
         return {
             "top_keywords": [word for word, _ in top_keywords_with_freq],
-            "keyword_counts": dict(word_counts),
+            "keyword_counts": keyword_counts,
             "keyword_report": keyword_report,
-            "total_unique_words": len(word_counts),
+            "total_unique_words": total_unique_words,
             "top_keywords_with_freq": top_keywords_with_freq
         }
     
+    @staticmethod
+    def _title_length(item):
+        length = getattr(item, 'title_length', None)
+        return length if length is not None else len(item.title)
+    
+    @staticmethod
+    def _analysis_content_length(item):
+        # 未经 clean_data 补全的数据：按补全后的正文计算长度
+        length = getattr(item, 'content_length', None)
+        if length is not None:
+            return features.analysis_content_length(item.title, length)
+        return len(features.analysis_content(item.title, getattr(item, 'content', '')))
+    
+    @staticmethod
+    def _content_length(item):
+        # 入库时保存的是原始正文的长度；没有正文时按当前的正文计算
+        # （经 clean_data 补全后为默认内容，未清洗的数据为0）
+        length = getattr(item, 'content_length', None)
+        if length:
+            return length
+        content = getattr(item, 'content', '')
+        return len(content) if content else 0
+    
     def analyze_time_distribution(self, data_items, days=7):
         """
         时间分布分析
@@ -145,14 +186,21 @@ class DataAnalyzer:
         today = datetime.now().date()
         
         for item in data_items:
-            if item.created_at:
-                # 转换为日期（去掉时间部分）
-                item_date = item.created_at.date()
-                # 只统计最近days天的数据
-                if (today - item_date).days <= days:
-                    date_str = item_date.strftime('%Y-%m-%d')
-                    time_distribution[date_str] += 1
-        
+            self._count_date(time_distribution, item, today, days)
+        return self._time_result(time_distribution, today, days)
+    
+    @staticmethod
+    def _count_date(time_distribution, item, today, days):
+        if item.created_at:
+            # 转换为日期（去掉时间部分）
+            item_date = item.created_at.date()
+            # 只统计最近days天的数据
+            if (today - item_date).days <= days:
+                date_str = item_date.strftime('%Y-%m-%d')
+                time_distribution[date_str] += 1
+    
+    @staticmethod
+    def _time_result(time_distribution, today, days):
         # 确保所有日期都有记录，包括没有数据的日期
         for i in range(days):
             date = today - timedelta(days=i)
@@ -171,8 +219,10 @@ class DataAnalyzer:
         返回各来源的数据数量和百分比
         """
         source_counts = Counter([item.source for item in data_items])
-        total = len(data_items)
-        
+        return self._source_result(source_counts, len(data_items))
+    
+    @staticmethod
+    def _source_result(source_counts, total):
         # 计算百分比并排序
         source_distribution = []
         for source, count in source_counts.most_common():
@@ -190,38 +240,20 @@ class DataAnalyzer:
         文本长度分析
         返回标题和内容长度的统计信息
         """
-        title_lengths = []
-        content_lengths = []
+        title_lengths = LengthStats()
+        content_lengths = LengthStats()
         
         for item in data_items:
-            title_lengths.append(len(item.title))
-            content = getattr(item, 'content', '')
-            content_lengths.append(len(content) if content else 0)
-        
-        # 计算统计信息
-        if title_lengths:
-            title_stats = {
-                'min': min(title_lengths),
-                'max': max(title_lengths),
-                'avg': round(np.mean(title_lengths), 1),
-                'median': round(np.median(title_lengths), 1)
-            }
-        else:
-            title_stats = None
-        
-        if content_lengths and sum(content_lengths) > 0:
-            content_stats = {
-                'min': min([cl for cl in content_lengths if cl > 0]),
-                'max': max(content_lengths),
-                'avg': round(np.mean(content_lengths), 1),
-                'median': round(np.median(content_lengths), 1)
-            }
-        else:
-            content_stats = None
-        
+            title_lengths.add(self._title_length(item))
+            content_lengths.add(self._content_length(item))
+        return self._text_length_result(title_lengths, content_lengths)
+    
+    @staticmethod
+    def _text_length_result(title_lengths, content_lengths):
+        # 计算统计信息（内容长度的最小值不计空内容）
         return {
-            'title_stats': title_stats,
-            'content_stats': content_stats
+            'title_stats': title_lengths.to_dict() if title_lengths.count else None,
+            'content_stats': content_lengths.to_dict(positive_min=True) if content_lengths.total > 0 else None
         }
     
     def extract_text_summaries(self, data_items, max_summaries=5):
@@ -229,28 +261,35 @@ class DataAnalyzer:
         提取文本摘要
         返回最相关的几个文本摘要
         """
-        # 简单实现：返回内容最长的几个项
-        items_with_content = [
-            item for item in data_items 
-            if getattr(item, 'content', '') 
-            and len(getattr(item, 'content', '')) > 20
-        ]
-        
-        # 按内容长度排序
-        sorted_items = sorted(
-            items_with_content,
-            key=lambda x: len(getattr(x, 'content', '')),
-            reverse=True
-        )
-        
-        # 返回前max_summaries个
-        return sorted_items[:max_summaries]
+        # 简单实现：返回内容最长的几个项（内容长度相同时按原顺序）
+        top_items = TopK(max_summaries)
+        for item in data_items:
+            content_length = self._content_length(item)
+            if content_length > 20:
+                top_items.add(content_length, item)
+        return top_items.items()
     
     def generate_insights(self, data_items, keyword_results, source_distribution=None):
         """
         生成优化的分析洞察
         提供结构化的洞察和建议，使报告更加直观易读
         """
+        # 平均文本长度（没有内容时按标题计算）
+        avg_length = None
+        if data_items:
+            text_lengths = []
+            for item in data_items:
+                content_length = self._content_length(item)
+                if content_length:
+                    text_lengths.append(content_length)
+                elif hasattr(item, 'title'):
+                    text_lengths.append(self._title_length(item))
+            if text_lengths:
+                avg_length = sum(text_lengths) / len(text_lengths)
+        return self._build_insights(len(data_items), avg_length, keyword_results, source_distribution)
+    
+    @staticmethod
+    def _build_insights(total_items, avg_length, keyword_results, source_distribution):
         insights = []
         suggestions = []
         
@@ -280,7 +319,6 @@ class DataAnalyzer:
                 })
         
         # 数据量洞察
-        total_items = len(data_items)
         if total_items < 10:
             insights.append({
                 'title': '数据量评估',
@@ -298,17 +336,8 @@ class DataAnalyzer:
             })
         
         # 文本复杂度分析
-        if data_items:
-            text_lengths = []
-            for item in data_items:
-                if hasattr(item, 'content') and getattr(item, 'content', ''):
-                    text_lengths.append(len(getattr(item, 'content', '')))
-                elif hasattr(item, 'title'):
-                    text_lengths.append(len(item.title))
-            
-            if text_lengths:
-                avg_length = sum(text_lengths) / len(text_lengths)
-                insights.append({
+        if avg_length is not None:
+            insights.append({
                 'title': '内容复杂度分析',
                 'content': f'平均文本长度为{avg_length:.0f}字符，{"内容较为简洁" if avg_length < 200 else "内容相对详细" if avg_length < 500 else "内容非常详尽"}。'
             })
@@ -357,6 +386,74 @@ class DataAnalyzer:
         # 获取结构化的洞察
         insights_data = self.generate_insights(cleaned_data, keywords, source_distribution)
         
+        return self._assemble_result(len(data_items), len(cleaned_data), keywords, time_distribution,
+                                     source_distribution, text_length_stats, key_summaries, insights_data)
+    
+    def perform_streaming_analysis(self, query, days=7, top_n=20, max_summaries=5, yield_per=1000):
+        """
+        流式执行完整的数据分析
+        query 为 ScrapedData 的查询（可带过滤和排序条件）。去重在数据库中完成：已保存去重键的数据每组只读取
+        ID最大（最后写入）的一条，结果按 yield_per 逐批读取，清洗和各项统计使用增量累加器在一次遍历中完成，
+        不保留数据对象，内存占用不随数据量增长。
+        缺少去重键的数据（迁移前写入且未补算）在内存中按去重键去重，只记录这类数据的去重键，
+        它们之间重复时保留第一条，与已保存去重键的数据之间不去重。
+        返回结构与 perform_full_analysis 相同，不同之处：
+        - 重复数据保留ID最大的一条（按ID排序的查询与 perform_full_analysis 保留的数据相同），
+          数量或长度相同的来源、摘要按保留的数据在查询中的位置排序
+        - 不修改数据，key_summaries 为 SummaryItem（正文、来源已按清洗规则补全）
+        """
+        today = datetime.now().date()
+        raw_count = query.order_by(None).count()
+        latest_ids = (query.order_by(None).filter(ScrapedData.dedup_key.isnot(None))
+                      .with_entities(func.max(ScrapedData.id)).group_by(ScrapedData.dedup_key))
+        deduped = query.filter(or_(ScrapedData.dedup_key.is_(None), ScrapedData.id.in_(latest_ids.statement)))
+        missing_keys = set()
+        cleaned_count = 0
+        keywords = KeywordCounter(self.stop_words, self.workers)
+        time_distribution = defaultdict(int)
+        source_counts = Counter()
+        title_lengths = LengthStats()
+        content_lengths = LengthStats()
+        top_items = TopK(max_summaries)
+        
+        for item in deduped.yield_per(yield_per):
+            if item.dedup_key is None:
+                key = self._dedup_key(item)
+                if key in missing_keys:
+                    continue
+                missing_keys.add(key)
+            if not self._is_valid(item):
+                continue
+            cleaned_count += 1
+            
+            source_counts[getattr(item, 'source', '') or "未知来源"] += 1
+            self._count_date(time_distribution, item, today, days)
+            keywords.add(item, fill_content=True)
+            content_length = self._analysis_content_length(item)
+            title_lengths.add(self._title_length(item))
+            content_lengths.add(content_length)
+            if content_length > 20:
+                top_items.add(content_length, item)
+        
+        if cleaned_count:
+            word_counts = keywords.result()
+            keyword_results = self._keyword_result(word_counts.most_common(top_n), dict(word_counts), len(word_counts))
+        else:
+            keyword_results = {"top_keywords": [], "keyword_report": "暂无数据"}
+        source_distribution = self._source_result(source_counts, cleaned_count)
+        key_summaries = [SummaryItem.from_item(item) for item in top_items.items()]
+        insights_data = self._build_insights(cleaned_count, content_lengths.mean(), keyword_results, source_distribution)
+        
+        return self._assemble_result(raw_count, cleaned_count, keyword_results,
+                                     self._time_result(time_distribution, today, days), source_distribution,
+                                     self._text_length_result(title_lengths, content_lengths),
+                                     key_summaries, insights_data)
+    
+    @staticmethod
+    def _assemble_result(raw_count, cleaned_count, keywords, time_distribution, source_distribution,
+                         text_length_stats, key_summaries, insights_data):
+        clean_rate = (raw_count - cleaned_count) / raw_count * 100 if raw_count else 0
+        
         # 生成格式化的综合报告
         formatted_report = {
             "title": "数据分析综合报告",
@@ -365,9 +462,9 @@ class DataAnalyzer:
                     "title": "1. 数据质量概览",
                     "content": f"""
 数据处理统计：
-- 原始数据总量：{len(data_items)} 条
-- 清洗后有效数据：{len(cleaned_data)} 条
-- 数据清洗率：{(len(data_items) - len(cleaned_data)) / len(data_items) * 100:.1f}% 
+- 原始数据总量：{raw_count} 条
+- 清洗后有效数据：{cleaned_count} 条
+- 数据清洗率：{clean_rate:.1f}% 
                     """.strip()
                 },
                 {
@@ -387,8 +484,8 @@ class DataAnalyzer:
         
         # 第三步：整合分析结果
         analysis_result = {
-            'raw_count': len(data_items),
-            'cleaned_count': len(cleaned_data),
+            'raw_count': raw_count,
+            'cleaned_count': cleaned_count,
             'keywords': keywords,
             'time_distribution': time_distribution,
             'source_distribution': source_distribution,
@@ -397,7 +494,7 @@ class DataAnalyzer:
             'insights': insights_data,
             'formatted_report': formatted_report,
             'pdf_content': {
-                "quality_summary": f"原始数据 {len(data_items)} 条，清洗后得到 {len(cleaned_data)} 条有效记录，清洗率 {(len(data_items) - len(cleaned_data)) / len(data_items) * 100:.1f}%",
+                "quality_summary": f"原始数据 {raw_count} 条，清洗后得到 {cleaned_count} 条有效记录，清洗率 {clean_rate:.1f}%",
                 "keyword_highlights": ", ".join([f"{word}({freq})" for word, freq in (keywords[:5] if isinstance(keywords, list) else keywords.get("top_keywords_with_freq", [])[:5])]),
                 "main_insights": insights_data.get("formatted_insights", ""),
                 "key_suggestions": insights_data.get("formatted_suggestions", "")
@@ -0,0 +1,199 @@
+"""
+入库去重
+
+- URL规范化：统一大小写、去掉默认端口/片段/跟踪参数，并对查询参数排序
+- 内容哈希：规范化URL + 标题 + 内容的SHA1，配合 (user_id, content_hash) 唯一索引实现入库upsert
+- 可选的内存布隆过滤器：明显重复的条目无需访问数据库即可跳过
+"""
+import hashlib
+import math
+import re
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from . import db
+from .content_store import store_bodies, purge_unreferenced
+from .features import add_row_features
+from .models import ScrapedData
+
+# 规范化时丢弃的跟踪参数（另有 utm_* 前缀）。from、ref、source 等参数在不少网站上决定页面内容，
+# 丢弃后不同页面会得到相同的 canonical_url 并被唯一索引当作重复数据忽略，因此予以保留
+TRACKING_PARAMS = {'spm', 'share_token', 'gclid', 'fbclid'}
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+_WHITESPACE = re.compile(r'\s+')
+
+# 唯一索引名称及定义（仅对已计算哈希的行生效）
+UNIQUE_INDEX_NAME = 'ux_scraped_data_user_hash'
+UNIQUE_INDEX_WHERE = 'content_hash IS NOT NULL'
+
+
+def canonicalize_url(url):
+    """
+    URL规范化，相同页面的不同写法得到同一个URL
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port if parts.port and parts.port != _DEFAULT_PORTS.get(scheme) else None
+    netloc = f'{host}:{port}' if port else host
+
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def _normalize_text(value):
+    return _WHITESPACE.sub(' ', value or '').strip()
+
+
+def compute_content_hash(title, content, canonical_url):
+    """计算去重用的内容哈希（40位十六进制）"""
+    payload = '\x00'.join((canonical_url or '', _normalize_text(title), _normalize_text(content)))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def prepare_row(row):
+    """为待入库的行补充 canonical_url 和 content_hash 字段"""
+    row['canonical_url'] = canonicalize_url(row.get('url'))[:500]
+    row['content_hash'] = compute_content_hash(row.get('title'), row.get('content'), row['canonical_url'])
+    return row
+
+
+def upsert_scraped_rows(rows):
+    """
+    批量upsert抓取结果：(user_id, content_hash) 已存在的行直接忽略
+
+    返回实际插入的行数，调用方负责提交事务。
+    """
+    if not rows:
+        return 0
+    # 分析用的长度、去重键等数值特征随数据一起写入
+    for row in rows:
+        add_row_features(row)
+    # 正文写入内容寻址存储，行中只保存正文哈希
+    hashes = store_bodies([row.get('content') for row in rows])
+    rows = [
+        dict(row, content=None, body_hash=hashes[row['content']]) if row.get('content') else dict(row, body_hash=None)
+        for row in rows
+    ]
+    stmt = sqlite_insert(ScrapedData.__table__).on_conflict_do_nothing(
+        index_elements=['user_id', 'content_hash'],
+        index_where=text(UNIQUE_INDEX_WHERE)
+    )
+    result = db.session.execute(stmt, rows)
+    # 因重复被忽略的行不会增加引用数，对应的新正文随即删除
+    purge_unreferenced(hashes.values())
+    return max(result.rowcount, 0)
+
+
+class BloomFilter:
+    """
+    简单的布隆过滤器
+
+    capacity 为预计元素数，error_rate 为期望的误判率。
+    判定为“不存在”时一定不存在；判定为“可能存在”时有 error_rate 的概率误判。
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        capacity = max(1, int(capacity))
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        with self._lock:
+            for pos in self._positions(key):
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+            self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+# 进程内按用户缓存的布隆过滤器
+_user_blooms = {}
+_user_blooms_lock = threading.Lock()
+
+
+def get_user_bloom(user_id, capacity=100000, error_rate=0.001):
+    """
+    获取某个用户的布隆过滤器，首次调用时从数据库加载该用户已有的内容哈希
+
+    需要在应用上下文中调用。元素数超过容量时自动按两倍容量重建。
+    """
+    with _user_blooms_lock:
+        bloom = _user_blooms.get(user_id)
+        if bloom is not None and bloom.count <= bloom.capacity:
+            return bloom
+
+    query = db.session.query(ScrapedData.content_hash).filter(
+        ScrapedData.user_id == user_id,
+        ScrapedData.content_hash.isnot(None)
+    )
+    existing = query.count()
+    bloom = BloomFilter(max(capacity, existing * 2), error_rate)
+    for (content_hash,) in query.yield_per(5000):
+        bloom.add(content_hash)
+
+    with _user_blooms_lock:
+        _user_blooms[user_id] = bloom
+    return bloom
+
+
+def backfill_content_hashes(conn):
+    """
+    为历史数据补算 canonical_url 和 content_hash
+
+    同一用户的重复行只有一行获得哈希（优先已保存、其次最新的一行），
+    其余重复行保持为空，不删除任何历史数据，也不会违反唯一索引。
+    """
+    seen = {
+        (user_id, content_hash)
+        for user_id, content_hash in conn.execute(text(
+            "SELECT user_id, content_hash FROM scraped_data WHERE content_hash IS NOT NULL"
+        ))
+    }
+    rows = conn.execute(text(
+        "SELECT id, user_id, title, content, url FROM scraped_data "
+        "WHERE content_hash IS NULL ORDER BY saved DESC, created_at DESC, id DESC"
+    )).fetchall()
+
+    updates = []
+    for row_id, user_id, title, content, url in rows:
+        canonical_url = canonicalize_url(url)[:500]
+        content_hash = compute_content_hash(title, content, canonical_url)
+        if (user_id, content_hash) in seen:
+            updates.append({'id': row_id, 'canonical_url': canonical_url, 'content_hash': None})
+            continue
+        seen.add((user_id, content_hash))
+        updates.append({'id': row_id, 'canonical_url': canonical_url, 'content_hash': content_hash})
+
+    if updates:
+        conn.execute(text(
+            "UPDATE scraped_data SET canonical_url = :canonical_url, content_hash = :content_hash WHERE id = :id"
+        ), updates)
+    return len(updates)
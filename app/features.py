@@ -0,0 +1,303 @@
+"""
+入库时提取的分析特征
+
+报告分析需要的逐条特征只计算一次并随数据保存，生成报告时只做汇总，不再重复分词：
+- 数值特征保存在 scraped_data 的列中：title_length / content_length（标题和原始正文的长度，没有正文时为0）、
+  dedup_key（DataAnalyzer.clean_data 去重键的64位哈希），抓取入库时由 upsert_scraped_rows() 计算
+- 词频保存在 data_terms 表中 (data_id, term_id, count)，词语登记在 terms 表中并以整数编号引用。
+  分词在保存数据时进行（大部分抓取结果不会被保存和分析），token_count 为空表示尚未分词
+- 每个用户全部已保存数据的词频汇总在 user_terms 表中，由数据库触发器在写入词频、修改保存状态、
+  删除数据时增量维护，仓库整体的关键词分析只需按词频读取前N个词（top_user_terms）
+
+分析用文本与 clean_data() 处理后一致：没有正文时以“标题 - 暂无详细内容”代替（只在分析时代替，
+保存的 content_length 仍为0，见 analysis_content_length()）；
+词频按默认停用词 STOP_WORDS 过滤，与 analyze_keywords() 对原文分词的结果相同。
+segment_rows() 在请求线程中分词，store_terms() 只负责写入，应在写操作（app/writer.py）中调用，不提交。
+"""
+import hashlib
+from collections import Counter
+
+from sqlalchemy import bindparam, text
+
+from . import db
+from .content_store import row_body, select_body_sql
+from .segmentation import STOP_WORDS, count_chunk
+
+# IN 查询每批的参数个数（SQLite 旧版本限制为999个）
+QUERY_BATCH_SIZE = 500
+
+# 迁移时每批补算的行数
+BACKFILL_BATCH_SIZE = 1000
+
+_DELETE_TRIGGER = 'trg_scraped_data_terms_delete'
+
+# 用户词频表中计数加减一组 data_terms 行后，删除降为0的词
+_USER_TERMS_UPSERT = (
+    "INSERT INTO user_terms (user_id, term_id, count) {select} "
+    "ON CONFLICT (user_id, term_id) DO UPDATE SET count = count + excluded.count; "
+)
+_USER_TERMS_PRUNE = (
+    "DELETE FROM user_terms WHERE user_id = {row}.user_id AND count <= 0 "
+    "AND term_id IN (SELECT term_id FROM data_terms WHERE data_id = {row}.id); "
+)
+
+
+def _batches(values, size=QUERY_BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def analysis_content(title, content):
+    """分析时使用的正文：没有正文时与 clean_data() 一样以标题代替"""
+    return content or f"{title} - 暂无详细内容"
+
+
+def analysis_content_length(title, content_length):
+    """由保存的原始正文长度得到分析用正文的长度（没有正文时为代替文本的长度）"""
+    return content_length or len(analysis_content(title or '', ''))
+
+
+def dedup_key(title, url=None, source=None):
+    """clean_data() 去重键（标题+URL，没有URL时为标题+来源）的64位哈希"""
+    key = title
+    if url:
+        key = f"{title}_{url}"
+    elif source:
+        key = f"{title}_{source}"
+    digest = hashlib.sha1((key or '').encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+def has_content(item):
+    """数据是否有正文（正文在内容存储中时不需要读取和解压）"""
+    if getattr(item, 'body_hash', None):
+        return True
+    return bool(getattr(item, 'content', ''))
+
+
+def add_row_features(row):
+    """为待入库的行补充数值特征（需在正文移入内容存储之前调用）"""
+    title = row.get('title') or ''
+    row['title_length'] = len(title)
+    row['content_length'] = len(row.get('content') or '')
+    row['dedup_key'] = dedup_key(title, row.get('url'), row.get('source'))
+    row.setdefault('token_count', None)
+    return row
+
+
+def term_counts(title, content):
+    """一条数据的词频（标题与分析用正文）"""
+    return count_chunk([title or '', analysis_content(title, content)], STOP_WORDS)
+
+
+def segment_rows(user_id, data_ids):
+    """为用户指定数据中尚未分词的行分词，返回 {data_id: Counter}（只读，可在请求线程中执行）"""
+    columns, join = select_body_sql('s')
+    sql = text(
+        f"SELECT s.id, s.title, {columns} FROM scraped_data s {join} "
+        f"WHERE s.id IN :ids AND s.user_id = :user_id AND s.token_count IS NULL"
+    ).bindparams(bindparam('ids', expanding=True))
+    counts = {}
+    with db.session.no_autoflush:
+        for batch in _batches(int(data_id) for data_id in data_ids if str(data_id).isdigit()):
+            for row_id, title, content, data, compressed in db.session.execute(
+                sql, {'ids': batch, 'user_id': user_id}
+            ):
+                counts[row_id] = term_counts(title, row_body(content, data, compressed))
+    return counts
+
+
+def intern_terms(words, conn=None):
+    """返回 {词: 编号}，不存在的词按传入顺序登记"""
+    conn = conn if conn is not None else db.session
+    words = list(dict.fromkeys(words))
+    select = text("SELECT word, id FROM terms WHERE word IN :words").bindparams(bindparam('words', expanding=True))
+    ids = {}
+    for batch in _batches(words):
+        ids.update(conn.execute(select, {'words': batch}).fetchall())
+    missing = [word for word in words if word not in ids]
+    if missing:
+        conn.execute(text("INSERT OR IGNORE INTO terms (word) VALUES (:word)"), [{'word': w} for w in missing])
+        for batch in _batches(missing):
+            ids.update(conn.execute(select, {'words': batch}).fetchall())
+    return ids
+
+
+def store_terms(counts, conn=None):
+    """
+    写入 segment_rows() 得到的词频并记录 token_count，不提交事务
+
+    已分词的行（并发保存时由其他请求先写入）保持不变。返回写入词频的行数。
+    """
+    conn = conn if conn is not None else db.session
+    if not counts:
+        return 0
+    ids = intern_terms((word for words in counts.values() for word in words), conn)
+    rows = [
+        {'data_id': data_id, 'term_id': ids[word], 'count': count}
+        for data_id, words in counts.items() for word, count in words.items()
+    ]
+    if rows:
+        conn.execute(text(
+            "INSERT OR IGNORE INTO data_terms (data_id, term_id, count) VALUES (:data_id, :term_id, :count)"
+        ), rows)
+    result = conn.execute(text(
+        "UPDATE scraped_data SET token_count = :token_count WHERE id = :id AND token_count IS NULL"
+    ), [{'id': data_id, 'token_count': sum(words.values())} for data_id, words in counts.items()])
+    return max(result.rowcount, 0)
+
+
+def stored_term_totals(data_ids):
+    """汇总已分词数据的词频，返回 Counter({词编号: 词频})"""
+    sql = text(
+        "SELECT term_id, SUM(count) FROM data_terms WHERE data_id IN :ids GROUP BY term_id"
+    ).bindparams(bindparam('ids', expanding=True))
+    totals = Counter()
+    # 分析时的数据可能已被 clean_data() 修改，查询前不能自动 flush（会占用写锁并阻塞写线程）
+    with db.session.no_autoflush:
+        for batch in _batches(set(data_ids)):
+            totals.update(dict(db.session.execute(sql, {'ids': batch}).fetchall()))
+    return totals
+
+
+def named_term_counts(totals):
+    """
+    把按词编号汇总的词频转换为 Counter({词: 词频})
+
+    按词频从高到低、同频按词语首次登记的顺序排列，与对原文整体分词时的顺序基本一致。
+    """
+    sql = text("SELECT id, word FROM terms WHERE id IN :ids").bindparams(bindparam('ids', expanding=True))
+    words = {}
+    with db.session.no_autoflush:
+        for batch in _batches(totals):
+            words.update(db.session.execute(sql, {'ids': batch}).fetchall())
+    return Counter({
+        words[term_id]: total
+        for term_id, total in sorted(totals.items(), key=lambda x: (-x[1], x[0]))
+    })
+
+
+def stored_term_counts(data_ids):
+    """汇总已分词数据的词频，返回 Counter({词: 词频})"""
+    return named_term_counts(stored_term_totals(data_ids))
+
+
+def top_user_terms(user_id, limit=20):
+    """用户全部已保存数据中词频最高的词，返回 [(词, 词频), ...]（同频按词语首次登记的顺序）"""
+    return [tuple(row) for row in db.session.execute(text(
+        "SELECT t.word, u.count FROM user_terms u JOIN terms t ON t.id = u.term_id "
+        "WHERE u.user_id = :user_id ORDER BY u.count DESC, u.term_id LIMIT :limit"
+    ), {'user_id': user_id, 'limit': limit})]
+
+
+def count_user_terms(user_id):
+    """用户全部已保存数据中不同词的个数"""
+    return db.session.execute(text(
+        "SELECT COUNT(*) FROM user_terms WHERE user_id = :user_id"
+    ), {'user_id': user_id}).scalar()
+
+
+# ---------- 结构与迁移 ----------
+
+def add_feature_columns(conn):
+    """为 scraped_data 补充特征字段"""
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(scraped_data)"))}
+    for name, column_type in (('title_length', 'INTEGER'), ('content_length', 'INTEGER'),
+                              ('dedup_key', 'BIGINT'), ('token_count', 'INTEGER')):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE scraped_data ADD COLUMN {name} {column_type}"))
+
+
+def create_delete_trigger(conn):
+    """删除数据时一并删除其词频"""
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {_DELETE_TRIGGER} AFTER DELETE ON scraped_data BEGIN "
+        f"DELETE FROM data_terms WHERE data_id = OLD.id; END"
+    ))
+
+
+def create_user_term_triggers(conn):
+    """
+    维护 user_terms 的触发器：
+    - 写入词频时，数据已保存则计入用户词频（保存数据时先更新保存状态、后写入词频）
+    - 保存状态变化时计入或减去该数据已有的词频
+    - 删除已保存的数据前减去其词频（词频随后由删除触发器清理）
+    """
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS trg_data_terms_user_insert AFTER INSERT ON data_terms BEGIN "
+        + _USER_TERMS_UPSERT.format(select=(
+            "SELECT user_id, NEW.term_id, NEW.count FROM scraped_data WHERE id = NEW.data_id AND saved = 1"
+        ))
+        + "END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS trg_scraped_data_user_terms_saved AFTER UPDATE OF saved ON scraped_data "
+        "WHEN OLD.saved IS NOT NEW.saved BEGIN "
+        + _USER_TERMS_UPSERT.format(select=(
+            "SELECT NEW.user_id, term_id, CASE WHEN NEW.saved THEN count ELSE -count END "
+            "FROM data_terms WHERE data_id = NEW.id"
+        ))
+        + _USER_TERMS_PRUNE.format(row='NEW')
+        + "END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS trg_scraped_data_user_terms_delete BEFORE DELETE ON scraped_data "
+        "WHEN OLD.saved BEGIN "
+        + _USER_TERMS_UPSERT.format(select=(
+            "SELECT OLD.user_id, term_id, -count FROM data_terms WHERE data_id = OLD.id"
+        ))
+        + _USER_TERMS_PRUNE.format(row='OLD')
+        + "END"
+    ))
+
+
+def rebuild_user_terms(conn):
+    """按已保存数据的词频重新计算 user_terms（迁移或修复时使用），返回行数"""
+    conn.execute(text("DELETE FROM user_terms"))
+    result = conn.execute(text(
+        "INSERT INTO user_terms (user_id, term_id, count) "
+        "SELECT s.user_id, d.term_id, SUM(d.count) FROM data_terms d JOIN scraped_data s ON s.id = d.data_id "
+        "WHERE s.saved = 1 GROUP BY s.user_id, d.term_id"
+    ))
+    return max(result.rowcount, 0)
+
+
+def reset_placeholder_lengths(conn):
+    """把没有正文的数据按代替文本保存的 content_length 改为0，返回修改的行数"""
+    result = conn.execute(text(
+        "UPDATE scraped_data SET content_length = 0 "
+        "WHERE content_length > 0 AND body_hash IS NULL AND COALESCE(content, '') = ''"
+    ))
+    return max(result.rowcount, 0)
+
+
+def backfill_features(conn):
+    """为历史数据补算数值特征，并为已保存的数据分词，返回 (补算行数, 分词行数)"""
+    columns, join = select_body_sql('s')
+    computed = segmented = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(text(
+            f"SELECT s.id, s.title, s.url, s.source, s.saved, s.token_count, {columns} FROM scraped_data s {join} "
+            f"WHERE (s.title_length IS NULL OR (s.saved = 1 AND s.token_count IS NULL)) AND s.id > :last_id "
+            f"ORDER BY s.id LIMIT :limit"
+        ), {'last_id': last_id, 'limit': BACKFILL_BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        updates, counts = [], {}
+        for row_id, title, url, source, saved, token_count, content, data, compressed in rows:
+            content = row_body(content, data, compressed)
+            row = add_row_features({'title': title, 'content': content, 'url': url, 'source': source})
+            updates.append({'id': row_id, 'title_length': row['title_length'],
+                            'content_length': row['content_length'], 'dedup_key': row['dedup_key']})
+            if saved and token_count is None:
+                counts[row_id] = term_counts(title, content)
+        conn.execute(text(
+            "UPDATE scraped_data SET title_length = :title_length, content_length = :content_length, "
+            "dedup_key = :dedup_key WHERE id = :id"
+        ), updates)
+        segmented += store_terms(counts, conn)
+        computed += len(updates)
+        last_id = rows[-1][0]
+    return computed, segmented
@@ -0,0 +1,342 @@
+"""
+爬虫HTTP响应磁盘缓存
+
+以 requests 传输适配器的形式挂载在爬虫会话上：
+- 响应体保存在磁盘上，总大小超出预算时按LRU淘汰
+- 遵循 Cache-Control（no-store / no-cache / max-age / s-maxage）和 Expires
+- 过期条目通过 ETag / Last-Modified 条件请求重新验证，未变化的页面只需一个304响应
+- 统计命中率和节省的下载字节数
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# 默认缓存目录及大小预算
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'http_cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 缓存体已解码，这些头不应随缓存响应返回
+_DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection'}
+
+
+def parse_cache_control(value):
+    """解析 Cache-Control 头，返回 {指令: 值} 字典"""
+    directives = {}
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition('=')
+        directives[name.strip().lower()] = arg.strip().strip('"') or True
+    return directives
+
+
+def _freshness_lifetime(headers):
+    """根据响应头计算新鲜期（秒）"""
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            try:
+                return max(0, int(directives[name]))
+            except (TypeError, ValueError):
+                return 0
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            expires_at = parsedate_to_datetime(expires).timestamp()
+            date = headers.get('Date')
+            now = parsedate_to_datetime(date).timestamp() if date else time.time()
+            return max(0, int(expires_at - now))
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+class HttpCache:
+    """
+    基于磁盘的LRU响应缓存
+
+    每个条目对应 <key>.body（响应体）和 <key>.json（元数据）两个文件，
+    访问顺序保存在内存中，启动时按文件修改时间恢复。
+    两个文件都先写入同目录下的临时文件再原子替换，先替换响应体、最后替换元数据，
+    读取时再核对元数据记录的响应体大小，不会把写了一半或不匹配的响应体当作命中返回。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> 条目占用字节数
+        self._total_bytes = 0
+        self._stats = {
+            'requests': 0,
+            'hits': 0,
+            'revalidated': 0,
+            'misses': 0,
+            'stored': 0,
+            'evictions': 0,
+            'bytes_saved': 0,
+            'bytes_downloaded': 0
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.body', base + '.json'
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.tmp'):
+                # 写入过程中中断遗留的临时文件
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+                continue
+            if not name.endswith('.json'):
+                continue
+            key = name[:-5]
+            body_path, meta_path = self._paths(key)
+            try:
+                size = os.path.getsize(body_path) + os.path.getsize(meta_path)
+                entries.append((os.path.getmtime(meta_path), key, size))
+            except OSError:
+                continue
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def make_key(url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def get(self, url):
+        """读取缓存条目，返回 (meta, body)，不存在时返回 None"""
+        key = self.make_key(url)
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            if len(body) != meta.get('body_bytes', len(body)):
+                raise ValueError('响应体与元数据不匹配')
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            self._remove(key)
+            return None
+        return meta, body
+
+    def _write_atomic(self, path, data):
+        """写入同目录下的临时文件后原子替换目标文件"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def put(self, url, meta, body):
+        """写入缓存条目，并在超出预算时淘汰最久未使用的条目"""
+        key = self.make_key(url)
+        body_path, meta_path = self._paths(key)
+        meta_bytes = json.dumps(dict(meta, body_bytes=len(body)), ensure_ascii=False).encode('utf-8')
+        size = len(body) + len(meta_bytes)
+        if size > self.max_bytes:
+            return
+        try:
+            self._write_atomic(body_path, body)
+            self._write_atomic(meta_path, meta_bytes)
+        except OSError as e:
+            print(f"HTTP缓存写入失败: {e}")
+            return
+        with self._lock:
+            self._total_bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._stats['stored'] += 1
+        self._evict()
+
+    def update_meta(self, url, meta):
+        """重新验证成功后只更新元数据"""
+        _, meta_path = self._paths(self.make_key(url))
+        try:
+            self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        except OSError as e:
+            print(f"HTTP缓存写入失败: {e}")
+
+    def _remove(self, key):
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes or not self._index:
+                    return
+                key, size = self._index.popitem(last=False)
+                self._total_bytes -= size
+                self._stats['evictions'] += 1
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def record(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def stats(self):
+        """返回缓存统计：命中率（含304重新验证）、节省字节数等"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._index)
+            stats['total_bytes'] = self._total_bytes
+        served = stats['hits'] + stats['revalidated']
+        stats['hit_rate'] = round(served / stats['requests'], 3) if stats['requests'] else 0.0
+        return stats
+
+    def summary(self):
+        """用于日志输出的一行统计（进程启动以来累计）"""
+        stats = self.stats()
+        return (f"HTTP缓存累计: 请求 {stats['requests']} 次，命中 {stats['hits']}，重新验证 {stats['revalidated']}，"
+                f"命中率 {stats['hit_rate']:.1%}，节省下载 {stats['bytes_saved'] / 1024 / 1024:.1f}MB，"
+                f"缓存 {stats['entries']} 条/{stats['total_bytes'] / 1024 / 1024:.1f}MB")
+
+    def clear(self):
+        """清空缓存"""
+        for key in list(self._index):
+            self._remove(key)
+
+
+def init_http_cache(app):
+    """
+    按配置创建应用共用的响应缓存，保存在 app.extensions['http_cache']
+
+    未启用（HTTP_CACHE_ENABLED 为 False）时保存 None，返回创建的缓存。
+    """
+    cache = None
+    if app.config.get('HTTP_CACHE_ENABLED'):
+        cache = HttpCache(
+            app.config.get('HTTP_CACHE_DIR') or DEFAULT_CACHE_DIR,
+            max_bytes=app.config.get('HTTP_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+        )
+    app.extensions['http_cache'] = cache
+    return cache
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    带磁盘缓存的传输适配器，只缓存 GET 请求的 200 响应
+    """
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        cache = self.cache
+        cache.record('requests')
+        cached = cache.get(request.url)
+
+        if cached:
+            meta, body = cached
+            if not meta.get('no_cache') and time.time() < meta['stored_at'] + meta['max_age']:
+                cache.record('hits')
+                cache.record('bytes_saved', len(body))
+                return self._build_cached_response(request, meta, body, 'hit')
+            if meta.get('etag'):
+                request.headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request.headers['If-Modified-Since'] = meta['last_modified']
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and cached:
+            meta, body = cached
+            meta.update(self._freshness(response.headers, meta))
+            cache.update_meta(request.url, meta)
+            cache.record('revalidated')
+            cache.record('bytes_saved', len(body))
+            response.close()
+            return self._build_cached_response(request, meta, body, 'revalidated')
+
+        cache.record('misses')
+        if response.status_code == 200 and not kwargs.get('stream'):
+            body = response.content
+            cache.record('bytes_downloaded', len(body))
+            directives = parse_cache_control(response.headers.get('Cache-Control'))
+            if 'no-store' not in directives:
+                headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+                meta = {
+                    'url': request.url,
+                    'headers': headers,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
+                meta.update(self._freshness(response.headers))
+                cache.put(request.url, meta, body)
+        response.cache_status = 'miss'
+        return response
+
+    @staticmethod
+    def _freshness(headers, previous=None):
+        """计算新的新鲜期信息；304响应未携带的验证器沿用旧值"""
+        directives = parse_cache_control(headers.get('Cache-Control'))
+        freshness = {
+            'stored_at': time.time(),
+            'max_age': _freshness_lifetime(headers),
+            'no_cache': 'no-cache' in directives
+        }
+        if previous is not None:
+            if 'Cache-Control' not in headers and 'Expires' not in headers:
+                freshness['max_age'] = previous.get('max_age', 0)
+                freshness['no_cache'] = previous.get('no_cache', False)
+            for name, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified')):
+                if headers.get(header):
+                    freshness[name] = headers[header]
+        return freshness
+
+    def _build_cached_response(self, request, meta, body, status):
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(meta.get('headers', {}))
+        response.headers['Content-Length'] = str(len(body))
+        response._content = body
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.cache_status = status
+        return response
@@ -0,0 +1,487 @@
+"""
+流式入库管道
+
+抓取 → 解析 → 规范化 → 去重 → 批量入库，各阶段运行在独立线程中，
+阶段之间通过有界队列连接：下游处理不过来时上游会阻塞（背压），
+因此解析和数据库写入可以与网络I/O重叠，内存占用也不会随抓取规模增长。
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from . import db
+from .dedup import prepare_row, upsert_scraped_rows
+from .scraper import ScrapeEngine, parse_baidu_results
+from .writer import write_queue
+
+# 阶段结束标记
+_DONE = object()
+
+# 去重阶段默认保留的最近键数
+DEDUP_WINDOW = 10000
+
+
+class StageStats:
+    """单个阶段的吞吐量计数器"""
+
+    def __init__(self, name):
+        self.name = name
+        self.received = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, received=0, emitted=0, errors=0, busy=0.0):
+        with self._lock:
+            self.received += received
+            self.emitted += emitted
+            self.errors += errors
+            self.busy_seconds += busy
+
+    def to_dict(self, elapsed):
+        return {
+            'stage': self.name,
+            'received': self.received,
+            'emitted': self.emitted,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'throughput': round(self.emitted / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+class _TaskTracker:
+    """
+    断点续抓用的页面进度跟踪
+
+    记录每个 (keyword, page) 尚未入库的行数，该页所有行入库（或被去重丢弃）后记为完成，
+    完成与失败的页面由入库线程随下一批数据一起写入检查点。
+    多数据源时每页由 parts 个数据源分别抓取，全部数据源都已返回且所有行入库后才算完成，
+    任一数据源失败则该页记为失败（下次运行时重新抓取，已入库的行会被去重）。
+    """
+
+    def __init__(self, parts=1):
+        self.parts = parts
+        self._parts = {}
+        self._remaining = {}
+        self._results = {}
+        self._failed_tasks = set()
+        self._completed = []
+        self._failed = []
+        self._lock = threading.Lock()
+
+    def _settle(self, task):
+        """该页所有数据源都已返回且所有行都已处理时，记为完成或失败"""
+        if self._parts.get(task, self.parts) or self._remaining.get(task):
+            return
+        self._parts.pop(task, None)
+        self._remaining.pop(task, None)
+        results = self._results.pop(task, 0)
+        if task in self._failed_tasks:
+            self._failed_tasks.discard(task)
+            self._failed.append(task)
+        else:
+            self._completed.append((task[0], task[1], results))
+
+    def start(self, task, count):
+        with self._lock:
+            self._parts[task] = self._parts.get(task, self.parts) - 1
+            self._remaining[task] = self._remaining.get(task, 0) + count
+            self._results[task] = self._results.get(task, 0) + count
+            self._settle(task)
+
+    def finish(self, task):
+        with self._lock:
+            self._remaining[task] -= 1
+            self._settle(task)
+
+    def fail(self, task):
+        with self._lock:
+            self._parts[task] = self._parts.get(task, self.parts) - 1
+            self._failed_tasks.add(task)
+            self._settle(task)
+
+    def drain(self):
+        """取出目前已完成和失败的页面"""
+        with self._lock:
+            completed, failed = self._completed, self._failed
+            self._completed, self._failed = [], []
+        return completed, failed
+
+
+class RecentKeys:
+    """
+    最近见过的键（LRU），最多保存 max_size 个，内存占用与抓取规模无关
+
+    重复条目通常集中出现（同一页或相邻页面），窗口之外的重复由布隆过滤器和
+    (user_id, content_hash) 唯一索引兜底。
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._keys = OrderedDict()
+
+    def check_and_add(self, key):
+        """键已在窗口内时返回 True，否则记录该键并返回 False"""
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        self._keys[key] = None
+        if len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+        return False
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class IngestPipeline:
+    """
+    抓取结果流式入库管道
+
+    - fetcher(keyword, page): 返回原始页面内容，默认使用 ScrapeEngine.fetch_html
+      （可通过 cache 为默认抓取引擎挂载 http_cache.HttpCache）
+    - parser(payload): 把原始内容解析为 title/content/url 字典列表；
+      为 None 时表示 fetcher 已返回解析好的结果
+    - batch_size: 每批提交的行数
+    - queue_size: 阶段之间队列的最大长度
+    - sources: 可选的数据源适配器列表（sources.SourceAdapter），传入时忽略 fetcher/parser/source，
+      每页并行请求所有数据源，每个数据源按自己的 max_concurrency 启动抓取线程，
+      结果合并为一条流并按规范化URL做跨数据源去重
+    - bloom: 可选的 dedup.BloomFilter，命中的条目视为已入库，不再访问数据库
+    - dedup_window: 去重阶段在内存中保留的最近内容哈希（及URL）数，超出后淘汰最久未出现的
+    - article_fetcher: 可选的 article.ArticleFetcher，启用后在去重与入库之间增加正文抓取阶段，
+      用提取出的正文替换摘要写入 content（content_hash 仍按摘要计算，保持去重口径不变）
+
+    入库为 upsert：(user_id, content_hash) 已存在的行会被忽略。
+    run() 传入 checkpoint（checkpoint.CrawlCheckpoint）时只抓取未完成的页面，
+    并把页面完成状态与该页数据在同一事务中提交。
+    """
+
+    STAGES = ('fetch', 'parse', 'normalize', 'dedup', 'article', 'insert')
+
+    def __init__(self, app, user_id, source='百度', batch_size=500, queue_size=1000,
+                 fetch_workers=8, fetcher=None, parser=parse_baidu_results, cache=None,
+                 bloom=None, article_fetcher=None, sources=None, dedup_window=DEDUP_WINDOW):
+        self.app = app
+        self.user_id = user_id
+        self.source = source
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.fetch_workers = fetch_workers
+        self.parser = parser
+        self.bloom = bloom
+        self.dedup_window = dedup_window
+        self.article_fetcher = article_fetcher
+        self.sources = list(sources) if sources else None
+
+        self._engine = None
+        if fetcher is None and self.sources is None:
+            self._engine = ScrapeEngine(max_workers=fetch_workers, cache=cache)
+            fetcher = self._engine.fetch_html
+        self.fetcher = fetcher
+
+        self.stage_names = [name for name in self.STAGES if name != 'article' or article_fetcher is not None]
+        self.stats = {name: StageStats(name) for name in self.stage_names}
+        # 每个数据源的抓取统计
+        self.source_stats = {source.name: StageStats(source.name) for source in self.sources or []}
+        self.errors = []
+        self.checkpoint = None
+        self._tracker = None
+        self._started_at = None
+        self._finished_at = None
+
+    def _queue(self):
+        return queue.Queue(maxsize=self.queue_size)
+
+    def _record_error(self, stage, error):
+        self.stats[stage].record(errors=1)
+        self.errors.append(f'{stage}: {error}')
+        print(f"入库管道错误 [{stage}]: {error}")
+
+    # ====== 各阶段 ======
+
+    def _feed(self, keywords, pages, job_queues):
+        """
+        把 (keyword, page) 任务逐个放入队列，最后为每个抓取线程放一个结束标记
+
+        job_queues 为 [(队列, 抓取线程数)]，多数据源时每个数据源一个队列，每个任务放入所有队列。
+        """
+        try:
+            if self.checkpoint is not None:
+                with self.app.app_context():
+                    for task in self.checkpoint.pending_tasks():
+                        for job_queue, _ in job_queues:
+                            job_queue.put(task)
+                    db.session.remove()
+            else:
+                for keyword in keywords:
+                    for page in range(pages):
+                        for job_queue, _ in job_queues:
+                            job_queue.put((keyword, page))
+        except Exception as e:
+            self._record_error('fetch', f"读取待抓取页面失败: {e}")
+        finally:
+            for job_queue, workers in job_queues:
+                for _ in range(workers):
+                    job_queue.put(_DONE)
+
+    def _fetch(self, job_queue, out_queue, source=None):
+        stats = self.stats['fetch']
+        source_stats = self.source_stats[source.name] if source is not None else None
+        while True:
+            job = job_queue.get()
+            if job is _DONE:
+                out_queue.put(_DONE)
+                return
+            keyword, page = job
+            start = time.perf_counter()
+            try:
+                payload = source.fetch(keyword, page) if source is not None else self.fetcher(keyword, page)
+            except Exception as e:
+                label = f"[{source.name}] " if source is not None else ''
+                self._record_error('fetch', f"{label}关键词 '{keyword}' 第 {page + 1} 页: {e}")
+                if source_stats is not None:
+                    source_stats.record(received=1, errors=1, busy=time.perf_counter() - start)
+                if self._tracker is not None:
+                    self._tracker.fail(job)
+                continue
+            busy = time.perf_counter() - start
+            stats.record(received=1, emitted=1, busy=busy)
+            if source_stats is not None:
+                source_stats.record(received=1, emitted=1, busy=busy)
+            out_queue.put((job, source, payload))
+
+    def _parse(self, in_queue, out_queue):
+        stats = self.stats['parse']
+        remaining = self._fetch_threads
+        while remaining:
+            item = in_queue.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            task, source, payload = item
+            start = time.perf_counter()
+            try:
+                if source is not None:
+                    results = source.parse(payload)
+                else:
+                    results = self.parser(payload) if self.parser else payload
+            except Exception as e:
+                self._record_error('parse', e)
+                if self._tracker is not None:
+                    self._tracker.fail(task)
+                continue
+            stats.record(received=1, emitted=len(results), busy=time.perf_counter() - start)
+            if self._tracker is not None:
+                self._tracker.start(task, len(results))
+            source_name = source.name if source is not None else self.source
+            for result in results:
+                out_queue.put((task, source_name, result))
+        out_queue.put(_DONE)
+
+    def _normalize(self, in_queue, out_queue):
+        stats = self.stats['normalize']
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                out_queue.put(_DONE)
+                return
+            task, source_name, result = item
+            keyword = task[0]
+            start = time.perf_counter()
+            title = (result.get('title') or '').strip()[:500]
+            if not title:
+                stats.record(received=1, busy=time.perf_counter() - start)
+                if self._tracker is not None:
+                    self._tracker.finish(task)
+                continue
+            row = {
+                'keyword': keyword[:200],
+                'title': title,
+                'content': (result.get('content') or '').strip(),
+                'url': (result.get('url') or '').strip()[:500],
+                'source': source_name,
+                'saved': False,
+                'user_id': self.user_id,
+                'created_at': datetime.utcnow()
+            }
+            prepare_row(row)
+            if self._tracker is not None:
+                row['_task'] = task
+            stats.record(received=1, emitted=1, busy=time.perf_counter() - start)
+            out_queue.put(row)
+
+    def _dedup(self, in_queue, out_queue):
+        """
+        按内容哈希去重：最近出现过的、以及布隆过滤器判定已入库的条目直接丢弃
+
+        多数据源时不同数据源返回的同一页面摘要不同、内容哈希也不同，
+        因此另按规范化URL去重，保留最先返回的数据源的条目。
+        只保留最近 dedup_window 个键，更早的重复条目由入库时的唯一索引忽略。
+        """
+        stats = self.stats['dedup']
+        seen = RecentKeys(self.dedup_window)
+        seen_urls = RecentKeys(self.dedup_window) if self.sources and len(self.sources) > 1 else None
+        while True:
+            row = in_queue.get()
+            if row is _DONE:
+                out_queue.put(_DONE)
+                return
+            start = time.perf_counter()
+            key = row['content_hash']
+            url = row['canonical_url']
+            if (seen_urls is not None and url and seen_urls.check_and_add(url)) \
+                    or seen.check_and_add(key) or (self.bloom is not None and key in self.bloom):
+                stats.record(received=1, busy=time.perf_counter() - start)
+                if self._tracker is not None:
+                    self._tracker.finish(row['_task'])
+                continue
+            stats.record(received=1, emitted=1, busy=time.perf_counter() - start)
+            out_queue.put(row)
+
+    def _fetch_articles(self, in_queue, out_queue):
+        """并发抓取正文，同时在途的页面数受限，下游阻塞时回调线程也会随之阻塞"""
+        stats = self.stats['article']
+        fetcher = self.article_fetcher
+        limit = fetcher.max_workers * 2
+        in_flight = threading.BoundedSemaphore(limit)
+
+        def on_done(row, started_at):
+            def callback(future):
+                try:
+                    text = future.result()
+                    if text and len(text) > len(row['content']):
+                        row['content'] = text
+                    stats.record(received=1, emitted=1, busy=time.perf_counter() - started_at)
+                except Exception as e:
+                    self._record_error('article', f"{row['url']}: {e}")
+                finally:
+                    out_queue.put(row)
+                    in_flight.release()
+            return callback
+
+        while True:
+            row = in_queue.get()
+            if row is _DONE:
+                break
+            if not row['url']:
+                stats.record(received=1, emitted=1)
+                out_queue.put(row)
+                continue
+            in_flight.acquire()
+            fetcher.submit(row['url']).add_done_callback(on_done(row, time.perf_counter()))
+
+        # 等待所有在途页面完成
+        for _ in range(limit):
+            in_flight.acquire()
+        out_queue.put(_DONE)
+
+    def _insert(self, in_queue):
+        stats = self.stats['insert']
+        with self.app.app_context():
+            batch = []
+            while True:
+                row = in_queue.get()
+                if row is not _DONE:
+                    batch.append(row)
+                if row is _DONE or len(batch) >= self.batch_size:
+                    self._write_batch(batch, stats)
+                    batch = []
+                if row is _DONE:
+                    db.session.remove()
+                    return
+
+    def _write_batch(self, batch, stats):
+        completed = failed = None
+        if self._tracker is not None:
+            for row in batch:
+                self._tracker.finish(row.pop('_task'))
+            completed, failed = self._tracker.drain()
+        if not batch and not completed and not failed:
+            return
+
+        start = time.perf_counter()
+        try:
+            # 交给单写线程，与其他任务和请求的写操作合并提交；等待提交完成以保持背压
+            inserted = write_queue.execute(self._commit_batch, batch, completed, failed)
+        except Exception as e:
+            self._record_error('insert', e)
+            return
+        if self.bloom is not None:
+            for row in batch:
+                self.bloom.add(row['content_hash'])
+        stats.record(received=len(batch), emitted=inserted, busy=time.perf_counter() - start)
+
+    def _commit_batch(self, batch, completed, failed):
+        """写线程中执行：upsert一批数据并更新检查点，返回插入行数"""
+        inserted = upsert_scraped_rows(batch)
+        if self._tracker is not None:
+            self.checkpoint.mark_done(completed)
+            self.checkpoint.mark_failed(failed)
+        return inserted
+
+    # ====== 运行 ======
+
+    def run(self, keywords, pages=1, checkpoint=None):
+        """
+        运行管道直至所有关键词处理完毕，返回各阶段统计信息
+
+        传入 checkpoint 时忽略 keywords/pages，改为抓取检查点中未完成的页面。
+        """
+        self.checkpoint = checkpoint
+        parts = len(self.sources) if self.sources else 1
+        self._tracker = _TaskTracker(parts) if checkpoint is not None else None
+        self._started_at = time.perf_counter()
+        if self.sources:
+            fetchers = [(self._queue(), source.max_concurrency, source) for source in self.sources]
+        else:
+            fetchers = [(self._queue(), self.fetch_workers, None)]
+        self._fetch_threads = sum(workers for _, workers, _ in fetchers)
+        fetched = self._queue()
+        parsed = self._queue()
+        normalized = self._queue()
+        deduped = self._queue()
+        enriched = self._queue() if self.article_fetcher is not None else deduped
+
+        job_queues = [(job_queue, workers) for job_queue, workers, _ in fetchers]
+        threads = [threading.Thread(target=self._feed, args=(keywords, pages, job_queues), daemon=True)]
+        threads += [
+            threading.Thread(target=self._fetch, args=(job_queue, fetched, source), daemon=True)
+            for job_queue, workers, source in fetchers
+            for _ in range(workers)
+        ]
+        threads += [
+            threading.Thread(target=self._parse, args=(fetched, parsed), daemon=True),
+            threading.Thread(target=self._normalize, args=(parsed, normalized), daemon=True),
+            threading.Thread(target=self._dedup, args=(normalized, deduped), daemon=True),
+            threading.Thread(target=self._insert, args=(enriched,), daemon=True),
+        ]
+        if self.article_fetcher is not None:
+            threads.append(threading.Thread(target=self._fetch_articles, args=(deduped, enriched), daemon=True))
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if self._engine is not None:
+                self._engine.close()
+        self._finished_at = time.perf_counter()
+        return self.get_stats()
+
+    def get_stats(self):
+        """返回各阶段的计数与吞吐量（条/秒）"""
+        if self._started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+        return {
+            'elapsed': round(elapsed, 3),
+            'inserted': self.stats['insert'].emitted,
+            'stages': [self.stats[name].to_dict(elapsed) for name in self.stage_names],
+            'sources': [stats.to_dict(elapsed) for stats in self.source_stats.values()],
+            'errors': list(self.errors)
+        }
@@ -0,0 +1,183 @@
+"""
+后台抓取任务
+
+/scrape 只负责登记任务并立即返回任务ID，实际抓取和入库在工作线程池中执行，
+请求线程的占用时间与抓取规模无关。任务状态保存在进程内存中，
+可通过 /jobs/<id> 轮询进度（多进程部署时需保证同一用户的请求落在同一进程）。
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import dashboard
+from .article import ArticleFetcher
+from .dedup import get_user_bloom
+from .ingest import IngestPipeline
+from .sources import create_sources
+from .writer import write_queue
+
+
+class ScrapeJob:
+    """单个后台任务的状态"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, user_id, keyword):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.keyword = keyword
+        self.status = self.QUEUED
+        self.error = None
+        self.pipeline = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def to_dict(self):
+        """任务状态及入库进度（来自入库管道的实时计数）"""
+        stats = self.pipeline.get_stats() if self.pipeline is not None else None
+        return {
+            'id': self.id,
+            'keyword': self.keyword,
+            'status': self.status,
+            'error': self.error,
+            'inserted': stats['inserted'] if stats else 0,
+            'stages': stats['stages'] if stats else [],
+            'elapsed': round((self.finished_at or time.time()) - (self.started_at or self.created_at), 3)
+        }
+
+
+class JobManager:
+    """
+    后台任务管理器，按 Flask 扩展的方式通过 init_app 绑定应用
+
+    - max_workers 取自配置 SCRAPE_JOB_WORKERS
+    - 最多保留 max_jobs 个任务记录，超出时丢弃最早完成的任务
+    """
+
+    def __init__(self, max_jobs=1000):
+        self.max_jobs = max_jobs
+        self.app = None
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=app.config.get('SCRAPE_JOB_WORKERS', 4),
+                thread_name_prefix='scrape-job'
+            )
+
+    def submit(self, user_id, keyword, target):
+        """
+        登记任务并交给线程池执行
+
+        target(job) 在应用上下文中运行，可把入库管道挂到 job.pipeline 上以便报告进度。
+        """
+        job = ScrapeJob(user_id, keyword)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, target)
+        return job
+
+    def _run(self, job, target):
+        job.status = ScrapeJob.RUNNING
+        job.started_at = time.time()
+        try:
+            with self.app.app_context():
+                target(job)
+            job.status = ScrapeJob.DONE
+        except Exception as e:
+            job.status = ScrapeJob.FAILED
+            job.error = str(e)
+            print(f"抓取任务失败 [{job.id}] 关键词 '{job.keyword}': {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_jobs:
+                return
+
+    def get(self, job_id, user_id):
+        """获取任务，只能查看自己的任务"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+
+# 全局任务管理器
+job_manager = JobManager()
+
+
+def scrape_keyword(app, user_id, keyword, job=None, fresh=False, log_activity=True):
+    """
+    抓取单个关键词并流式入库，在应用上下文中调用，返回入库管道统计
+
+    并行请求配置 SCRAPE_SOURCES 中启用的所有数据源，结果合并后跨数据源去重；
+    fresh 为 True 时跳过数据源的共享缓存直接抓取。
+    结果分批upsert到数据库（临时状态，重复条目不会再次写入）。
+    log_activity 为 True 时在用户的最近活动中记录本次抓取。
+    """
+    # 可选的布隆过滤器，跳过明显重复的条目
+    bloom = None
+    if app.config.get('SCRAPE_DEDUP_BLOOM'):
+        bloom = get_user_bloom(
+            user_id,
+            capacity=app.config.get('SCRAPE_BLOOM_CAPACITY', 100000),
+            error_rate=app.config.get('SCRAPE_BLOOM_ERROR_RATE', 0.001)
+        )
+
+    # 可选的正文抓取阶段，用原文正文替换摘要
+    article_fetcher = None
+    if app.config.get('SCRAPE_FETCH_ARTICLES'):
+        article_fetcher = ArticleFetcher(
+            max_workers=app.config.get('ARTICLE_FETCH_WORKERS', 8),
+            max_bytes=app.config.get('ARTICLE_MAX_BYTES', 2 * 1024 * 1024)
+        )
+
+    sources = create_sources(app.config.get('SCRAPE_SOURCES', ['百度网页']), app.config, fresh=fresh,
+                             cache=app.extensions.get('http_cache'),
+                             rate_limiter=app.extensions.get('rate_limiter'))
+    pipeline = IngestPipeline(
+        app,
+        user_id,
+        batch_size=app.config.get('SCRAPE_BATCH_SIZE', 500),
+        queue_size=app.config.get('SCRAPE_QUEUE_SIZE', 1000),
+        bloom=bloom,
+        article_fetcher=article_fetcher,
+        sources=sources
+    )
+    if job is not None:
+        job.pipeline = pipeline
+    try:
+        stats = pipeline.run([keyword])
+    finally:
+        for source in sources:
+            source.close()
+        if article_fetcher is not None:
+            article_fetcher.close()
+    print(f"关键词 '{keyword}' 入库完成: {stats['inserted']} 条, 耗时 {stats['elapsed']}s")
+    cache = app.extensions.get('http_cache')
+    if cache is not None:
+        print(cache.summary())
+    if log_activity:
+        write_queue.execute(dashboard.record, user_id, f'爬取关键词: {keyword}')
+    return stats
@@ -1,50 +1,23 @@
-from flask import render_template, request, redirect, url_for, jsonify, flash, send_file
+from flask import render_template, request, redirect, url_for, jsonify, flash, send_file, current_app, abort
 from flask_login import login_required, current_user
 from . import main
 from .. import db
-from ..models import ScrapedData, ReportData
-from ..scraper import scrape_baidu
+from ..models import ScrapedData, ReportData, ReportItem, TrackedKeyword, ContentBlob
+from ..jobs import job_manager, scrape_keyword
+from ..recrawl import recrawl_scheduler
+from ..writer import write_queue
+from .. import search_index, dashboard, content_store, features
+from ..pagination import DEFAULT_PAGE_SIZE, keyset_page, page_size
 from ..pdf_generator import generate_pdf
+from ..data_analyzer import DataAnalyzer
 import os
 from datetime import datetime
 
 @main.route('/')
 @login_required
 def index():
-    # 获取统计数据
-    total_data = ScrapedData.query.filter_by(saved=True, user_id=current_user.id).count()
-    total_reports = ReportData.query.filter_by(user_id=current_user.id).count()
-    
-    # 获取最近活动记录
-    recent_activities = []
-    
-    # 添加最近爬取记录
-    recent_scrapes = ScrapedData.query.filter_by(saved=False, user_id=current_user.id).order_by(ScrapedData.created_at.desc()).limit(3).all()
-    for scrape in recent_scrapes:
-        recent_activities.append({
-            'time': scrape.created_at.strftime('%Y-%m-%d %H:%M'),
-            'action': f'爬取关键词: {scrape.keyword}'
-        })
-    
-    # 添加最近保存记录
-    recent_saves = ScrapedData.query.filter_by(saved=True, user_id=current_user.id).order_by(ScrapedData.created_at.desc()).limit(3).all()
-    for save in recent_saves:
-        recent_activities.append({
-            'time': save.created_at.strftime('%Y-%m-%d %H:%M'),
-            'action': f'保存数据: {save.title[:30]}...'
-        })
-    
-    # 添加最近报告生成记录
-    recent_reports = ReportData.query.filter_by(user_id=current_user.id).order_by(ReportData.created_at.desc()).limit(3).all()
-    for report in recent_reports:
-        recent_activities.append({
-            'time': report.created_at.strftime('%Y-%m-%d %H:%M'),
-            'action': f'生成报告: {report.title[:30]}...'
-        })
-    
-    # 按时间排序并限制数量
-    recent_activities.sort(key=lambda x: x['time'], reverse=True)
-    recent_activities = recent_activities[:5]
+    # 统计数据和最近活动随写操作增量维护，这里只需一次主键查询
+    total_data, total_reports, recent_activities = dashboard.get_dashboard(current_user.id)
     
     return render_template('main/index.html', 
                            total_data=total_data, 
@@ -59,34 +32,112 @@ def scrape():
         flash('请输入关键词')
         return redirect(url_for('main.index'))
     
-    # 调用百度爬虫
-    results = scrape_baidu(keyword)
-    
-    # 保存爬取结果到数据库（临时状态）
-    for result in results:
-        data = ScrapedData(
-            keyword=keyword,
-            title=result['title'],
-            content=result.get('content', ''),
-            url=result.get('url', ''),
-            source='百度',
-            saved=False,
-            user_id=current_user.id
-        )
-        db.session.add(data)
-    db.session.commit()
-    
-    return redirect(url_for('main.results', keyword=keyword))
+    # 登记后台抓取任务后立即返回，抓取与入库在工作线程池中进行
+    app = current_app._get_current_object()
+    user_id = current_user.id
+    job = job_manager.submit(user_id, keyword, lambda job: scrape_keyword(app, user_id, keyword, job))
+    
+    # 勾选“定期自动更新”时跟踪该关键词，之后按结果变化频率自动重新抓取
+    if request.form.get('track'):
+        recrawl_scheduler.track(user_id, keyword)
+    
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'job_id': job.id,
+            'status_url': url_for('main.job_status', job_id=job.id)
+        }), 202
+    return redirect(url_for('main.results', keyword=keyword, job_id=job.id))
+
+def scraped_to_dict(item):
+    """抓取数据转为JSON字典，供任务轮询和分页接口使用"""
+    return {
+        'id': item.id,
+        'keyword': item.keyword,
+        'title': item.title,
+        'content': item.content or '',
+        'url': item.url or '',
+        'source': item.source or '',
+        'saved': bool(item.saved),
+        'created_at': item.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+@main.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    job = job_manager.get(job_id, current_user.id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    
+    status = job.to_dict()
+    
+    # 返回 after_id 之后新入库的结果，供结果页增量加载
+    after_id = request.args.get('after_id', 0, type=int)
+    rows = ScrapedData.query.filter(
+        ScrapedData.user_id == current_user.id,
+        ScrapedData.keyword == job.keyword,
+        ScrapedData.id > after_id
+    ).order_by(ScrapedData.id).limit(200).all()
+    status['rows'] = [scraped_to_dict(row) for row in rows]
+    return jsonify(status)
+
+@main.route('/tracked_keywords')
+@login_required
+def tracked_keywords():
+    tracked = TrackedKeyword.query.filter_by(user_id=current_user.id, enabled=True).order_by(TrackedKeyword.next_crawl_at).all()
+    return jsonify([item.to_dict() for item in tracked])
+
+@main.route('/untrack_keyword/<int:tracked_id>', methods=['POST'])
+@login_required
+def untrack_keyword(tracked_id):
+    if not recrawl_scheduler.untrack(tracked_id, current_user.id):
+        return jsonify({'error': '关键词不存在'}), 404
+    return jsonify({'success': True})
+
+def _request_page_size():
+    # 分页接口未指定 limit 时使用配置的每页条数
+    return page_size(request.args.get('limit'), current_app.config.get('PAGE_SIZE', DEFAULT_PAGE_SIZE))
+
+def _results_page(keyword, cursor=None, limit=None):
+    # 入库已去重，重复抓取的条目可能此前已保存，因此一并展示
+    query = ScrapedData.query.filter_by(keyword=keyword, user_id=current_user.id)
+    return keyset_page(query, ScrapedData, cursor, limit or current_app.config.get('PAGE_SIZE', DEFAULT_PAGE_SIZE))
 
 @main.route('/results')
 @login_required
 def results():
     keyword = request.args.get('keyword')
     if keyword:
-        data = ScrapedData.query.filter_by(keyword=keyword, saved=False, user_id=current_user.id).all()
+        data, next_cursor = _results_page(keyword)
     else:
-        data = []
-    return render_template('main/results.html', data=data, keyword=keyword)
+        data, next_cursor = [], None
+    return render_template('main/results.html', data=data, keyword=keyword, job_id=request.args.get('job_id'),
+                           next_cursor=next_cursor)
+
+@main.route('/results/page')
+@login_required
+def results_page():
+    keyword = request.args.get('keyword')
+    if not keyword:
+        return jsonify({'error': '缺少关键词'}), 400
+    data, next_cursor = _results_page(keyword, request.args.get('cursor'), _request_page_size())
+    return jsonify({'items': [scraped_to_dict(item) for item in data], 'next_cursor': next_cursor})
+
+def _mark_saved(user_id, data_ids, term_counts):
+    # 更新数据状态为已保存，确保只更新当前用户的数据（已保存的不重复计数）
+    query = ScrapedData.query.filter(
+        ScrapedData.id.in_(data_ids),
+        ScrapedData.user_id == user_id,
+        ScrapedData.saved == False
+    )
+    first = query.order_by(ScrapedData.id).first()
+    saved = query.update({'saved': True}, synchronize_session=False)
+    # 新保存的数据加入全文索引，与保存状态在同一事务中提交
+    search_index.index_rows(data_ids)
+    # 保存请求中已分好的词频，生成报告时直接汇总
+    features.store_terms(term_counts)
+    if saved:
+        action = f'保存数据: {first.title[:30]}...' + (f' 等{saved}条' if saved > 1 else '')
+        dashboard.record(user_id, action, saved=saved)
 
 @main.route('/save_data', methods=['POST'])
 @login_required
@@ -96,21 +147,23 @@ def save_data():
         flash('请选择要保存的数据')
         return redirect(url_for('main.index'))
     
-    # 更新数据状态为已保存，确保只更新当前用户的数据
-    ScrapedData.query.filter(
-        ScrapedData.id.in_(data_ids),
-        ScrapedData.user_id == current_user.id
-    ).update({'saved': True})
-    db.session.commit()
+    # 分词在请求线程中完成，不占用写线程
+    term_counts = features.segment_rows(current_user.id, data_ids)
+    # 由单写线程与其他写操作合并提交，提交完成后再跳转
+    write_queue.execute(_mark_saved, current_user.id, data_ids, term_counts)
     
     flash('数据保存成功')
     return redirect(url_for('main.data_warehouse'))
 
+def _warehouse_page(cursor=None, limit=None):
+    query = ScrapedData.query.filter_by(saved=True, user_id=current_user.id)
+    return keyset_page(query, ScrapedData, cursor, limit or current_app.config.get('PAGE_SIZE', DEFAULT_PAGE_SIZE))
+
 @main.route('/data_warehouse')
 @login_required
 def data_warehouse():
-    # 获取所有已保存的数据
-    data = ScrapedData.query.filter_by(saved=True, user_id=current_user.id).order_by(ScrapedData.created_at.desc()).all()
+    # 获取第一页已保存的数据，其余数据滚动时通过 /data_warehouse/page 加载
+    data, next_cursor = _warehouse_page()
     
     # 按日期分组
     data_by_date = {}
@@ -120,7 +173,26 @@ def data_warehouse():
             data_by_date[date_key] = []
         data_by_date[date_key].append(item)
     
-    return render_template('main/data_warehouse.html', data_by_date=data_by_date)
+    # 仓库整体的高频关键词（读取增量维护的用户词频表）
+    top_keywords = DataAnalyzer().analyze_user_keywords(current_user.id)
+    
+    return render_template('main/data_warehouse.html', data_by_date=data_by_date, next_cursor=next_cursor,
+                           top_keywords=top_keywords.get('top_keywords_with_freq', []))
+
+@main.route('/data_warehouse/page')
+@login_required
+def data_warehouse_page():
+    data, next_cursor = _warehouse_page(request.args.get('cursor'), _request_page_size())
+    return jsonify({'items': [scraped_to_dict(item) for item in data], 'next_cursor': next_cursor})
+
+@main.route('/data_warehouse/keywords')
+@login_required
+def data_warehouse_keywords():
+    result = DataAnalyzer().analyze_user_keywords(current_user.id, page_size(request.args.get('limit'), 20))
+    return jsonify({
+        'keywords': [{'word': word, 'count': count} for word, count in result.get('top_keywords_with_freq', [])],
+        'total_unique_words': result.get('total_unique_words', 0)
+    })
 
 @main.route('/search_data', methods=['POST'])
 @login_required
@@ -129,12 +201,23 @@ def search_data():
     if not keyword:
         return redirect(url_for('main.data_warehouse'))
     
-    # 搜索包含关键词的数据
-    results = ScrapedData.query.filter(
-        ScrapedData.saved == True,
-        ScrapedData.user_id == current_user.id,
-        (ScrapedData.title.contains(keyword) | ScrapedData.content.contains(keyword) | ScrapedData.keyword.contains(keyword))
-    ).all()
+    if search_index.available():
+        # 全文索引检索，结果按相关度排序
+        ids = search_index.search_ids(current_user.id, keyword)
+        rows = {item.id: item for item in ScrapedData.query.filter(
+            ScrapedData.id.in_(ids),
+            ScrapedData.user_id == current_user.id,
+            ScrapedData.saved == True
+        ).all()} if ids else {}
+        results = [rows[row_id] for row_id in ids if row_id in rows]
+    else:
+        # 搜索包含关键词的数据（内容存储中压缩保存的正文无法用 LIKE 匹配）
+        results = ScrapedData.query.outerjoin(ContentBlob, ContentBlob.hash == ScrapedData.body_hash).filter(
+            ScrapedData.saved == True,
+            ScrapedData.user_id == current_user.id,
+            (ScrapedData.title.contains(keyword) | ScrapedData._content.contains(keyword) |
+             db.cast(ContentBlob.data, db.Text).contains(keyword) | ScrapedData.keyword.contains(keyword))
+        ).all()
     
     # 按日期分组
     data_by_date = {}
@@ -146,6 +229,22 @@ def search_data():
     
     return render_template('main/data_warehouse.html', data_by_date=data_by_date, search_keyword=keyword)
 
+def _add_report(title, data_ids, pdf_path, user_id):
+    # 报告只记录包含的数据ID及顺序，正文在需要时由关联的数据拼接
+    report = ReportData(
+        title=title,
+        pdf_path=pdf_path,
+        user_id=user_id
+    )
+    db.session.add(report)
+    db.session.flush()
+    db.session.execute(ReportItem.__table__.insert(), [
+        {'report_id': report.id, 'data_id': data_id, 'position': position}
+        for position, data_id in enumerate(data_ids)
+    ])
+    dashboard.record(user_id, f'生成报告: {title[:30]}...', reports=1)
+    return report.id
+
 @main.route('/generate_pdf', methods=['POST'])
 @login_required
 def generate_pdf_report():
@@ -174,15 +273,7 @@ def generate_pdf_report():
     pdf_path = generate_pdf(report_title, selected_data)
     
     # 保存报告信息到数据库
-    report_content = '\n\n'.join([f'标题: {item.title}\n内容: {item.content}' for item in selected_data])
-    report = ReportData(
-        title=report_title,
-        content=report_content,
-        pdf_path=pdf_path,
-        user_id=current_user.id
-    )
-    db.session.add(report)
-    db.session.commit()
+    write_queue.execute(_add_report, report_title, [item.id for item in selected_data], pdf_path, current_user.id)
     
     # 检查文件扩展名，确保正确设置MIME类型
     file_ext = os.path.splitext(pdf_path)[1].lower()
@@ -195,26 +286,70 @@ def generate_pdf_report():
 @main.route('/reports')
 @login_required
 def reports():
-    reports = ReportData.query.filter_by(user_id=current_user.id).order_by(ReportData.created_at.desc()).all()
-    return render_template('main/reports.html', reports=reports)
+    query = ReportData.query.filter_by(user_id=current_user.id)
+    reports, next_cursor = keyset_page(query, ReportData, limit=current_app.config.get('PAGE_SIZE', DEFAULT_PAGE_SIZE))
+    total = query.count()
+    return render_template('main/reports.html', reports=reports, next_cursor=next_cursor, total=total)
+
+@main.route('/reports/page')
+@login_required
+def reports_page():
+    query = ReportData.query.filter_by(user_id=current_user.id)
+    reports, next_cursor = keyset_page(query, ReportData, request.args.get('cursor'), _request_page_size())
+    return jsonify({
+        'items': [{
+            'id': report.id,
+            'title': report.title,
+            'created_at': report.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'view_url': url_for('main.view_pdf', report_id=report.id),
+            'download_url': url_for('main.download_pdf', report_id=report.id),
+            'delete_url': url_for('main.delete_pdf', report_id=report.id)
+        } for report in reports],
+        'next_cursor': next_cursor
+    })
+
+def _set_report_pdf(report_id, pdf_path):
+    ReportData.query.filter_by(id=report_id).update({'pdf_path': pdf_path}, synchronize_session=False)
+
+def _user_report(report_id):
+    """当前用户的报告，不存在或属于其他用户时返回404"""
+    return ReportData.query.filter_by(id=report_id, user_id=current_user.id).first_or_404()
+
+def _ensure_pdf(report):
+    """PDF文件丢失时按报告关联的数据重新生成，返回文件路径"""
+    if report.pdf_path and os.path.exists(report.pdf_path):
+        return report.pdf_path
+    items = report.source_items()
+    if not items:
+        abort(404)
+    pdf_path = generate_pdf(report.title, items)
+    write_queue.execute(_set_report_pdf, report.id, pdf_path)
+    return pdf_path
 
 @main.route('/view_pdf/<int:report_id>')
 @login_required
 def view_pdf(report_id):
-    report = ReportData.query.get_or_404(report_id)
-    return send_file(report.pdf_path, mimetype='application/pdf')
+    report = _user_report(report_id)
+    return send_file(_ensure_pdf(report), mimetype='application/pdf')
 
 @main.route('/download_pdf/<int:report_id>')
 @login_required
 def download_pdf(report_id):
-    report = ReportData.query.get_or_404(report_id)
-    return send_file(report.pdf_path, as_attachment=True)
+    report = _user_report(report_id)
+    return send_file(_ensure_pdf(report), as_attachment=True)
+
+def _delete_report(report_id, user_id):
+    body_hash = db.session.query(ReportData.body_hash).filter_by(id=report_id).scalar()
+    ReportItem.query.filter_by(report_id=report_id).delete()
+    if ReportData.query.filter_by(id=report_id).delete():
+        content_store.purge_unreferenced([body_hash])
+        dashboard.record(user_id, reports=-1)
 
 @main.route('/delete_pdf/<int:report_id>', methods=['POST'])
 @login_required
 def delete_pdf(report_id):
     # 获取报告记录
-    report = ReportData.query.get_or_404(report_id)
+    report = _user_report(report_id)
     
     # 删除PDF文件
     if report.pdf_path and os.path.exists(report.pdf_path):
@@ -224,8 +359,7 @@ def delete_pdf(report_id):
             flash(f'删除文件时出错: {str(e)}')
     
     # 从数据库中删除报告记录
-    db.session.delete(report)
-    db.session.commit()
+    write_queue.execute(_delete_report, report.id, report.user_id)
     
     flash('报告删除成功')
     return redirect(url_for('main.reports'))
@@ -0,0 +1,188 @@
+"""
+数据库结构迁移
+
+结构版本保存在 SQLite 的 PRAGMA user_version 中。启动时只读取一次版本号，
+已是最新版本时不做任何检查；否则先用 db.create_all() 补建缺少的表，再依次执行
+高于当前版本的迁移，每个迁移与新的版本号在同一事务中提交。
+
+迁移函数需要可重复执行（旧数据库的版本号为0，但部分结构可能已经存在）。
+新增迁移时在 MIGRATIONS 末尾追加 (版本号, 说明, 函数)，版本号递增；
+新增模型（表）时同样需要追加迁移，在迁移中调用 Model.__table__.create(conn, checkfirst=True)。
+"""
+from sqlalchemy import text
+
+from . import db
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def _add_user_id_columns(conn):
+    """为早期版本的 scraped_data / report_data 补充 user_id 字段"""
+    for table in ('scraped_data', 'report_data'):
+        if 'user_id' not in _columns(conn, table):
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1"))
+
+
+def _add_dedup_columns(conn):
+    """添加去重字段，为历史数据补算哈希并建立 (user_id, content_hash) 唯一索引"""
+    from .dedup import backfill_content_hashes, UNIQUE_INDEX_NAME, UNIQUE_INDEX_WHERE
+    if 'content_hash' in _columns(conn, 'scraped_data'):
+        return
+    conn.execute(text("ALTER TABLE scraped_data ADD COLUMN canonical_url VARCHAR(500)"))
+    conn.execute(text("ALTER TABLE scraped_data ADD COLUMN content_hash VARCHAR(40)"))
+    backfill_content_hashes(conn)
+    conn.execute(text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_INDEX_NAME} "
+        f"ON scraped_data (user_id, content_hash) WHERE {UNIQUE_INDEX_WHERE}"
+    ))
+
+
+def _create_search_index(conn):
+    """创建数据仓库全文索引，并为已保存的数据回填"""
+    from .content_store import add_body_columns
+    from .search_index import create_index, rebuild_index
+    # 建索引时读取正文需要 body_hash 字段（迁移7），旧数据库在这里提前补充
+    add_body_columns(conn)
+    if create_index(conn):
+        indexed = rebuild_index(conn)
+        print(f"已为 {indexed} 条已保存数据建立全文索引")
+
+
+def _add_composite_indexes(conn):
+    """常用查询（按用户、保存状态过滤并按时间排序）的组合索引"""
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_scraped_data_user_saved_created "
+        "ON scraped_data (user_id, saved, created_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_scraped_data_user_keyword_saved "
+        "ON scraped_data (user_id, keyword, saved)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_report_data_user_created "
+        "ON report_data (user_id, created_at)"
+    ))
+
+
+def _add_keyword_created_index(conn):
+    """搜索结果页按关键词分页（按时间倒序）的索引"""
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_scraped_data_user_keyword_created "
+        "ON scraped_data (user_id, keyword, created_at)"
+    ))
+
+
+def _create_user_stats(conn):
+    """首页统计表，按现有数据计算初始计数和最近活动"""
+    from .dashboard import rebuild_stats
+    from .models import UserStats
+    UserStats.__table__.create(conn, checkfirst=True)
+    rebuild_stats(conn)
+
+
+def _create_content_store(conn):
+    """正文内容寻址存储：body_hash 字段、引用计数触发器，并把已有正文移入存储"""
+    from .content_store import add_body_columns, create_refcount_triggers, move_inline_bodies
+    from .models import ContentBlob
+    ContentBlob.__table__.create(conn, checkfirst=True)
+    add_body_columns(conn)
+    create_refcount_triggers(conn)
+    moved = move_inline_bodies(conn)
+    if moved:
+        print(f"已将 {moved} 条正文移入内容存储（执行 VACUUM 后数据库文件才会变小）")
+
+
+def _create_report_items(conn):
+    """报告与数据的关联表；早期报告的正文已保存在内容存储中，不做回填"""
+    from .models import ReportItem
+    ReportItem.__table__.create(conn, checkfirst=True)
+
+
+def _create_feature_store(conn):
+    """入库特征字段与词频表，为历史数据补算特征（已保存的数据同时分词）"""
+    from .features import add_feature_columns, backfill_features, create_delete_trigger
+    from .models import Term, DataTerm
+    add_feature_columns(conn)
+    Term.__table__.create(conn, checkfirst=True)
+    DataTerm.__table__.create(conn, checkfirst=True)
+    create_delete_trigger(conn)
+    computed, segmented = backfill_features(conn)
+    if computed:
+        print(f"已为 {computed} 条数据补算分析特征，其中 {segmented} 条已保存数据完成分词")
+
+
+def _create_user_terms(conn):
+    """用户词频表及维护它的触发器，按已保存数据计算初始词频"""
+    from .features import create_user_term_triggers, rebuild_user_terms
+    from .models import UserTerm
+    UserTerm.__table__.create(conn, checkfirst=True)
+    create_user_term_triggers(conn)
+    rebuild_user_terms(conn)
+
+
+def _create_search_index_triggers(conn):
+    """删除数据、取消保存时同步删除全文索引行的触发器，并清理已有的过期索引行"""
+    from .search_index import create_sync_triggers
+    removed = create_sync_triggers(conn)
+    if removed:
+        print(f"已从全文索引中删除 {removed} 条过期数据")
+
+
+def _reset_placeholder_lengths(conn):
+    """content_length 改为保存原始正文长度：没有正文的数据此前按代替文本保存了长度"""
+    from .features import reset_placeholder_lengths
+    reset = reset_placeholder_lengths(conn)
+    if reset:
+        print(f"已修正 {reset} 条没有正文的数据的正文长度")
+
+
+# (版本号, 说明, 迁移函数)，按版本号递增
+MIGRATIONS = [
+    (1, '数据归属用户字段', _add_user_id_columns),
+    (2, '入库去重字段与唯一索引', _add_dedup_columns),
+    (3, '数据仓库全文索引', _create_search_index),
+    (4, '常用查询组合索引', _add_composite_indexes),
+    (5, '搜索结果分页索引', _add_keyword_created_index),
+    (6, '首页统计表', _create_user_stats),
+    (7, '正文内容寻址存储', _create_content_store),
+    (8, '报告关联数据表', _create_report_items),
+    (9, '入库分析特征与词频表', _create_feature_store),
+    (10, '用户词频表', _create_user_terms),
+    (11, '全文索引同步触发器', _create_search_index_triggers),
+    (12, '正文长度改为原始长度', _reset_placeholder_lengths),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def migrate():
+    """
+    把数据库升级到最新结构版本，需要在应用上下文中调用
+
+    返回执行的迁移数量，结构已是最新时返回0。
+    """
+    with db.engine.connect() as conn:
+        version = get_version(conn)
+    if version >= LATEST_VERSION:
+        return 0
+
+    # 补建缺少的表（新数据库在这里建立完整结构，之后的迁移均为空操作）；
+    # create_all 只会创建已导入的模型对应的表，因此先导入全部模型
+    from . import models  # noqa: F401
+    db.create_all()
+    applied = 0
+    for migration_version, description, migration in MIGRATIONS:
+        if migration_version <= version:
+            continue
+        with db.engine.begin() as conn:
+            migration(conn)
+            conn.execute(text(f"PRAGMA user_version = {int(migration_version)}"))
+        print(f"数据库迁移 {migration_version}: {description}")
+        applied += 1
+    return applied
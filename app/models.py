@@ -1,4 +1,5 @@
 from . import db
+from .content_store import decode_body
 from flask_login import UserMixin
 from datetime import datetime
 import hashlib
@@ -23,12 +24,43 @@ class ScrapedData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     keyword = db.Column(db.String(200), nullable=False)
     title = db.Column(db.String(500), nullable=False)
-    content = db.Column(db.Text, nullable=True)
+    # 正文保存在 content_blob 中（见 app/content_store.py），content 列只保留空正文和未迁移的旧数据
+    _content = db.Column('content', db.Text, nullable=True)
+    body_hash = db.Column(db.String(40), db.ForeignKey('content_blob.hash'), nullable=True)
+    body = db.relationship('ContentBlob', lazy='joined')
     url = db.Column(db.String(500), nullable=True)
     source = db.Column(db.String(100), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     saved = db.Column(db.Boolean, default=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # 去重字段：规范化URL及内容哈希，(user_id, content_hash) 唯一
+    canonical_url = db.Column(db.String(500), nullable=True)
+    content_hash = db.Column(db.String(40), nullable=True)
+    # 入库时计算的分析特征（见 app/features.py）：分析用标题/正文长度、清洗去重键；
+    # token_count 为保存时分词得到的词数（词频在 data_terms 中），为空表示尚未分词
+    title_length = db.Column(db.Integer, nullable=True)
+    content_length = db.Column(db.Integer, nullable=True)
+    dedup_key = db.Column(db.BigInteger, nullable=True)
+    token_count = db.Column(db.Integer, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ux_scraped_data_user_hash', 'user_id', 'content_hash',
+                 unique=True, sqlite_where=db.text('content_hash IS NOT NULL')),
+        db.Index('ix_scraped_data_user_saved_created', 'user_id', 'saved', 'created_at'),
+        db.Index('ix_scraped_data_user_keyword_saved', 'user_id', 'keyword', 'saved'),
+        db.Index('ix_scraped_data_user_keyword_created', 'user_id', 'keyword', 'created_at'),
+    )
+    
+    @property
+    def content(self):
+        if self.body is not None:
+            return self.body.text
+        return self._content
+    
+    @content.setter
+    def content(self, value):
+        self.body = None
+        self._content = value
     
     def __repr__(self):
         return f'<ScrapedData {self.title}>'
@@ -36,10 +68,174 @@ class ScrapedData(db.Model):
 class ReportData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(500), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    # 报告包含的数据保存在 report_items 中；早期报告的正文保存在 content_blob 中，content 列为空字符串
+    _content = db.Column('content', db.Text, nullable=False, default='')
+    body_hash = db.Column(db.String(40), db.ForeignKey('content_blob.hash'), nullable=True)
+    body = db.relationship('ContentBlob')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     pdf_path = db.Column(db.String(500), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
+    __table_args__ = (
+        db.Index('ix_report_data_user_created', 'user_id', 'created_at'),
+    )
+    
+    def source_items(self):
+        """报告引用的抓取数据（按报告中的顺序），已删除的数据会被跳过"""
+        return ScrapedData.query.join(ReportItem, ReportItem.data_id == ScrapedData.id).filter(
+            ReportItem.report_id == self.id
+        ).order_by(ReportItem.position).all()
+    
+    @property
+    def content(self):
+        """报告正文：由引用的数据拼接；早期报告没有关联数据，读取保存的正文"""
+        items = self.source_items()
+        if items:
+            return '\n\n'.join(f'标题: {item.title}\n内容: {item.content}' for item in items)
+        if self.body is not None:
+            return self.body.text
+        return self._content
+    
     def __repr__(self):
         return f'<ReportData {self.title}>'
+
+class ReportItem(db.Model):
+    """报告与抓取数据的关联，position 为数据在报告中的顺序"""
+    __tablename__ = 'report_items'
+    report_id = db.Column(db.Integer, db.ForeignKey('report_data.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    data_id = db.Column(db.Integer, db.ForeignKey('scraped_data.id'), nullable=False)
+    
+    def __repr__(self):
+        return f'<ReportItem {self.report_id}#{self.position} -> {self.data_id}>'
+
+class Term(db.Model):
+    """分词得到的词语，词频表中以整数编号引用"""
+    __tablename__ = 'terms'
+    id = db.Column(db.Integer, primary_key=True)
+    word = db.Column(db.String(100), unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f'<Term {self.id} {self.word}>'
+
+class DataTerm(db.Model):
+    """每条抓取数据的词频（保存数据时分词写入）"""
+    __tablename__ = 'data_terms'
+    data_id = db.Column(db.Integer, db.ForeignKey('scraped_data.id'), primary_key=True)
+    term_id = db.Column(db.Integer, db.ForeignKey('terms.id'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return f'<DataTerm {self.data_id}:{self.term_id} x{self.count}>'
+
+class UserTerm(db.Model):
+    """用户全部已保存数据的词频，由数据库触发器随保存、删除数据增量维护（见 app/features.py）"""
+    __tablename__ = 'user_terms'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    term_id = db.Column(db.Integer, db.ForeignKey('terms.id'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_user_terms_user_count', user_id, count.desc(), term_id),
+    )
+    
+    def __repr__(self):
+        return f'<UserTerm {self.user_id}:{self.term_id} x{self.count}>'
+
+class ContentBlob(db.Model):
+    """按内容哈希保存的正文，相同正文只保存一份；refcount 由数据库触发器维护"""
+    hash = db.Column(db.String(40), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    compressed = db.Column(db.Boolean, nullable=False, default=False)
+    # 原始正文的UTF-8字节数
+    size = db.Column(db.Integer, nullable=False)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    
+    @property
+    def text(self):
+        return decode_body(self.data, self.compressed)
+    
+    def __repr__(self):
+        return f'<ContentBlob {self.hash} x{self.refcount}>'
+
+class UserStats(db.Model):
+    """用户首页统计：已保存数据数、报告数及最近活动，随写操作增量更新（见 app/dashboard.py）"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    saved_count = db.Column(db.Integer, nullable=False, default=0)
+    report_count = db.Column(db.Integer, nullable=False, default=0)
+    # 最近活动的JSON数组（最新的在前），最多保留 ACTIVITY_RING_SIZE 条
+    activities = db.Column(db.Text, nullable=False, default='[]')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UserStats {self.user_id}: {self.saved_count} saved, {self.report_count} reports>'
+
+class CrawlRun(db.Model):
+    """批量抓取任务，用于中断后断点续抓"""
+    id = db.Column(db.Integer, primary_key=True)
+    # 由用户、关键词列表和页数计算的标识，相同参数的未完成任务会被续抓
+    run_key = db.Column(db.String(40), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    pages = db.Column(db.Integer, nullable=False, default=1)
+    status = db.Column(db.String(20), nullable=False, default='running')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CrawlRun {self.id} {self.status}>'
+
+class CrawlTask(db.Model):
+    """批量抓取的待抓取队列（frontier），每个关键词的每一页一行"""
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('crawl_run.id'), nullable=False)
+    keyword = db.Column(db.String(200), nullable=False)
+    page = db.Column(db.Integer, nullable=False, default=0)
+    # pending / done / failed
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    results = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('run_id', 'keyword', 'page', name='ux_crawl_task_page'),
+        db.Index('ix_crawl_task_run_status', 'run_id', 'status'),
+    )
+    
+    def __repr__(self):
+        return f'<CrawlTask {self.keyword} p{self.page} {self.status}>'
+
+class TrackedKeyword(db.Model):
+    """定期自动重新抓取的关键词，按预计过期时间调度"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    keyword = db.Column(db.String(200), nullable=False)
+    enabled = db.Column(db.Boolean, nullable=False, default=True)
+    # 当前抓取间隔（秒），结果经常变化时缩短，长期不变时延长
+    interval_seconds = db.Column(db.Integer, nullable=False)
+    next_crawl_at = db.Column(db.DateTime, nullable=False)
+    last_crawl_at = db.Column(db.DateTime, nullable=True)
+    last_changed_at = db.Column(db.DateTime, nullable=True)
+    # 每次抓取结果发生变化的概率（指数移动平均）
+    change_rate = db.Column(db.Float, nullable=False, default=0.5)
+    crawl_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'keyword', name='ux_tracked_keyword_user'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'keyword': self.keyword,
+            'enabled': self.enabled,
+            'interval_seconds': self.interval_seconds,
+            'next_crawl_at': self.next_crawl_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'last_crawl_at': self.last_crawl_at.strftime('%Y-%m-%d %H:%M:%S') if self.last_crawl_at else None,
+            'last_changed_at': self.last_changed_at.strftime('%Y-%m-%d %H:%M:%S') if self.last_changed_at else None,
+            'change_rate': round(self.change_rate, 3),
+            'crawl_count': self.crawl_count
+        }
+    
+    def __repr__(self):
+        return f'<TrackedKeyword {self.keyword} every {self.interval_seconds}s>'
@@ -0,0 +1,61 @@
+"""
+游标分页（keyset pagination）
+
+列表按 (created_at, id) 倒序排列，游标记录上一页最后一行的 (created_at, id)，
+下一页查询条件为 (created_at, id) < 游标。配合 (user_id, ..., created_at) 组合索引，
+无论翻到多深，每页都只读取 limit 行，不像 OFFSET 那样需要先跳过前面所有的行。
+"""
+import base64
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+# 每页默认行数及单页上限
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def encode_cursor(created_at, row_id):
+    """把 (created_at, id) 编码为URL安全的游标字符串"""
+    raw = f'{created_at.strftime(_TIME_FORMAT)}|{row_id}'
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """解析游标，无效时返回 None（视为从第一页开始）"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        created_at, row_id = raw.split('|')
+        return datetime.strptime(created_at, _TIME_FORMAT), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """解析请求中的每页行数，限制在 1~MAX_PAGE_SIZE 之间"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_page(query, model, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    按 (created_at, id) 倒序取一页
+
+    query 为已按用户等条件过滤的查询，model 需要有 created_at 和 id 列。
+    返回 (本页行列表, 下一页游标)，没有更多数据时游标为 None。
+    """
+    position = decode_cursor(cursor)
+    if position is not None:
+        query = query.filter(tuple_(model.created_at, model.id) < position)
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
@@ -0,0 +1,202 @@
+"""
+关键词定期重新抓取
+
+被跟踪的关键词按下次抓取时间（预计过期时间）放入优先队列，调度线程在到期时
+通过后台任务重新抓取。入库时按内容哈希与已有 ScrapedData 比对，只写入新增或变化的条目，
+写入条数即本次检测到的变化数：
+- 结果有变化时抓取间隔减半，经常变化的关键词会被更频繁地抓取
+- 结果没有变化时间隔延长为1.5倍，长期不变的关键词逐渐降低抓取频率
+间隔限制在 RECRAWL_MIN_INTERVAL 与 RECRAWL_MAX_INTERVAL 之间。
+"""
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from . import db, dashboard
+from .jobs import job_manager, scrape_keyword
+from .models import TrackedKeyword
+from .writer import write_queue
+
+# 间隔调整系数及变化率的平滑系数
+SPEEDUP_FACTOR = 0.5
+BACKOFF_FACTOR = 1.5
+CHANGE_RATE_ALPHA = 0.3
+
+
+def next_interval(interval, changed, min_interval, max_interval):
+    """根据本次是否有变化计算下一次抓取间隔"""
+    interval = interval * (SPEEDUP_FACTOR if changed else BACKOFF_FACTOR)
+    return int(round(min(max(interval, min_interval), max_interval)))
+
+
+class RecrawlScheduler:
+    """
+    重新抓取调度器，按 Flask 扩展的方式通过 init_app 绑定应用
+
+    - 堆中保存 (下次抓取时间, 关键词ID)，调度线程等待堆顶到期
+    - 取出时重新读取数据库记录，已取消跟踪或已被重新安排的条目直接丢弃
+    - 配置 RECRAWL_ENABLED 为 True 时才启动调度线程
+    """
+
+    def __init__(self):
+        self.app = None
+        self._heap = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        # 正在抓取的关键词ID，避免抓取尚未完成时重复调度
+        self._running = set()
+
+    def init_app(self, app):
+        self.app = app
+        if app.config.get('RECRAWL_ENABLED') and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='recrawl-scheduler', daemon=True)
+            self._thread.start()
+
+    # ---------- 跟踪关键词 ----------
+
+    def track(self, user_id, keyword):
+        """开始跟踪关键词（已跟踪则重新启用），返回关键词ID，需要在应用上下文中调用"""
+        interval = self.app.config.get('RECRAWL_INITIAL_INTERVAL', 3600)
+        next_crawl_at, tracked_id = write_queue.execute(self._save_tracked, user_id, keyword, interval)
+        self._push(next_crawl_at, tracked_id)
+        return tracked_id
+
+    @staticmethod
+    def _save_tracked(user_id, keyword, interval):
+        """写线程中执行：新增或重新启用跟踪记录，返回 (下次抓取时间, 关键词ID)"""
+        tracked = TrackedKeyword.query.filter_by(user_id=user_id, keyword=keyword).first()
+        if tracked is None:
+            tracked = TrackedKeyword(user_id=user_id, keyword=keyword, interval_seconds=interval)
+            db.session.add(tracked)
+        tracked.enabled = True
+        tracked.next_crawl_at = datetime.utcnow() + timedelta(seconds=tracked.interval_seconds)
+        db.session.flush()
+        return tracked.next_crawl_at, tracked.id
+
+    def untrack(self, tracked_id, user_id):
+        """取消跟踪，返回是否找到该关键词；堆中的旧条目在到期时被丢弃"""
+        return write_queue.execute(self._disable_tracked, tracked_id, user_id)
+
+    @staticmethod
+    def _disable_tracked(tracked_id, user_id):
+        updated = TrackedKeyword.query.filter_by(id=tracked_id, user_id=user_id).update({'enabled': False})
+        return updated > 0
+
+    def _push(self, next_crawl_at, tracked_id):
+        if self._thread is None:
+            return
+        with self._cond:
+            heapq.heappush(self._heap, (next_crawl_at, tracked_id))
+            self._cond.notify()
+
+    # ---------- 调度循环 ----------
+
+    def _load(self):
+        """启动时把数据库中已启用的关键词放入堆"""
+        rows = db.session.query(TrackedKeyword.next_crawl_at, TrackedKeyword.id).filter(
+            TrackedKeyword.enabled.is_(True)
+        ).all()
+        with self._cond:
+            # 加载前 track() 放入的条目可能重复，到期时由 _dispatch 去重
+            self._heap.extend((next_crawl_at, tracked_id) for next_crawl_at, tracked_id in rows)
+            heapq.heapify(self._heap)
+        print(f"重新抓取调度器已启动，跟踪 {len(rows)} 个关键词")
+
+    def _pop_due(self):
+        """阻塞直到有条目到期，返回到期的 (计划时间, 关键词ID) 列表"""
+        with self._cond:
+            while not self._stopped:
+                now = datetime.utcnow()
+                if self._heap and self._heap[0][0] <= now:
+                    due = []
+                    while self._heap and self._heap[0][0] <= now:
+                        due.append(heapq.heappop(self._heap))
+                    return due
+                timeout = (self._heap[0][0] - now).total_seconds() if self._heap else None
+                self._cond.wait(timeout)
+        return []
+
+    def _loop(self):
+        with self.app.app_context():
+            self._load()
+            db.session.remove()
+        while not self._stopped:
+            due = self._pop_due()
+            if not due:
+                continue
+            with self.app.app_context():
+                try:
+                    for scheduled_at, tracked_id in due:
+                        self._dispatch(scheduled_at, tracked_id)
+                finally:
+                    db.session.remove()
+
+    def _dispatch(self, scheduled_at, tracked_id):
+        tracked = TrackedKeyword.query.get(tracked_id)
+        # 已删除、已取消跟踪或被 track() 重新安排过的旧条目
+        if tracked is None or not tracked.enabled or tracked.next_crawl_at != scheduled_at:
+            return
+        if tracked_id in self._running:
+            return
+        self._running.add(tracked_id)
+        app, user_id, keyword = self.app, tracked.user_id, tracked.keyword
+
+        def target(job):
+            try:
+                stats = scrape_keyword(app, user_id, keyword, job, fresh=True, log_activity=False)
+                self._reschedule(tracked_id, stats['inserted'])
+            except Exception:
+                self._reschedule(tracked_id, None)
+                raise
+            finally:
+                self._running.discard(tracked_id)
+
+        job_manager.submit(user_id, keyword, target)
+
+    def _reschedule(self, tracked_id, changed_count):
+        """根据本次写入的条数更新变化率与抓取间隔；changed_count 为 None 表示抓取失败，按原间隔重试"""
+        config = self.app.config
+        entry = write_queue.execute(
+            self._save_schedule,
+            tracked_id,
+            changed_count,
+            config.get('RECRAWL_MIN_INTERVAL', 300),
+            config.get('RECRAWL_MAX_INTERVAL', 7 * 24 * 3600)
+        )
+        if entry is None:
+            return
+        keyword, interval, next_crawl_at, enabled = entry
+        if changed_count is not None:
+            print(f"重新抓取 '{keyword}': 变化 {changed_count} 条，下次间隔 {interval}s")
+        if enabled:
+            self._push(next_crawl_at, tracked_id)
+
+    @staticmethod
+    def _save_schedule(tracked_id, changed_count, min_interval, max_interval):
+        """写线程中执行：更新抓取记录，返回 (关键词, 间隔, 下次抓取时间, 是否启用)"""
+        tracked = TrackedKeyword.query.get(tracked_id)
+        if tracked is None:
+            return None
+        now = datetime.utcnow()
+        if changed_count is not None:
+            changed = changed_count > 0
+            tracked.change_rate = (1 - CHANGE_RATE_ALPHA) * tracked.change_rate + CHANGE_RATE_ALPHA * changed
+            tracked.interval_seconds = next_interval(tracked.interval_seconds, changed, min_interval, max_interval)
+            tracked.crawl_count += 1
+            tracked.last_crawl_at = now
+            if changed:
+                tracked.last_changed_at = now
+                # 自动更新只在结果有变化时记入最近活动
+                dashboard.record(tracked.user_id, f'自动更新关键词: {tracked.keyword}（新增 {changed_count} 条）')
+        tracked.next_crawl_at = now + timedelta(seconds=tracked.interval_seconds)
+        return tracked.keyword, tracked.interval_seconds, tracked.next_crawl_at, tracked.enabled
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+
+# 全局调度器
+recrawl_scheduler = RecrawlScheduler()
@@ -1,7 +1,23 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from urllib.parse import urlparse
+from .http_cache import CachingAdapter
+
+# 百度搜索地址及每页结果数
+BAIDU_SEARCH_URL = 'https://www.baidu.com/s'
+RESULTS_PER_PAGE = 10
+
+# 默认请求头
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
 
 def scrape_baidu(keyword):
     """
@@ -102,3 +118,469 @@ def scrape_baidu(keyword):
         print(f"爬虫错误: {e}")
     
     return results
+
+
+def create_session(pool_size=16, cache=None):
+    """
+    创建带连接池的共享会话（keep-alive复用连接）
+
+    传入 cache（http_cache.HttpCache）时挂载磁盘缓存适配器。
+    """
+    session = requests.Session()
+    if cache is not None:
+        adapter = CachingAdapter(cache, pool_connections=pool_size, pool_maxsize=pool_size)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def parse_baidu_results(html):
+    """
+    解析百度搜索结果页，返回 title/content/url 字典列表
+    """
+    results = []
+    soup = BeautifulSoup(html, 'html.parser')
+    for container in soup.select('div.result, div.c-container'):
+        link = container.select_one('h3 a')
+        if not link:
+            continue
+        abstract = container.select_one('.c-abstract, .content-right_8Zs40, .c-span-last')
+        results.append({
+            'title': link.get_text(strip=True),
+            'content': abstract.get_text(strip=True) if abstract else '',
+            'url': link.get('href', '')
+        })
+    return results
+
+
+class TokenBucket:
+    """
+    令牌桶：以 rate 个/秒的速度补充令牌，最多积累 capacity 个
+
+    acquire 采用预约方式：令牌不足时预先扣减，调用方在锁外等待到预约时刻，
+    因此多个线程排队时仍能严格按速率放行。
+    """
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self):
+        """预约一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def acquire(self):
+        """阻塞直到获得一个令牌"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def set_rate(self, rate):
+        self.adjust(lambda _: rate)
+
+    def adjust(self, fn):
+        """在锁内把速率更新为 fn(当前速率)，并发的调整不会相互覆盖，返回新速率"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(fn(self.rate))
+            return self.rate
+
+    def block_for(self, seconds):
+        """在接下来 seconds 秒内暂停放行（用于 Retry-After）"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class HostRateLimiter:
+    """
+    按主机的自适应限速器（AIMD）
+
+    - 每个主机一个令牌桶，初始速率 initial_rate 次/秒
+    - 遇到 429/503/超时时速率乘以 decrease（乘性减），cooldown 秒内只减一次，
+      并遵循 Retry-After 暂停该主机
+    - 每次成功请求把速率提高 increase / 当前速率，即每秒约提高 increase（加性增）
+    - 速率限制在 [min_rate, max_rate] 之间
+    """
+
+    def __init__(self, initial_rate=5.0, min_rate=0.5, max_rate=50.0,
+                 increase=1.0, decrease=0.5, cooldown=1.0, burst=1.0):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.burst = burst
+        self._buckets = {}
+        self._last_decrease = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.initial_rate, self.burst)
+                self._buckets[host] = bucket
+                self._last_decrease[host] = 0.0
+                self._stats[host] = {'requests': 0, 'throttled': 0}
+            return bucket
+
+    def acquire(self, url):
+        """等待直到允许向该URL所在主机发送请求"""
+        host = urlparse(url).netloc
+        self._bucket(host).acquire()
+        with self._lock:
+            self._stats[host]['requests'] += 1
+
+    def on_success(self, url):
+        host = urlparse(url).netloc
+        self._bucket(host).adjust(lambda rate: min(self.max_rate, rate + self.increase / rate))
+
+    def on_throttle(self, url, retry_after=None):
+        host = urlparse(url).netloc
+        bucket = self._bucket(host)
+        now = time.monotonic()
+        with self._lock:
+            self._stats[host]['throttled'] += 1
+            should_decrease = now - self._last_decrease[host] >= self.cooldown
+            if should_decrease:
+                self._last_decrease[host] = now
+        if should_decrease:
+            bucket.adjust(lambda rate: max(self.min_rate, rate * self.decrease))
+        if retry_after:
+            bucket.block_for(retry_after)
+
+    def rate(self, url_or_host):
+        """当前允许的请求速率（次/秒）"""
+        host = urlparse(url_or_host).netloc or url_or_host
+        return self._bucket(host).rate
+
+    def stats(self):
+        """各主机的当前速率、请求数与被限流次数"""
+        with self._lock:
+            return {
+                host: dict(self._stats[host], rate=round(bucket.rate, 2))
+                for host, bucket in self._buckets.items()
+            }
+
+
+def init_rate_limiter(app):
+    """
+    按配置创建应用共用的限速器，保存在 app.extensions['rate_limiter']
+
+    同一主机的所有抓取（后台任务、重新抓取、批量抓取）共享一个令牌桶；
+    未启用（SCRAPE_RATE_LIMIT_ENABLED 为 False）时保存 None，返回创建的限速器。
+    """
+    limiter = None
+    if app.config.get('SCRAPE_RATE_LIMIT_ENABLED'):
+        limiter = HostRateLimiter(
+            initial_rate=app.config.get('SCRAPE_RATE_INITIAL', 5.0),
+            min_rate=app.config.get('SCRAPE_RATE_MIN', 0.5),
+            max_rate=app.config.get('SCRAPE_RATE_MAX', 50.0)
+        )
+    app.extensions['rate_limiter'] = limiter
+    return limiter
+
+
+class SingleFlight:
+    """
+    合并并发的相同请求：同一个 key 同时只执行一次，其余调用方等待并共享结果（或异常）
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """执行 fn()，返回 (结果, 是否为合并的调用)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = self._calls[key] = self._Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+
+class TTLCache:
+    """带过期时间的LRU缓存，线程安全"""
+
+    def __init__(self, ttl=300, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedScraper:
+    """
+    跨用户共享的关键词抓取结果
+
+    先查TTL缓存，未命中时通过 SingleFlight 合并并发的相同关键词抓取，
+    抓取完成后写入缓存，所有等待者共享同一份结果。
+    返回的结果为副本，调用方可以放心修改。
+    """
+
+    def __init__(self, fetch, ttl=300, max_entries=1024):
+        self.fetch = fetch
+        self.cache = TTLCache(ttl, max_entries)
+        self._flight = SingleFlight()
+        self._stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'fetches': 0}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get(self, keyword, ttl=None, fresh=False):
+        """获取关键词结果；fresh 为 True 时跳过缓存，但仍合并并发请求并刷新缓存"""
+        self._record('requests')
+        results = None if fresh else self.cache.get(keyword)
+        if results is not None:
+            self._record('cache_hits')
+            return [dict(result) for result in results]
+
+        def load():
+            self._record('fetches')
+            fetched = self.fetch(keyword)
+            # 空结果多半是抓取失败，不缓存
+            if fetched:
+                self.cache.set(keyword, fetched, ttl)
+            return fetched
+
+        results, coalesced = self._flight.do(keyword, load)
+        if coalesced:
+            self._record('coalesced')
+        return [dict(result) for result in results]
+
+    def stats(self):
+        """请求数、缓存命中数、合并数及实际抓取次数"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+# scrape_baidu 的共享实例
+_shared_baidu = SharedScraper(lambda keyword: scrape_baidu(keyword))
+
+
+def scrape_baidu_shared(keyword, ttl=None, fresh=False):
+    """
+    带合并与共享缓存的 scrape_baidu
+
+    多个用户同时抓取同一关键词时只执行一次抓取；ttl 秒内的重复抓取直接复用结果。
+    fresh 为 True 时忽略已缓存的结果重新抓取。
+    """
+    return _shared_baidu.get(keyword, ttl, fresh)
+
+
+def _retry_after_seconds(response):
+    """解析 Retry-After 头（只支持秒数形式）"""
+    value = response.headers.get('Retry-After')
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+class ScrapeEngine:
+    """
+    并发多关键词抓取引擎
+
+    - max_workers: 全局并发线程数上限
+    - per_host_limit: 每个主机同时进行的请求数上限
+    - 所有请求共享同一个带连接池的 requests.Session
+    - cache: 可选的 http_cache.HttpCache，命中或304时复用上次的解析结果
+    - rate_limiter: 可选的 HostRateLimiter，遇到429/503/超时时自适应降速并重试
+    """
+
+    # 被限流或超时时视为需要退避的状态码
+    THROTTLE_STATUS = (429, 503)
+
+    # 解析结果缓存条目数上限
+    PARSED_CACHE_SIZE = 1024
+
+    def __init__(self, max_workers=8, per_host_limit=4, timeout=10,
+                 search_url=BAIDU_SEARCH_URL, session=None, cache=None,
+                 rate_limiter=None, max_retries=3):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.search_url = search_url
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.session = session or create_session(pool_size=max_workers, cache=cache)
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
+        self._parsed = OrderedDict()
+        self._parsed_lock = threading.Lock()
+
+    def _host_semaphore(self, url):
+        """获取（或创建）某个主机的并发信号量"""
+        host = urlparse(url).netloc
+        with self._host_lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def _fetch_response(self, keyword, page=0):
+        params = {'wd': keyword, 'pn': page * RESULTS_PER_PAGE}
+        if self.rate_limiter is None:
+            with self._host_semaphore(self.search_url):
+                response = self.session.get(self.search_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            return response
+
+        limiter = self.rate_limiter
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire(self.search_url)
+            try:
+                with self._host_semaphore(self.search_url):
+                    response = self.session.get(self.search_url, params=params, timeout=self.timeout)
+            except (requests.Timeout, requests.ConnectionError):
+                limiter.on_throttle(self.search_url)
+                if attempt == self.max_retries:
+                    raise
+                continue
+            if response.status_code in self.THROTTLE_STATUS:
+                limiter.on_throttle(self.search_url, _retry_after_seconds(response))
+                if attempt < self.max_retries:
+                    response.close()
+                    continue
+            else:
+                limiter.on_success(self.search_url)
+            break
+        response.raise_for_status()
+        return response
+
+    def fetch_html(self, keyword, page=0):
+        """
+        抓取某个关键词第 page 页（从0开始）的搜索结果HTML
+        """
+        return self._fetch_response(keyword, page).text
+
+    def fetch_page(self, keyword, page=0):
+        """抓取并解析某个关键词的一页搜索结果"""
+        response = self._fetch_response(keyword, page)
+        # 缓存命中或304时页面未变化，直接复用上次的解析结果
+        if getattr(response, 'cache_status', 'miss') != 'miss':
+            with self._parsed_lock:
+                if response.url in self._parsed:
+                    self._parsed.move_to_end(response.url)
+                    return list(self._parsed[response.url])
+        results = parse_baidu_results(response.text)
+        if self.cache is not None:
+            with self._parsed_lock:
+                self._parsed[response.url] = results
+                if len(self._parsed) > self.PARSED_CACHE_SIZE:
+                    self._parsed.popitem(last=False)
+        return list(results)
+
+    def scrape_many(self, keywords, pages=1):
+        """
+        并发抓取多个关键词的多页结果
+
+        以生成器形式按完成顺序返回 (keyword, page, results)，
+        单页抓取失败时 results 为空列表，不影响其他页面。
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.fetch_page, keyword, page): (keyword, page)
+                for keyword in keywords
+                for page in range(pages)
+            }
+            for future in as_completed(futures):
+                keyword, page = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"爬虫错误: 关键词 '{keyword}' 第 {page + 1} 页抓取失败: {e}")
+                    results = []
+                yield keyword, page, results
+
+    def close(self):
+        """关闭共享会话，释放连接池"""
+        self.session.close()
+
+
+def scrape_many(keywords, pages=1, **engine_options):
+    """
+    并发抓取多个关键词（scrape_baidu 的批量版本）
+
+    engine_options 透传给 ScrapeEngine，例如 max_workers、per_host_limit、search_url、cache、rate_limiter。
+    以生成器形式按完成顺序返回 (keyword, page, results)。
+    """
+    engine = ScrapeEngine(**engine_options)
+    try:
+        for item in engine.scrape_many(keywords, pages=pages):
+            yield item
+    finally:
+        engine.close()
@@ -0,0 +1,198 @@
+"""
+数据仓库全文检索
+
+在 SQLite FTS5 虚拟表 scraped_data_fts 上检索已保存的数据，代替逐行扫描的 LIKE '%关键词%'：
+- 标题、内容、关键词先用 jieba（搜索引擎模式）分词，以空格连接后写入索引，中文查询可按词匹配
+- 只为已保存（saved）的数据建立索引，rowid 与 scraped_data.id 相同；
+  owner 列保存 "u<用户ID>"，按用户过滤在索引内完成，无需回表
+- 保存数据时调用 index_rows 分词写入索引；删除数据或取消保存时由 scraped_data 上的触发器删除索引行
+- 查询按 BM25 相关度排序，标题权重最高
+
+SQLite 未编译 FTS5 时 available() 返回 False，调用方应回退到 LIKE 查询。
+"""
+import re
+
+import jieba
+from sqlalchemy import text
+
+from . import db
+from .content_store import select_body_sql, row_body
+
+FTS_TABLE = 'scraped_data_fts'
+
+# BM25 列权重：title, content, keyword, owner
+BM25_WEIGHTS = (5.0, 1.0, 3.0, 0.0)
+
+# 每批写入索引的行数
+INDEX_BATCH_SIZE = 1000
+
+# 同步删除索引行的触发器
+_DELETE_TRIGGER = 'trg_scraped_data_fts_delete'
+_UNSAVE_TRIGGER = 'trg_scraped_data_fts_unsave'
+
+# 只含标点和空白的词以及常见虚词不参与检索
+_PUNCT_ONLY = re.compile(r'^[\W_]+$', re.U)
+QUERY_STOP_WORDS = {'的', '了', '和', '与', '及', '在', '是', '或'}
+
+_available = None
+
+
+def segment(value):
+    """分词并以空格连接，用作索引文本"""
+    if not value:
+        return ''
+    return ' '.join(word for word in jieba.cut_for_search(value) if word.strip())
+
+
+def build_match_query(query):
+    """
+    把用户输入转换为 FTS5 MATCH 表达式
+
+    索引使用搜索引擎模式（包含长词的子词），查询只需精确模式分词，
+    每个词作为一个带引号的短语，多个词之间为 AND 关系；没有可检索的词时返回 None。
+    """
+    terms = []
+    for word in jieba.cut(query or ''):
+        word = word.strip()
+        if word and not _PUNCT_ONLY.match(word) and word not in QUERY_STOP_WORDS and word not in terms:
+            terms.append(word)
+    if not terms:
+        return None
+    return ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def owner_token(user_id):
+    return f'u{int(user_id)}'
+
+
+def create_index(conn):
+    """创建 FTS5 虚拟表，返回是否为新建（新建时需要回填）；不支持 FTS5 时返回 None"""
+    global _available
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': FTS_TABLE}).first() is not None
+    if exists:
+        _available = True
+        return False
+    try:
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content, keyword, owner, tokenize = 'unicode61')"
+        ))
+    except Exception as e:
+        _available = False
+        print(f"SQLite 不支持 FTS5，数据搜索将使用 LIKE 查询: {e}")
+        return None
+    _available = True
+    return True
+
+
+def available():
+    """全文索引是否可用，首次调用时检查索引表是否存在（需要在应用上下文中调用）"""
+    global _available
+    if _available is None:
+        _available = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': FTS_TABLE}).first() is not None
+    return _available
+
+
+# 读取待索引数据的SQL（正文可能在 content_blob 中，见 app/content_store.py）
+_BODY_COLUMNS, _BODY_JOIN = select_body_sql('s')
+_SELECT_ROWS = (
+    f"SELECT s.id, s.title, s.keyword, s.user_id, {_BODY_COLUMNS} FROM scraped_data s {_BODY_JOIN} "
+)
+
+
+def _write(conn, rows):
+    conn.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{'id': row[0]} for row in rows])
+    conn.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, content, keyword, owner) "
+        f"VALUES (:id, :title, :content, :keyword, :owner)"
+    ), [
+        {'id': row_id, 'title': segment(title), 'content': segment(row_body(content, data, compressed)),
+         'keyword': segment(keyword), 'owner': owner_token(user_id)}
+        for row_id, title, keyword, user_id, content, data, compressed in rows
+    ])
+
+
+def rebuild_index(conn):
+    """清空并按批重新为所有已保存的数据建立索引，返回索引行数"""
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    total, last_id = 0, 0
+    while True:
+        rows = conn.execute(text(
+            _SELECT_ROWS + "WHERE s.saved = 1 AND s.id > :last_id ORDER BY s.id LIMIT :limit"
+        ), {'last_id': last_id, 'limit': INDEX_BATCH_SIZE}).fetchall()
+        if not rows:
+            return total
+        _write(conn, rows)
+        total += len(rows)
+        last_id = rows[-1][0]
+
+
+def index_rows(ids):
+    """
+    为指定的数据（重新）建立索引，只处理已保存的行
+
+    在调用方的会话事务中执行，需要在提交前调用，使索引与数据一起提交。
+    """
+    if not available() or not ids:
+        return
+    conn = db.session.connection()
+    ids = [int(row_id) for row_id in ids]
+    for i in range(0, len(ids), INDEX_BATCH_SIZE):
+        chunk = ids[i:i + INDEX_BATCH_SIZE]
+        params = {f'id{n}': row_id for n, row_id in enumerate(chunk)}
+        placeholders = ', '.join(f':{name}' for name in params)
+        rows = conn.execute(text(
+            _SELECT_ROWS + f"WHERE s.saved = 1 AND s.id IN ({placeholders})"
+        ), params).fetchall()
+        if rows:
+            _write(conn, rows)
+
+
+def create_sync_triggers(conn):
+    """
+    删除数据、取消保存时删除对应索引行的触发器，并清理已有的过期索引行
+
+    保存数据时仍由 index_rows 分词写入（分词无法在触发器中完成）。
+    索引表不存在（不支持 FTS5）时不做处理，返回清理的索引行数。
+    """
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': FTS_TABLE}).first() is not None
+    if not exists:
+        return 0
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {_DELETE_TRIGGER} AFTER DELETE ON scraped_data WHEN OLD.saved BEGIN "
+        f"DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id; END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {_UNSAVE_TRIGGER} AFTER UPDATE OF saved ON scraped_data "
+        f"WHEN OLD.saved AND NOT NEW.saved BEGIN "
+        f"DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id; END"
+    ))
+    return conn.execute(text(
+        f"DELETE FROM {FTS_TABLE} WHERE rowid NOT IN (SELECT id FROM scraped_data WHERE saved = 1)"
+    )).rowcount
+
+
+def search_ids(user_id, query, limit=None):
+    """
+    检索某个用户已保存的数据，按 BM25 相关度从高到低返回数据ID列表
+
+    没有可检索的词时返回空列表。
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    sql = (
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+        f"ORDER BY bm25({FTS_TABLE}, {weights})"
+    )
+    params = {'match': f'owner:{owner_token(user_id)} AND ({match})'}
+    if limit:
+        sql += " LIMIT :limit"
+        params['limit'] = limit
+    return [row[0] for row in db.session.execute(text(sql), params)]
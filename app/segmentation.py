@@ -0,0 +1,125 @@
+"""
+多进程中文分词与词频统计
+
+关键词分析的文本按字符数切分为若干块，交给进程池分词，每块返回过滤后的 Counter，由主进程合并：
+- 工作进程启动时预先加载 jieba 词典，进程池在首次使用后常驻，后续分析不再重复加载
+- 过滤（停用词、单字、非中文）在每块的去重词表上进行，而不是对每个分词结果逐一做正则匹配
+- 文本总量小于 PARALLEL_MIN_CHARS 或工作进程数为1时在当前进程中执行，避免进程间传输的开销
+jieba 按非中文字符切分文本，分块边界落在文档之间，分块后的结果与整体分词一致。
+
+进程池在 Flask 进程中首次分析时才创建，此时写线程、抓取任务线程池和重新抓取调度线程都已在运行，
+fork 会把这些线程持有的锁（连接池、日志、jieba）复制到子进程中造成死锁，因此工作进程一律以 spawn 方式启动。
+spawn 会重新导入启动脚本，启动脚本需要把创建和运行应用的代码放在 if __name__ == '__main__' 下；
+进程池在解释器退出时关闭。不需要多进程时可将 ANALYSIS_WORKERS 设为1。
+"""
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import jieba
+
+# 只保留纯中文词
+CHINESE_WORD = re.compile(r'[\u4e00-\u9fa5]+')
+_WHITESPACE = re.compile(r'[\s\xa0]+')
+
+# 默认停用词（DataAnalyzer 的停用词及入库时保存的词频均以此过滤）
+STOP_WORDS = frozenset({
+    '的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到',
+    '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '与', '对', '吗', '呢', '吧',
+    '啊', '哦', '呀', '嘛', '啦', '嗯', '哼', '哈', '嘿', '喂', '哎', '哟', '哦', '哇', '哒', '啦',
+    '但是', '如果', '因为', '所以', '不过', '虽然', '但是', '而且', '并且', '然而', '可是', '或者',
+    '还是', '不仅', '而是', '就是', '只是', '不是', '关于', '对于', '为了', '随着', '通过', '由于',
+    '根据', '按照', '因此', '于是', '总之', '综上所述', '由此可见', '显而易见', '事实上', '实际上',
+    '其实', '确实', '看来', '据说', '听说', '据悉', '据悉', '据了解', '据报道', '据分析', '据估计',
+    '可以', '能够', '应该', '必须', '需要', '可能', '或许', '也许', '大概', '大约', '左右', '前后',
+    '上下', '之间', '其中', '之后', '之前', '当时', '现在', '将来', '过去', '目前', '最近', '未来'
+})
+
+# 每块的最少字符数，以及启用多进程的最少总字符数
+CHUNK_CHARS = 200000
+PARALLEL_MIN_CHARS = 400000
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    jieba.initialize()
+
+
+def count_chunk(texts, stop_words):
+    """对一组文本分词并统计词频，去掉停用词、单字和非中文词"""
+    text = _WHITESPACE.sub(' ', ' '.join(texts))
+    counts = Counter(jieba.lcut(text))
+    for word in [word for word in counts if len(word) < 2 or word in stop_words or not CHINESE_WORD.fullmatch(word)]:
+        del counts[word]
+    return counts
+
+
+def _split(texts, chunk_chars):
+    chunks, chunk, size = [], [], 0
+    for text in texts:
+        chunk.append(text)
+        size += len(text)
+        if size >= chunk_chars:
+            chunks.append(chunk)
+            chunk, size = [], 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker)
+            _pool_workers = workers
+        return _pool
+
+
+def count_words(texts, stop_words, workers=None, chunk_chars=CHUNK_CHARS, min_parallel_chars=PARALLEL_MIN_CHARS):
+    """
+    统计一组文本的词频，返回 Counter（词的顺序与整体分词时首次出现的顺序一致）
+
+    workers 为工作进程数，默认为CPU核数。进程池不可用时退回当前进程执行。
+    """
+    texts = [text for text in texts if text]
+    workers = workers or os.cpu_count() or 1
+    total_chars = sum(len(text) for text in texts)
+    if workers <= 1 or total_chars < min_parallel_chars:
+        return count_chunk(texts, stop_words)
+
+    # 每个工作进程至少分到4块，使各进程的负载更均衡
+    chunks = _split(texts, max(chunk_chars, total_chars // (workers * 4)))
+    stop_words = frozenset(stop_words)
+    try:
+        parts = list(_get_pool(workers).map(count_chunk, chunks, repeat(stop_words)))
+    except Exception as e:
+        print(f"多进程分词失败，改为单进程执行: {e}")
+        return count_chunk(texts, stop_words)
+    counts = Counter()
+    for part in parts:
+        counts.update(part)
+    return counts
+
+
+def shutdown():
+    """关闭常驻的分词进程池"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_workers = None, 0
+
+
+atexit.register(shutdown)
@@ -0,0 +1,131 @@
+"""
+数据源适配器
+
+每个数据源声明自己的抓取（fetch）和解析（parse）逻辑以及并发上限（max_concurrency），
+通过 register_source 注册后即可在配置 SCRAPE_SOURCES 中按名称启用。
+入库管道为每个数据源启动 max_concurrency 个抓取线程，同一次抓取并行请求所有启用的数据源，
+结果按完成顺序合并进同一条流，总耗时取决于最慢的数据源而不是各数据源耗时之和。
+"""
+from collections import OrderedDict
+
+from .scraper import (
+    ScrapeEngine, BAIDU_SEARCH_URL, parse_baidu_results, scrape_baidu_shared
+)
+
+# 已注册的数据源：名称 -> 适配器类
+_registry = OrderedDict()
+
+
+def register_source(cls):
+    """注册数据源适配器（可用作类装饰器），名称即写入 source 列的值"""
+    if not cls.name:
+        raise ValueError(f"数据源适配器 {cls.__name__} 缺少名称")
+    _registry[cls.name] = cls
+    return cls
+
+
+def available_sources():
+    """返回已注册的数据源名称"""
+    return list(_registry)
+
+
+def create_sources(names, config=None, **options):
+    """
+    按名称创建数据源适配器实例
+
+    config 为应用配置（适配器可从中读取自己的设置），options 透传给各适配器，例如 fresh、cache、rate_limiter。
+    """
+    sources = []
+    for name in names:
+        cls = _registry.get(name)
+        if cls is None:
+            raise ValueError(f"未知的数据源: {name}（可用: {', '.join(_registry)}）")
+        sources.append(cls(config, **options))
+    return sources
+
+
+class SourceAdapter:
+    """
+    数据源适配器基类
+
+    - name: 数据源名称，写入 ScrapedData.source
+    - max_concurrency: 该数据源同时进行的抓取数上限
+    - fetch(keyword, page): 返回原始内容（HTML 或已解析的结果列表）
+    - parse(payload): 把原始内容解析为 title/content/url 字典列表，默认原样返回
+    - cache: 可选的 http_cache.HttpCache，抓取网页的数据源挂载到自己的会话上
+    - rate_limiter: 可选的 scraper.HostRateLimiter，抓取网页的数据源据此按主机限速
+    """
+
+    name = None
+    max_concurrency = 1
+
+    def __init__(self, config=None, fresh=False, max_concurrency=None, cache=None, rate_limiter=None):
+        self.config = config or {}
+        self.fresh = fresh
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        if max_concurrency is not None:
+            self.max_concurrency = max_concurrency
+
+    def fetch(self, keyword, page=0):
+        raise NotImplementedError
+
+    def parse(self, payload):
+        return payload
+
+    def search(self, keyword, page=0):
+        """抓取并解析一页结果"""
+        return self.parse(self.fetch(keyword, page))
+
+    def close(self):
+        """释放连接等资源"""
+
+
+@register_source
+class BaiduMockSource(SourceAdapter):
+    """
+    百度（模拟数据），经 scrape_baidu_shared 合并并发请求并共享近期结果
+
+    不访问网络，因此不使用 HTTP 缓存和限速器，只用于离线演示；默认数据源为 BaiduWebSource。
+    """
+
+    name = '百度'
+    max_concurrency = 1
+
+    def fetch(self, keyword, page=0):
+        # 模拟数据只有一页
+        if page > 0:
+            return []
+        ttl = self.config.get('SCRAPE_RESULT_TTL', 300)
+        return scrape_baidu_shared(keyword, ttl=ttl, fresh=self.fresh)
+
+
+@register_source
+class BaiduWebSource(SourceAdapter):
+    """
+    百度网页搜索，抓取真实搜索结果页（地址可通过 BAIDU_SEARCH_URL 配置），默认启用的数据源
+
+    请求经共用的 HTTP 缓存和按主机限速器发出；fresh 为 True 时不挂载缓存，直接从网络抓取。
+    """
+
+    name = '百度网页'
+    max_concurrency = 4
+
+    def __init__(self, config=None, fresh=False, max_concurrency=None, cache=None, rate_limiter=None):
+        super().__init__(config, fresh, max_concurrency, cache, rate_limiter)
+        self.engine = ScrapeEngine(
+            max_workers=self.max_concurrency,
+            per_host_limit=self.max_concurrency,
+            search_url=self.config.get('BAIDU_SEARCH_URL', BAIDU_SEARCH_URL),
+            cache=None if self.fresh else self.cache,
+            rate_limiter=self.rate_limiter
+        )
+
+    def fetch(self, keyword, page=0):
+        return self.engine.fetch_html(keyword, page)
+
+    def parse(self, payload):
+        return parse_baidu_results(payload)
+
+    def close(self):
+        self.engine.close()
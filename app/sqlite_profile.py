@@ -0,0 +1,54 @@
+"""
+SQLite 连接参数
+
+每个新建的数据库连接都按配置 SQLITE_PRAGMAS 执行 PRAGMA：
+- journal_mode=WAL：读写并发，读操作不会被写事务阻塞
+- synchronous=NORMAL：WAL 模式下只在检查点时 fsync，提交不再逐次等待磁盘
+- busy_timeout：写锁被占用时等待而不是立即报 database is locked
+- cache_size / mmap_size / temp_store：页缓存、内存映射读取和临时表放在内存中
+"""
+import re
+
+from sqlalchemy import event
+
+# 允许配置的 PRAGMA 及执行顺序（journal_mode 需要最先设置）
+PRAGMA_ORDER = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'temp_store',
+                'wal_autocheckpoint', 'foreign_keys')
+
+_VALUE = re.compile(r'^-?\d+$|^[A-Za-z_]+$')
+
+
+def set_pragmas(dbapi_connection, pragmas):
+    """在 DB-API 连接上执行 PRAGMA，pragmas 为 {名称: 值}"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name in PRAGMA_ORDER:
+            if name not in pragmas or pragmas[name] is None:
+                continue
+            value = str(pragmas[name])
+            if not _VALUE.match(value):
+                raise ValueError(f"无效的 PRAGMA 值: {name}={value}")
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def apply_sqlite_profile(engine, pragmas):
+    """
+    为 SQLite 引擎注册连接钩子，之后新建的每个连接都会执行 pragmas
+
+    非 SQLite 引擎或 pragmas 为空时不做任何处理。
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    unknown = set(pragmas) - set(PRAGMA_ORDER)
+    if unknown:
+        raise ValueError(f"不支持的 PRAGMA: {', '.join(sorted(unknown))}")
+    pragmas = dict(pragmas)
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        set_pragmas(dbapi_connection, pragmas)
+
+    # 连接钩子注册前已经建立的连接不会执行钩子，丢弃后重新连接
+    engine.dispose()
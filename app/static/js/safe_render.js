@@ -0,0 +1,39 @@
+// 动态追加的数据行共用的渲染函数：抓取到的文本和链接都不可信，必须转义后才能写入页面
+
+// 转义 HTML 特殊字符（包括引号，结果可以放在属性值中）
+function escapeHtml(text) {
+    return String(text === null || text === undefined ? '' : text)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
+
+// 只接受 http/https 的绝对链接，其他协议（javascript:、data: 等）和无法解析的链接返回空字符串
+function safeUrl(url) {
+    if (!url) {
+        return '';
+    }
+    try {
+        const parsed = new URL(url);
+        return parsed.protocol === 'http:' || parsed.protocol === 'https:' ? parsed.href : '';
+    } catch (e) {
+        return '';
+    }
+}
+
+// 创建"查看原文"链接元素，链接不安全时返回 null
+function sourceLink(url, className) {
+    const href = safeUrl(url);
+    if (!href) {
+        return null;
+    }
+    const link = document.createElement('a');
+    link.setAttribute('href', href);
+    link.setAttribute('target', '_blank');
+    link.setAttribute('rel', 'noopener noreferrer');
+    link.className = className;
+    link.textContent = '查看原文';
+    return link;
+}
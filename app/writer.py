@@ -0,0 +1,182 @@
+"""
+单写线程提交队列（group commit）
+
+SQLite 同一时间只允许一个写事务。各请求和后台任务各自提交时会争抢写锁，
+锁被占用时只能等待 busy_timeout 后重试。这里把写操作交给唯一的写线程执行：
+- submit(fn, *args) 把写操作放入队列，立即返回 concurrent.futures.Future
+- 写线程一次取出队列中积压的所有操作（最多 WRITE_GROUP_MAX_OPS 个），
+  在同一个事务中依次执行后只提交一次，提交成功后才设置各 Future 的结果
+- 合并执行的事务失败时回滚，再逐个单独执行这些操作，只有出错的操作收到异常
+
+写操作 fn 在写线程的应用上下文中运行，通过 db.session 读写，不要提交事务；
+不能直接使用调用方会话中加载的 ORM 对象，应传入ID或普通值，在 fn 内查询或创建对象。
+失败后会被重新执行，因此 fn 除数据库外不应有其他副作用。
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from . import db
+
+_STOP = object()
+
+
+class _WriteOp:
+    __slots__ = ('fn', 'args', 'kwargs', 'future')
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+    def __call__(self):
+        return self.fn(*self.args, **self.kwargs)
+
+
+class WriteQueue:
+    """
+    单写线程提交队列，按 Flask 扩展的方式通过 init_app 绑定应用
+
+    配置 WRITE_QUEUE_ENABLED 为 False 时不启动写线程，submit 在调用线程中直接执行并提交。
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.max_ops = 256
+        self.group_delay = 0.0
+        # 统计：已执行的操作数、提交次数、单次提交的最大操作数、合并失败后逐个重试的次数
+        self.ops = 0
+        self.commits = 0
+        self.max_group = 0
+        self.retries = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.max_ops = max(1, app.config.get('WRITE_GROUP_MAX_OPS', 256))
+        self.group_delay = app.config.get('WRITE_GROUP_DELAY', 0.0)
+        if app.config.get('WRITE_QUEUE_ENABLED', True) and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='db-writer', daemon=True)
+            self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        提交写操作，返回 Future，事务提交后得到 fn 的返回值
+
+        写线程未启动时在当前线程（需在应用上下文中）直接执行并提交；
+        在写操作内部再次调用时直接执行，由外层事务一并提交。
+        """
+        op = _WriteOp(fn, args, kwargs)
+        if threading.current_thread() is self._thread:
+            op.future.set_result(op())
+            return op.future
+        if not self.running:
+            self._run_single(op)
+            return op.future
+        self._queue.put(op)
+        return op.future
+
+    def execute(self, fn, *args, **kwargs):
+        """提交写操作并等待提交完成，返回 fn 的返回值，失败时抛出 fn 或提交时的异常"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    # ---------- 写线程 ----------
+
+    def _next_group(self):
+        """阻塞取出第一个操作，再取出已积压的操作，返回 (操作列表, 是否收到停止信号)"""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        group = [first]
+        deadline = time.monotonic() + self.group_delay
+        while len(group) < self.max_ops:
+            try:
+                timeout = deadline - time.monotonic()
+                op = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if op is _STOP:
+                return group, True
+            group.append(op)
+        return group, False
+
+    def _loop(self):
+        stopping = False
+        while not stopping:
+            group, stopping = self._next_group()
+            if not group:
+                continue
+            with self.app.app_context():
+                try:
+                    self._run_group(group)
+                finally:
+                    db.session.remove()
+
+    def _run_group(self, group):
+        if len(group) == 1:
+            self._run_single(group[0])
+            return
+        results = []
+        try:
+            for op in group:
+                results.append(op())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # 无法确定是哪个操作导致失败，逐个单独执行
+            with self._lock:
+                self.retries += 1
+            for op in group:
+                self._run_single(op)
+            return
+        self._record(len(group))
+        for op, result in zip(group, results):
+            op.future.set_result(result)
+
+    def _run_single(self, op):
+        try:
+            result = op()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            op.future.set_exception(e)
+            return
+        self._record(1)
+        op.future.set_result(result)
+
+    def _record(self, count):
+        with self._lock:
+            self.ops += count
+            self.commits += 1
+            self.max_group = max(self.max_group, count)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'ops': self.ops,
+                'commits': self.commits,
+                'ops_per_commit': round(self.ops / self.commits, 2) if self.commits else 0,
+                'max_group': self.max_group,
+                'retries': self.retries,
+                'pending': self._queue.qsize()
+            }
+
+    def stop(self, timeout=None):
+        """执行完队列中已有的操作后停止写线程"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+# 全局写队列
+write_queue = WriteQueue()
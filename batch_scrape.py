@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量抓取（支持断点续抓）
+
+从文件读取关键词（每行一个），并发抓取多页结果并流式入库。
+进度保存在数据库中，进程中断后用相同参数重新运行即可从断点继续，已完成的页面不会重复抓取。
+
+用法:
+    python batch_scrape.py keywords.txt --pages 5 --user admin
+    python batch_scrape.py keywords.txt --pages 5 --search-url http://127.0.0.1:8090/s
+"""
+import argparse
+import sys
+
+from app import create_app
+from app.models import User
+from app.scraper import ScrapeEngine, BAIDU_SEARCH_URL
+from app.checkpoint import CrawlCheckpoint
+from app.ingest import IngestPipeline
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量抓取（支持断点续抓）')
+    parser.add_argument('keywords_file', help='关键词文件，每行一个关键词')
+    parser.add_argument('--pages', type=int, default=1, help='每个关键词抓取页数')
+    parser.add_argument('--user', default='admin', help='数据归属的用户名')
+    parser.add_argument('--search-url', default=BAIDU_SEARCH_URL, help='搜索地址')
+    parser.add_argument('--workers', type=int, help='并发抓取线程数（默认为配置 SCRAPE_FETCH_WORKERS）')
+    args = parser.parse_args()
+
+    with open(args.keywords_file, encoding='utf-8') as f:
+        keywords = [line.strip() for line in f if line.strip()]
+
+    app = create_app()
+    with app.app_context():
+        user = User.query.filter_by(username=args.user).first()
+        if user is None:
+            print(f"用户不存在: {args.user}")
+            sys.exit(1)
+
+        checkpoint = CrawlCheckpoint.open(user.id, keywords, args.pages)
+        workers = args.workers or app.config.get('SCRAPE_FETCH_WORKERS', 8)
+        engine = ScrapeEngine(
+            max_workers=workers,
+            per_host_limit=workers,
+            search_url=args.search_url,
+            cache=app.extensions.get('http_cache'),
+            rate_limiter=app.extensions.get('rate_limiter')
+        )
+        pipeline = IngestPipeline(
+            app,
+            user.id,
+            batch_size=app.config.get('SCRAPE_BATCH_SIZE', 500),
+            queue_size=app.config.get('SCRAPE_QUEUE_SIZE', 1000),
+            fetch_workers=workers,
+            fetcher=engine.fetch_html
+        )
+        try:
+            stats = pipeline.run(keywords, pages=args.pages, checkpoint=checkpoint)
+        finally:
+            engine.close()
+
+        finished = checkpoint.finish()
+        print(f"本次新增 {stats['inserted']} 条，耗时 {stats['elapsed']}s，页面进度: {checkpoint.progress()}")
+        for stage in stats['stages']:
+            print(f"  {stage['stage']:<10} 输入 {stage['received']:>8} 输出 {stage['emitted']:>8} "
+                  f"错误 {stage['errors']:>4} 吞吐 {stage['throughput']:>8}/s")
+        cache = app.extensions.get('http_cache')
+        if cache is not None:
+            print(cache.summary())
+        if not finished:
+            print("仍有未完成或失败的页面，重新运行相同命令即可继续")
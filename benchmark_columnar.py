@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+完整分析基准测试：逐条对象分析（列表、流式） vs 列式分析（ColumnarAnalyzer.perform_columnar_analysis）
+
+使用 benchmark_streaming 的数据构造方式，在临时 SQLite 数据库中为一个用户写入指定数量的已保存数据，
+然后分别在独立的子进程中分析该用户的全部数据：
+- 列表：query.all() 加载全部 ORM 对象，再调用 perform_full_analysis
+- 流式：perform_streaming_analysis 在数据库中去重后用 yield_per 逐批读取，单遍完成全部统计
+- 列式：只读取分析需要的列放入 DataFrame，向量化完成去重、来源/时间分布和长度统计
+对比耗时和子进程的峰值内存（RSS），并检查三种方式的统计结果一致。
+
+用法:
+    python benchmark_columnar.py --rows 100000 300000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from app import db
+from app.columnar import ColumnarAnalyzer
+from app.models import ScrapedData
+from benchmark_streaming import YIELD_PER, build
+from tests_support import make_app
+
+MODES = (('list', '列表'), ('stream', '流式'), ('columnar', '列式'))
+
+
+def child(path, mode):
+    """在子进程中执行一种分析方式，输出耗时、峰值内存和结果摘要"""
+    app = make_app(path)
+    with app.app_context():
+        analyzer = ColumnarAnalyzer(workers=1)
+        query = ScrapedData.query.filter_by(user_id=1, saved=True).order_by(ScrapedData.id)
+        start = time.perf_counter()
+        if mode == 'list':
+            result = analyzer.perform_full_analysis(query.all())
+        elif mode == 'stream':
+            result = analyzer.perform_streaming_analysis(query, yield_per=YIELD_PER)
+        else:
+            result = analyzer.perform_columnar_analysis(query)
+        seconds = time.perf_counter() - start
+        summary = {key: result[key] for key in ('raw_count', 'cleaned_count', 'time_distribution',
+                                                'source_distribution', 'text_length_stats', 'insights')}
+        summary['keywords'] = result['keywords'].get('top_keywords_with_freq')
+        summary['key_summaries'] = [(item.title, item.content) for item in result['key_summaries']]
+        db.session.rollback()
+    print(json.dumps({'seconds': seconds, 'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                      'summary': summary}, ensure_ascii=False, default=float))
+
+
+def run_child(path, mode):
+    output = subprocess.run([sys.executable, __file__, '--child', mode, '--db', path],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='完整分析基准测试：逐条对象 vs 列式')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 300000], help='已保存数据行数')
+    parser.add_argument('--child', choices=[mode for mode, _ in MODES], help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.db, args.child)
+        sys.exit(0)
+
+    print(f"{'行数':>8} {'方式':>6} {'耗时':>8} {'峰值内存':>10} {'结果一致':>8}")
+    for count in args.rows:
+        workdir = tempfile.mkdtemp(prefix='columnar_bench_')
+        path = os.path.join(workdir, 'bench.db')
+        try:
+            build(path, count, random.Random(0))
+            results = {mode: run_child(path, mode) for mode, _ in MODES}
+        finally:
+            for filename in os.listdir(workdir):
+                os.remove(os.path.join(workdir, filename))
+            os.rmdir(workdir)
+        for mode, label in MODES:
+            result = results[mode]
+            same = result['summary'] == results['list']['summary']
+            print(f"{count:>8} {label:>6} {result['seconds']:>7.2f}s {result['maxrss'] / 1024:>8.0f}MB "
+                  f"{'是' if same else '否':>8}")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+正文存储基准测试：行内保存 vs 内容寻址存储（app/content_store.py）
+
+模拟多个用户反复抓取同一批热门搜索结果：共有 --bodies 个不同的正文（摘要与原文正文按比例混合），
+生成 --rows 行抓取数据，每行随机引用其中一个正文。分别按两种方式写入临时 SQLite 数据库：
+- 行内：正文直接保存在 scraped_data.content 中
+- 内容存储：正文按哈希写入 content_blob（大正文 zlib 压缩），行中只保存 body_hash
+对比数据库文件大小、每行平均占用字节数，以及按页读取数据（含解压正文）的耗时。
+
+用法:
+    python benchmark_content_store.py --rows 200000 --bodies 20000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from app.content_store import COMPRESS_MIN_BYTES, encode_body, row_body
+
+TOPICS = ['人工智能', '新能源汽车', '半导体', '区块链', '云计算', '大数据', '物联网', '生物医药']
+SENTENCES = ['关于{kw}的最新新闻报道，涵盖行业动态、技术发展和市场分析。',
+             '{kw}的官方技术文档，包括API参考、用户指南和安装说明。',
+             '{kw}的详细市场分析和预测，包括增长趋势和竞争格局。',
+             '展示{kw}成功实施和应用的真实案例研究。',
+             '学习和有效使用{kw}的分步教程和综合指南。']
+
+SCHEMA = (
+    'CREATE TABLE scraped_data (id INTEGER PRIMARY KEY, keyword VARCHAR(200), title VARCHAR(500), content TEXT, '
+    'url VARCHAR(500), created_at DATETIME, saved BOOLEAN, user_id INTEGER, body_hash VARCHAR(40))',
+    'CREATE TABLE content_blob (hash VARCHAR(40) PRIMARY KEY, data BLOB, compressed BOOLEAN, size INTEGER, '
+    'refcount INTEGER)',
+    'CREATE INDEX ix_scraped_data_user_created ON scraped_data (user_id, created_at)',
+)
+
+
+def make_bodies(count, article_ratio, rng):
+    """生成不同的正文：摘要约100字，原文正文约1500字"""
+    bodies = []
+    for i in range(count):
+        kw = rng.choice(TOPICS)
+        sentences = 40 if rng.random() < article_ratio else 3
+        bodies.append(f'[{i}]' + ''.join(rng.choice(SENTENCES).format(kw=kw) for _ in range(sentences)))
+    return bodies
+
+
+def build(path, rows, bodies, use_store, rng, batch_size=5000):
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    stored = set()
+    start = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        batch, blobs = [], []
+        for i in range(offset, min(offset + batch_size, rows)):
+            body = rng.choice(bodies)
+            row = [f'关键词{i % 500}', f'标题{i}', body, f'https://example.com/{i}',
+                   '2024-01-01 00:00:00', i % 2, i % 50 + 1, None]
+            if use_store:
+                digest, data, compressed, size = encode_body(body, COMPRESS_MIN_BYTES)
+                if digest not in stored:
+                    stored.add(digest)
+                    blobs.append((digest, data, compressed, size))
+                row[2], row[7] = None, digest
+            batch.append(row)
+        conn.executemany('INSERT INTO content_blob VALUES (?, ?, ?, ?, 1)', blobs)
+        conn.executemany('INSERT INTO scraped_data (keyword, title, content, url, created_at, saved, user_id, '
+                         'body_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', batch)
+    conn.commit()
+    conn.execute('VACUUM')
+    return conn, time.perf_counter() - start
+
+
+def read_pages(conn, users, page_size=50):
+    """按用户读取第一页数据（含正文），返回每页平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for user_id in range(1, users + 1):
+        rows = conn.execute(
+            'SELECT s.id, s.title, s.content, b.data, b.compressed FROM scraped_data s '
+            'LEFT JOIN content_blob b ON b.hash = s.body_hash WHERE s.user_id = ? '
+            'ORDER BY s.created_at DESC LIMIT ?', (user_id, page_size)
+        ).fetchall()
+        for row_id, title, content, data, compressed in rows:
+            row_body(content, data, compressed)
+    return (time.perf_counter() - start) / users * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='正文存储基准测试：行内 vs 内容寻址存储')
+    parser.add_argument('--rows', type=int, default=200000, help='抓取数据行数')
+    parser.add_argument('--bodies', type=int, default=20000, help='不同正文的数量')
+    parser.add_argument('--article-ratio', type=float, default=0.2, help='原文正文（长文本）所占比例')
+    args = parser.parse_args()
+
+    bodies = make_bodies(args.bodies, args.article_ratio, random.Random(0))
+    print(f"{args.rows} 行数据，{args.bodies} 个不同正文（长文本占 {args.article_ratio:.0%}）")
+    print(f"{'方式':<10} {'写入耗时':>8} {'文件大小':>10} {'每行字节':>8} {'读取一页':>9}")
+    for name, use_store in (('行内', False), ('内容存储', True)):
+        workdir = tempfile.mkdtemp(prefix='content_bench_')
+        path = os.path.join(workdir, 'bench.db')
+        try:
+            conn, seconds = build(path, args.rows, bodies, use_store, random.Random(1))
+            size = os.path.getsize(path)
+            page_ms = read_pages(conn, 50)
+            conn.close()
+        finally:
+            for filename in os.listdir(workdir):
+                os.remove(os.path.join(workdir, filename))
+            os.rmdir(workdir)
+        print(f"{name:<10} {seconds:>7.1f}s {size / 1024 / 1024:>8.1f}MB {size / args.rows:>8.0f} {page_ms:>7.2f}ms")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+报告分析基准测试：每次重新分词 vs 汇总入库时保存的特征（app/features.py）
+
+在临时 SQLite 数据库中写入指定数量的已保存数据（入库时计算数值特征，保存时分词写入词频表），
+然后对同一批数据执行 DataAnalyzer.perform_full_analysis：
+- 重新分词：数据不带已保存的特征，与原实现一样对全部标题和正文分词
+- 汇总特征：使用入库时保存的长度、去重键和词频表
+同时给出入库与保存时额外的特征计算耗时，并检查两种方式的分析结果一致。
+
+用法:
+    python benchmark_features.py --rows 1000 10000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from app import db, features
+from app.data_analyzer import DataAnalyzer
+from app.dedup import prepare_row, upsert_scraped_rows
+from app.migrations import migrate
+from app.models import ScrapedData
+from tests_support import make_app
+
+TOPICS = ['人工智能', '新能源汽车', '半导体', '区块链', '云计算', '大数据', '物联网', '生物医药',
+          '光伏发电', '量子计算', '机器人', '智慧城市', '跨境电商', '在线教育', '数字货币', '网络安全']
+SENTENCES = ['关于{kw}的最新新闻报道，涵盖行业动态、技术发展和市场分析。',
+             '{kw}的官方技术文档，包括API参考、用户指南和安装说明。',
+             '{kw}的详细市场分析和预测，包括增长趋势和竞争格局。',
+             '展示{kw}成功实施和应用的真实案例研究。',
+             '学习和有效使用{kw}的分步教程和综合指南。',
+             '专家认为{kw}在未来五年将保持高速增长，产业链上下游企业加快布局。']
+
+
+class Doc:
+    """不带入库特征的数据（相当于原实现的输入）"""
+    def __init__(self, item):
+        self.title = item.title
+        self.content = item.content
+        self.url = item.url
+        self.source = item.source
+        self.created_at = item.created_at
+
+
+def make_rows(count, rng):
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        kw = rng.choice(TOPICS)
+        rows.append(prepare_row({
+            'keyword': kw,
+            'title': f'{kw}相关报道{i}',
+            'content': ''.join(rng.choice(SENTENCES).format(kw=kw) for _ in range(rng.randint(2, 12))),
+            'url': f'https://example.com/{i}',
+            'source': rng.choice(['百度', '必应', '新闻']),
+            'created_at': now,
+            'saved': True,
+            'user_id': 1
+        }))
+    return rows
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(count):
+    workdir = tempfile.mkdtemp(prefix='features_bench_')
+    path = os.path.join(workdir, 'bench.db')
+    app = make_app(path)
+    try:
+        with app.app_context():
+            # 建立完整结构（含正文引用计数触发器）
+            migrate()
+            rows = make_rows(count, random.Random(0))
+            _, insert_seconds = timed(upsert_scraped_rows, rows)
+            db.session.commit()
+            ids = [row_id for (row_id,) in db.session.query(ScrapedData.id)]
+            counts, segment_seconds = timed(features.segment_rows, 1, ids)
+            features.store_terms(counts)
+            db.session.commit()
+
+            analyzer = DataAnalyzer(workers=1)
+            docs = [Doc(item) for item in ScrapedData.query.all()]
+            expected, baseline = timed(analyzer.perform_full_analysis, docs)
+            db.session.expunge_all()
+            items = ScrapedData.query.all()
+            result, seconds = timed(analyzer.perform_full_analysis, items)
+            db.session.rollback()
+            same = all(result[key] == expected[key] for key in expected if key != 'key_summaries')
+            chars = sum(len(doc.title) + len(doc.content) for doc in docs)
+        print(f"{count:>8} {chars / 10000:>7.0f}万 {insert_seconds:>8.2f}s {segment_seconds:>8.2f}s "
+              f"{baseline:>9.2f}s {seconds:>9.3f}s {baseline / seconds:>7.1f}x {'是' if same else '否':>6}")
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        for filename in os.listdir(workdir):
+            os.remove(os.path.join(workdir, filename))
+        os.rmdir(workdir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='报告分析基准测试：重新分词 vs 汇总入库特征')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='数据行数')
+    args = parser.parse_args()
+
+    print(f"{'行数':>8} {'文本量':>8} {'入库耗时':>8} {'保存分词':>8} {'重新分词':>9} {'汇总特征':>9} {'加速比':>7} {'一致':>6}")
+    for count in args.rows:
+        run(count)
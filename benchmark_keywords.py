@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+关键词分析基准测试：原单线程实现 vs 分块多进程分词（app/segmentation.py）
+
+生成指定数量的合成文档（标题 + 摘要/正文），对比：
+- 原实现：字符串 += 拼接全部文本，单次 jieba.lcut，逐词正则过滤后统计
+- 新实现：按不同工作进程数分块分词，每块在去重词表上过滤后合并 Counter
+同时检查两种实现得到的词频完全一致。多进程的首次调用包含进程启动和词典加载，单独计时。
+
+用法:
+    python benchmark_keywords.py --docs 10000 100000
+    python benchmark_keywords.py --docs 100000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import random
+import re
+import time
+from collections import Counter
+
+import jieba
+
+from app.data_analyzer import DataAnalyzer
+from app.segmentation import count_words, shutdown
+
+TOPICS = ['人工智能', '新能源汽车', '半导体', '区块链', '云计算', '大数据', '物联网', '生物医药',
+          '光伏发电', '量子计算', '机器人', '智慧城市', '跨境电商', '在线教育', '数字货币', '网络安全']
+SENTENCES = ['关于{kw}的最新新闻报道，涵盖行业动态、技术发展和市场分析。',
+             '{kw}的官方技术文档，包括API参考、用户指南和安装说明。',
+             '{kw}的详细市场分析和预测，包括增长趋势和竞争格局。',
+             '展示{kw}成功实施和应用的真实案例研究。',
+             '学习和有效使用{kw}的分步教程和综合指南。',
+             '专家认为{kw}在未来五年将保持高速增长，产业链上下游企业加快布局。']
+
+
+class Doc:
+    def __init__(self, title, content):
+        self.title = title
+        self.content = content
+
+
+def make_docs(count, rng):
+    docs = []
+    for i in range(count):
+        kw = rng.choice(TOPICS)
+        sentences = rng.randint(2, 12)
+        docs.append(Doc(f'{kw}相关报道{i}', ''.join(rng.choice(SENTENCES).format(kw=kw) for _ in range(sentences))))
+    return docs
+
+
+def legacy_counts(docs, stop_words):
+    """原 analyze_keywords 的分词与统计过程"""
+    all_text = ''
+    for item in docs:
+        all_text += f"{item.title} "
+        all_text += f"{getattr(item, 'content', '')} "
+    all_text = re.sub(r'[\s\n\r\t]+', ' ', all_text)
+    all_text = re.sub(r'[\xa0]+', ' ', all_text)
+    words = jieba.lcut(all_text)
+    filtered_words = [
+        word for word in words
+        if word not in stop_words
+        and len(word) > 1
+        and re.match(r'^[\u4e00-\u9fa5]+$', word)
+    ]
+    return Counter(filtered_words)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='关键词分析基准测试')
+    parser.add_argument('--docs', type=int, nargs='+', default=[10000, 100000], help='文档数量')
+    parser.add_argument('--workers', type=int, nargs='+', default=None, help='工作进程数（默认1、2、4…直至CPU核数）')
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers_list = args.workers or sorted({1, cpus} | {n for n in (2, 4, 8, 16) if n < cpus})
+    stop_words = DataAnalyzer(workers=1).stop_words
+    jieba.initialize()
+    print(f"CPU核数 {cpus}")
+
+    for count in args.docs:
+        docs = make_docs(count, random.Random(0))
+        texts = [text for doc in docs for text in (doc.title, doc.content)]
+        chars = sum(len(text) for text in texts)
+        print(f"\n{count} 篇文档，共 {chars / 10000:.0f} 万字")
+        print(f"{'实现':<16} {'耗时':>8} {'万字/秒':>9} {'加速比':>7} {'结果一致':>8}")
+
+        expected, baseline = timed(legacy_counts, docs, stop_words)
+        print(f"{'原实现':<16} {baseline:>7.2f}s {chars / baseline / 10000:>9.1f} {1.0:>6.1f}x {'-':>8}")
+        for workers in workers_list:
+            if workers > 1:
+                # 预热：启动进程池并加载词典
+                _, warmup = timed(count_words, texts[:2000], stop_words, workers=workers, min_parallel_chars=0)
+            counts, seconds = timed(count_words, texts, stop_words, workers=workers, min_parallel_chars=0)
+            same = counts == expected and list(counts.most_common(20)) == list(expected.most_common(20))
+            label = f'分块 {workers} 进程' + (f'(启动{warmup:.1f}s)' if workers > 1 else '')
+            print(f"{label:<16} {seconds:>7.2f}s {chars / seconds / 10000:>9.1f} {baseline / seconds:>6.1f}x "
+                  f"{'是' if same else '否':>8}")
+            shutdown()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+scrape_many 并发抓取基准测试
+
+在本地模拟搜索服务器上测量不同并发度下的关键词吞吐量（关键词/秒）。
+--burst 模式模拟大量用户同时抓取少数热门关键词，对比直接抓取与
+SharedScraper（合并并发请求 + 共享TTL缓存）的上游请求数和p99延迟。
+
+用法:
+    python benchmark_scraper.py --keywords 100 --pages 2 --latency 0.05
+    python benchmark_scraper.py --burst 200 --latency 0.2
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.scraper import scrape_many, ScrapeEngine, SharedScraper
+from mock_search_server import start_mock_server
+
+
+def run_benchmark(base_url, keywords, pages, workers):
+    """以指定并发度抓取全部关键词，返回 (耗时, 结果条数)"""
+    start = time.perf_counter()
+    total_results = 0
+    for _, _, results in scrape_many(
+        keywords,
+        pages=pages,
+        max_workers=workers,
+        per_host_limit=workers,
+        search_url=f'{base_url}/s'
+    ):
+        total_results += len(results)
+    return time.perf_counter() - start, total_results
+
+
+def run_burst_benchmark(base_url, server, requests_count, popular_keywords=5, workers=32):
+    """模拟突发的热门关键词抓取，返回 直接抓取/共享抓取 两组结果"""
+    random.seed(0)
+    keywords = [f'热门{random.randint(1, popular_keywords)}' for _ in range(requests_count)]
+    engine = ScrapeEngine(max_workers=workers, per_host_limit=workers, search_url=f'{base_url}/s')
+    shared = SharedScraper(lambda keyword: engine.fetch_page(keyword), ttl=300)
+    report = {}
+    try:
+        for name, fetch in (('直接抓取', engine.fetch_page), ('合并+共享缓存', shared.get)):
+            def timed(keyword):
+                start = time.perf_counter()
+                fetch(keyword)
+                return time.perf_counter() - start
+
+            before = server.request_count
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                latencies = list(executor.map(timed, keywords))
+            report[name] = {
+                'upstream': server.request_count - before,
+                'p50': np.percentile(latencies, 50),
+                'p99': np.percentile(latencies, 99)
+            }
+    finally:
+        engine.close()
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='scrape_many 并发抓取基准测试')
+    parser.add_argument('--keywords', type=int, default=100, help='关键词数量')
+    parser.add_argument('--pages', type=int, default=2, help='每个关键词抓取页数')
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟服务器响应延迟（秒）')
+    parser.add_argument('--workers', default='1,2,4,8,16,32', help='逗号分隔的并发度列表')
+    parser.add_argument('--burst', type=int, default=0, help='突发请求数，大于0时运行热门关键词突发测试')
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(latency=args.latency)
+
+    if args.burst:
+        print(f"模拟服务器: {base_url}，{args.burst} 个并发请求集中在5个热门关键词，延迟 {args.latency}s")
+        print(f"{'模式':<12} {'上游请求数':>10} {'p50(ms)':>10} {'p99(ms)':>10}")
+        try:
+            for name, row in run_burst_benchmark(base_url, server, args.burst).items():
+                print(f"{name:<12} {row['upstream']:>10} {row['p50'] * 1000:>10.1f} {row['p99'] * 1000:>10.1f}")
+        finally:
+            server.shutdown()
+        raise SystemExit(0)
+
+    keywords = [f'关键词{i}' for i in range(args.keywords)]
+
+    print(f"模拟服务器: {base_url}，关键词 {args.keywords} 个，每个 {args.pages} 页，延迟 {args.latency}s")
+    print(f"{'并发度':>6} {'耗时(s)':>10} {'关键词/秒':>10} {'结果数':>8}")
+    try:
+        for workers in [int(w) for w in args.workers.split(',')]:
+            elapsed, total_results = run_benchmark(base_url, keywords, args.pages, workers)
+            print(f"{workers:>6} {elapsed:>10.2f} {args.keywords / elapsed:>10.1f} {total_results:>8}")
+    finally:
+        server.shutdown()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+数据仓库搜索基准测试：LIKE 全表扫描 vs FTS5 全文索引
+
+在临时 SQLite 数据库中生成指定行数（默认100万行）的已保存数据，建立 jieba 分词的 FTS5 索引，
+对比 /search_data 原先的 LIKE '%关键词%' 查询与 BM25 排序的全文检索的查询延迟。
+合成数据由有限的关键词和模板组合而成，相同文本的分词结果会被复用，以缩短建库时间。
+
+用法:
+    python benchmark_search.py --rows 1000000
+    python benchmark_search.py --rows 100000 --repeat 10
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from app.search_index import FTS_TABLE, BM25_WEIGHTS, build_match_query, owner_token, segment
+
+TOPICS = ['人工智能', '新能源汽车', '半导体', '区块链', '云计算', '大数据', '物联网', '生物医药',
+          '光伏发电', '量子计算', '机器人', '智慧城市', '跨境电商', '在线教育', '数字货币', '网络安全']
+TITLES = ['{kw} - 百度百科', '{kw} 最新新闻资讯', '{kw} 产品与解决方案', '{kw} 技术文档',
+          '{kw} 社区讨论', '{kw} 研究论文', '{kw} 市场分析报告', '{kw} 教程与指南']
+CONTENTS = ['关于{kw}的最新新闻报道，涵盖行业动态、技术发展和市场分析。',
+            '{kw}的官方技术文档，包括API参考、用户指南和安装说明。',
+            '{kw}的详细市场分析和预测，包括增长趋势和竞争格局。',
+            '展示{kw}成功实施和应用的真实案例研究。',
+            '学习和有效使用{kw}的分步教程和综合指南。']
+
+
+def build_database(path, rows, users, batch_size=10000):
+    """生成数据表和全文索引，返回 (连接, 建表耗时, 建索引耗时)"""
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute(
+        'CREATE TABLE scraped_data (id INTEGER PRIMARY KEY, keyword TEXT, title TEXT, content TEXT, '
+        'saved BOOLEAN, user_id INTEGER)'
+    )
+    conn.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content, keyword, owner, tokenize = 'unicode61')")
+    cached_segment = lru_cache(maxsize=None)(segment)
+
+    rng = random.Random(0)
+    load_seconds = index_seconds = 0.0
+    for start in range(0, rows, batch_size):
+        batch = []
+        for row_id in range(start + 1, min(start + batch_size, rows) + 1):
+            # 关键词带编号，使各关键词的命中数从多到少分布
+            keyword = f'{rng.choice(TOPICS)}{rng.randint(1, 200)}'
+            topic = keyword.rstrip('0123456789')
+            batch.append((row_id, keyword, rng.choice(TITLES).format(kw=topic),
+                          rng.choice(CONTENTS).format(kw=topic), rng.randint(1, users)))
+
+        t = time.perf_counter()
+        conn.executemany('INSERT INTO scraped_data VALUES (?, ?, ?, ?, 1, ?)', batch)
+        load_seconds += time.perf_counter() - t
+
+        t = time.perf_counter()
+        conn.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, content, keyword, owner) VALUES (?, ?, ?, ?, ?)',
+            [(row_id, cached_segment(title), cached_segment(content), cached_segment(keyword), owner_token(user_id))
+             for row_id, keyword, title, content, user_id in batch]
+        )
+        index_seconds += time.perf_counter() - t
+    conn.commit()
+    return conn, load_seconds, index_seconds
+
+
+def like_search(conn, user_id, query):
+    pattern = f'%{query}%'
+    return conn.execute(
+        'SELECT id FROM scraped_data WHERE saved = 1 AND user_id = ? '
+        'AND (title LIKE ? OR content LIKE ? OR keyword LIKE ?)',
+        (user_id, pattern, pattern, pattern)
+    ).fetchall()
+
+
+def fts_search(conn, user_id, query):
+    match = build_match_query(query)
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    return conn.execute(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? ORDER BY bm25({FTS_TABLE}, {weights})',
+        (f'owner:{owner_token(user_id)} AND ({match})',)
+    ).fetchall()
+
+
+def time_queries(search, conn, queries, repeat):
+    """返回每个查询的 (中位耗时ms, 命中数)"""
+    report = []
+    for query in queries:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits = search(conn, 1, query)
+            timings.append((time.perf_counter() - start) * 1000)
+        report.append((np.median(timings), len(hits)))
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='数据仓库搜索基准测试：LIKE vs FTS5')
+    parser.add_argument('--rows', type=int, default=1000000, help='数据行数')
+    parser.add_argument('--users', type=int, default=10, help='用户数（查询用户1的数据）')
+    parser.add_argument('--repeat', type=int, default=5, help='每个查询重复次数')
+    args = parser.parse_args()
+
+    queries = ['人工智能', '半导体市场分析', '量子计算 教程', '区块链技术文档', '不存在的词语']
+    workdir = tempfile.mkdtemp(prefix='search_bench_')
+    path = os.path.join(workdir, 'bench.db')
+    try:
+        print(f"生成 {args.rows} 行数据...")
+        conn, load_seconds, index_seconds = build_database(path, args.rows, args.users)
+        print(f"写入数据 {load_seconds:.1f}s，建立全文索引 {index_seconds:.1f}s，"
+              f"数据库大小 {os.path.getsize(path) / 1024 / 1024:.0f} MB")
+
+        like = time_queries(like_search, conn, queries, args.repeat)
+        fts = time_queries(fts_search, conn, queries, args.repeat)
+        print(f"{'查询':<14} {'LIKE(ms)':>10} {'命中':>8} {'FTS5(ms)':>10} {'命中':>8} {'加速比':>8}")
+        for query, (like_ms, like_hits), (fts_ms, fts_hits) in zip(queries, like, fts):
+            print(f"{query:<14} {like_ms:>10.1f} {like_hits:>8} {fts_ms:>10.1f} {fts_hits:>8} "
+                  f"{like_ms / max(fts_ms, 1e-3):>7.1f}x")
+        conn.close()
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
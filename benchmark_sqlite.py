@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SQLite 并发读写基准测试：默认参数 vs config.Config.SQLITE_PRAGMAS
+
+在临时数据库中预置数据后，同时运行若干写线程（每个事务插入一批抓取结果）
+和读线程（数据仓库首页查询），持续指定秒数，对比两种连接参数下的：
+- 写入吞吐量（行/秒）及提交延迟 p50/p99
+- 读取吞吐量（次/秒）及查询延迟 p50/p99
+- database is locked 错误数
+
+用法:
+    python benchmark_sqlite.py --seconds 10 --writers 4 --readers 8
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.sqlite_profile import set_pragmas
+from config import Config
+
+SCHEMA = (
+    'CREATE TABLE scraped_data (id INTEGER PRIMARY KEY, keyword VARCHAR(200), title VARCHAR(500), content TEXT, '
+    'url VARCHAR(500), source VARCHAR(100), created_at DATETIME, saved BOOLEAN, user_id INTEGER)',
+    'CREATE INDEX ix_scraped_data_user_saved_created ON scraped_data (user_id, saved, created_at)',
+)
+INSERT = ('INSERT INTO scraped_data (keyword, title, content, url, source, created_at, saved, user_id) '
+          'VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+READ = ('SELECT id, title, content, created_at FROM scraped_data WHERE user_id = ? AND saved = 1 '
+        'ORDER BY created_at DESC, id DESC LIMIT 50')
+
+
+def make_rows(count, offset=0):
+    now = datetime.utcnow()
+    return [(f'关键词{i % 100}', f'标题{i}', '这是一段用于测试的抓取结果摘要内容。' * 4, f'https://example.com/{i}',
+             '百度', now + timedelta(microseconds=i), i % 2, i % 10) for i in range(offset, offset + count)]
+
+
+def connect(path, pragmas):
+    # 与 SQLAlchemy 的 pysqlite 默认值一致：5秒锁等待
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+    if pragmas:
+        set_pragmas(conn, pragmas)
+    return conn
+
+
+def run_profile(path, pragmas, seconds, writers, readers, batch):
+    """运行一轮并发读写，返回统计字典"""
+    conn = connect(path, pragmas)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.executemany(INSERT, make_rows(50000))
+    conn.commit()
+    conn.close()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'write_latency': [], 'read_latency': [], 'rows': 0, 'reads': 0, 'locked': 0}
+
+    def writer(index):
+        conn = connect(path, pragmas)
+        offset = 1000000 * (index + 1)
+        while not stop.is_set():
+            rows = make_rows(batch, offset)
+            offset += batch
+            start = time.perf_counter()
+            try:
+                conn.executemany(INSERT, rows)
+                conn.commit()
+            except sqlite3.OperationalError:
+                conn.rollback()
+                with lock:
+                    stats['locked'] += 1
+                continue
+            with lock:
+                stats['write_latency'].append(time.perf_counter() - start)
+                stats['rows'] += batch
+        conn.close()
+
+    def reader(index):
+        conn = connect(path, pragmas)
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                conn.execute(READ, (index % 10,)).fetchall()
+            except sqlite3.OperationalError:
+                with lock:
+                    stats['locked'] += 1
+                continue
+            with lock:
+                stats['read_latency'].append(time.perf_counter() - start)
+                stats['reads'] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+def percentile_ms(values, q):
+    return np.percentile(values, q) * 1000 if values else float('nan')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SQLite 并发读写基准测试')
+    parser.add_argument('--seconds', type=float, default=10, help='每轮持续时间（秒）')
+    parser.add_argument('--writers', type=int, default=4, help='写线程数')
+    parser.add_argument('--readers', type=int, default=8, help='读线程数')
+    parser.add_argument('--batch', type=int, default=20, help='每个写事务插入的行数')
+    args = parser.parse_args()
+
+    profiles = [('SQLite默认', {}), ('SQLITE_PRAGMAS', Config.SQLITE_PRAGMAS)]
+    print(f"写线程 {args.writers}（每事务 {args.batch} 行），读线程 {args.readers}，每轮 {args.seconds}s")
+    print(f"{'参数':<16} {'写入行/秒':>10} {'提交p50':>9} {'提交p99':>9} {'读取次/秒':>10} "
+          f"{'读p50':>8} {'读p99':>8} {'锁错误':>6}")
+    for name, pragmas in profiles:
+        workdir = tempfile.mkdtemp(prefix='sqlite_bench_')
+        try:
+            stats = run_profile(os.path.join(workdir, 'bench.db'), pragmas, args.seconds,
+                                args.writers, args.readers, args.batch)
+        finally:
+            for filename in os.listdir(workdir):
+                os.remove(os.path.join(workdir, filename))
+            os.rmdir(workdir)
+        print(f"{name:<16} {stats['rows'] / args.seconds:>10.0f} "
+              f"{percentile_ms(stats['write_latency'], 50):>8.1f}ms {percentile_ms(stats['write_latency'], 99):>8.1f}ms "
+              f"{stats['reads'] / args.seconds:>10.0f} "
+              f"{percentile_ms(stats['read_latency'], 50):>6.2f}ms {percentile_ms(stats['read_latency'], 99):>6.2f}ms "
+              f"{stats['locked']:>6}")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+完整分析基准测试：加载全部数据后分析 vs 单遍流式分析（DataAnalyzer.perform_streaming_analysis）
+
+在临时 SQLite 数据库中为一个用户写入指定数量的已保存数据（含入库特征和词频，标题和正文从有限的集合中抽取，
+相同文本只分词一次），然后分别在独立的子进程中分析该用户的全部数据：
+- 列表：query.all() 加载全部 ORM 对象，再调用 perform_full_analysis
+- 流式：perform_streaming_analysis 在数据库中去重后用 yield_per 逐批读取，单遍完成全部统计
+对比耗时和子进程的峰值内存（RSS），并检查两种方式的统计结果一致。
+
+用法:
+    python benchmark_streaming.py --rows 100000 300000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import db, features
+from app.data_analyzer import DataAnalyzer
+from app.dedup import prepare_row, upsert_scraped_rows
+from app.migrations import migrate
+from app.models import ScrapedData
+from app.segmentation import STOP_WORDS, count_chunk
+from tests_support import make_app
+
+TOPICS = ['人工智能', '新能源汽车', '半导体', '区块链', '云计算', '大数据', '物联网', '生物医药',
+          '光伏发电', '量子计算', '机器人', '智慧城市', '跨境电商', '在线教育', '数字货币', '网络安全']
+SENTENCES = ['关于{kw}的最新新闻报道，涵盖行业动态、技术发展和市场分析。',
+             '{kw}的官方技术文档，包括API参考、用户指南和安装说明。',
+             '{kw}的详细市场分析和预测，包括增长趋势和竞争格局。',
+             '展示{kw}成功实施和应用的真实案例研究。',
+             '学习和有效使用{kw}的分步教程和综合指南。',
+             '专家认为{kw}在未来五年将保持高速增长，产业链上下游企业加快布局。']
+BATCH_SIZE = 5000
+YIELD_PER = 1000
+
+
+def build(path, count, rng):
+    titles = [f'{rng.choice(TOPICS)}行业观察第{i}期' for i in range(500)]
+    bodies = []
+    for _ in range(2000):
+        kw = rng.choice(TOPICS)
+        # 约5%的数据没有正文
+        bodies.append('' if rng.random() < 0.05 else
+                      ''.join(rng.choice(SENTENCES).format(kw=kw) for _ in range(rng.randint(2, 40))))
+    title_counts = {title: count_chunk([title], STOP_WORDS) for title in titles}
+    app = make_app(path)
+    with app.app_context():
+        migrate()
+        now = datetime.utcnow()
+        body_counts = {}
+        for offset in range(0, count, BATCH_SIZE):
+            rows = []
+            for i in range(offset, min(offset + BATCH_SIZE, count)):
+                rows.append(prepare_row({
+                    'keyword': '基准测试', 'title': rng.choice(titles), 'content': rng.choice(bodies),
+                    'url': f'https://example.com/{i}', 'source': rng.choice(['百度', '必应', '新闻', '']),
+                    'created_at': now - timedelta(hours=rng.randint(0, 24 * 10)), 'saved': True, 'user_id': 1
+                }))
+            upsert_scraped_rows(rows)
+            # 与保存数据时的分词结果相同：标题和分析用正文分别分词后相加（相同文本只分词一次）
+            counts = {}
+            for row_id, row in enumerate(rows, offset + 1):
+                content = features.analysis_content(row['title'], row['content'])
+                if content not in body_counts:
+                    body_counts[content] = count_chunk([content], STOP_WORDS)
+                counts[row_id] = title_counts[row['title']] + body_counts[content]
+            features.store_terms(counts)
+            db.session.commit()
+
+
+def child(path, mode):
+    """在子进程中执行一种分析方式，输出耗时、峰值内存和结果摘要"""
+    app = make_app(path)
+    with app.app_context():
+        analyzer = DataAnalyzer(workers=1)
+        query = ScrapedData.query.filter_by(user_id=1, saved=True).order_by(ScrapedData.id)
+        start = time.perf_counter()
+        if mode == 'list':
+            result = analyzer.perform_full_analysis(query.all())
+        else:
+            result = analyzer.perform_streaming_analysis(query, yield_per=YIELD_PER)
+        seconds = time.perf_counter() - start
+        summary = {key: result[key] for key in ('raw_count', 'cleaned_count', 'time_distribution',
+                                                'source_distribution', 'text_length_stats', 'insights')}
+        summary['keywords'] = result['keywords'].get('top_keywords_with_freq')
+        summary['key_summaries'] = [(item.title, item.content) for item in result['key_summaries']]
+        db.session.rollback()
+    print(json.dumps({'seconds': seconds, 'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                      'summary': summary}, ensure_ascii=False, default=float))
+
+
+def run_child(path, mode):
+    output = subprocess.run([sys.executable, __file__, '--child', mode, '--db', path],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='完整分析基准测试：列表 vs 流式')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 300000], help='已保存数据行数')
+    parser.add_argument('--child', choices=['list', 'stream'], help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.db, args.child)
+        sys.exit(0)
+
+    print(f"{'行数':>8} {'方式':>6} {'耗时':>8} {'峰值内存':>10} {'结果一致':>8}")
+    for count in args.rows:
+        workdir = tempfile.mkdtemp(prefix='streaming_bench_')
+        path = os.path.join(workdir, 'bench.db')
+        try:
+            build(path, count, random.Random(0))
+            results = {mode: run_child(path, mode) for mode in ('list', 'stream')}
+        finally:
+            for filename in os.listdir(workdir):
+                os.remove(os.path.join(workdir, filename))
+            os.rmdir(workdir)
+        same = results['list']['summary'] == results['stream']['summary']
+        for mode, label in (('list', '列表'), ('stream', '流式')):
+            result = results[mode]
+            print(f"{count:>8} {label:>6} {result['seconds']:>7.2f}s {result['maxrss'] / 1024:>8.0f}MB "
+                  f"{'是' if same else '否':>8}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+仓库关键词分析基准测试：分析全部已保存数据 vs 读取用户词频表（user_terms）
+
+在临时 SQLite 数据库中为一个用户分批保存指定数量的数据（与 save_data 相同：先分词，再在同一事务中
+更新保存状态并写入词频，由触发器增量维护用户词频表），然后对比用户全部已保存数据的关键词分析：
+- 重新分词：加载全部数据，对标题和正文分词（原实现）
+- 汇总词频：加载全部数据，汇总每条数据保存的词频（data_terms）
+- 用户词频表：DataAnalyzer.analyze_user_keywords，只读取前N个词
+同时给出保存数据时维护词频表的额外耗时，并检查三种方式的前N个关键词一致。
+
+用法:
+    python benchmark_user_terms.py --rows 10000 50000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from app import db, features
+from app.data_analyzer import DataAnalyzer
+from app.dedup import upsert_scraped_rows
+from app.migrations import migrate
+from app.models import ScrapedData
+from benchmark_features import Doc, make_rows
+from tests_support import make_app
+
+SAVE_BATCH = 100
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def save_all(ids):
+    """按 save_data 的方式分批保存，返回 (分词耗时, 写入耗时)"""
+    segment_seconds = write_seconds = 0.0
+    for start in range(0, len(ids), SAVE_BATCH):
+        batch = ids[start:start + SAVE_BATCH]
+        counts, seconds = timed(features.segment_rows, 1, batch)
+        segment_seconds += seconds
+        begin = time.perf_counter()
+        ScrapedData.query.filter(ScrapedData.id.in_(batch)).update({'saved': True}, synchronize_session=False)
+        features.store_terms(counts)
+        db.session.commit()
+        write_seconds += time.perf_counter() - begin
+    return segment_seconds, write_seconds
+
+
+def run(count, top_n):
+    workdir = tempfile.mkdtemp(prefix='user_terms_bench_')
+    app = make_app(os.path.join(workdir, 'bench.db'))
+    try:
+        with app.app_context():
+            migrate()
+            rows = [dict(row, saved=False) for row in make_rows(count, random.Random(0))]
+            upsert_scraped_rows(rows)
+            db.session.commit()
+            ids = [row_id for (row_id,) in db.session.query(ScrapedData.id).order_by(ScrapedData.id)]
+            segment_seconds, write_seconds = save_all(ids)
+            # 不维护用户词频表时的写入耗时（删除触发器后重新保存一遍）
+            db.session.execute(text("DROP TRIGGER trg_data_terms_user_insert"))
+            db.session.execute(text("DROP TRIGGER trg_scraped_data_user_terms_saved"))
+            db.session.execute(text("UPDATE scraped_data SET saved = 0, token_count = NULL"))
+            db.session.execute(text("DELETE FROM data_terms"))
+            db.session.commit()
+            _, plain_write_seconds = save_all(ids)
+
+            analyzer = DataAnalyzer(workers=1)
+            docs = [Doc(item) for item in ScrapedData.query.all()]
+            db.session.expunge_all()
+            resegment, resegment_seconds = timed(analyzer.analyze_keywords, docs, top_n)
+
+            def aggregate():
+                return analyzer.analyze_keywords(ScrapedData.query.filter_by(saved=True, user_id=1).all(), top_n)
+            stored, stored_seconds = timed(aggregate)
+            db.session.expunge_all()
+            indexed, indexed_seconds = timed(analyzer.analyze_user_keywords, 1, top_n)
+            same = (resegment['top_keywords_with_freq'] == stored['top_keywords_with_freq']
+                    == indexed['top_keywords_with_freq'])
+        print(f"{count:>8} {segment_seconds:>8.2f}s {plain_write_seconds:>8.2f}s {write_seconds:>8.2f}s "
+              f"{resegment_seconds:>9.2f}s {stored_seconds:>9.3f}s {indexed_seconds * 1000:>9.2f}ms {'是' if same else '否':>6}")
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        for filename in os.listdir(workdir):
+            os.remove(os.path.join(workdir, filename))
+        os.rmdir(workdir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='仓库关键词分析基准测试：全部数据 vs 用户词频表')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000], help='已保存数据行数')
+    parser.add_argument('--top', type=int, default=20, help='关键词个数')
+    args = parser.parse_args()
+
+    print(f"{'行数':>8} {'保存分词':>8} {'写入':>8} {'写入+词频表':>8} "
+          f"{'重新分词':>9} {'汇总词频':>9} {'用户词频表':>9} {'一致':>6}")
+    for count in args.rows:
+        run(count, args.top)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+写入基准测试：各线程自行提交 vs 单写线程合并提交（app/writer.py）
+
+在临时 SQLite 数据库（使用 config.Config.SQLITE_PRAGMAS）中，模拟突发的并发请求：
+若干线程同时写入，每次写操作插入少量抓取结果（相当于一次保存或一个小批次入库）。
+- 直接提交：每个线程使用自己的会话，写入后立即提交，写锁冲突时等待 busy_timeout
+- 写队列：每个线程把写操作交给 write_queue 并等待提交完成
+对比写操作吞吐量、单次写操作延迟 p50/p99、database is locked 错误数及平均每次提交合并的操作数。
+
+用法:
+    python benchmark_writer.py --seconds 10 --threads 32
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models import ScrapedData
+from app.sqlite_profile import apply_sqlite_profile
+from app.writer import WriteQueue
+from config import Config
+from tests_support import make_app as make_test_app
+
+
+def make_app(path, use_queue):
+    app = make_test_app(path, WRITE_QUEUE_ENABLED=use_queue)
+    with app.app_context():
+        apply_sqlite_profile(db.engine, Config.SQLITE_PRAGMAS)
+        db.create_all()
+    return app
+
+
+def insert_rows(thread_index, sequence, rows):
+    now = datetime.utcnow()
+    db.session.bulk_insert_mappings(ScrapedData, [{
+        'keyword': f'关键词{thread_index}',
+        'title': f'标题{thread_index}-{sequence}-{i}',
+        'content': '这是一段用于测试的抓取结果摘要内容。' * 4,
+        'url': f'https://example.com/{thread_index}/{sequence}/{i}',
+        'source': '百度',
+        'created_at': now,
+        'saved': False,
+        'user_id': thread_index % 10 + 1
+    } for i in range(rows)])
+
+
+def run_mode(use_queue, seconds, threads, rows):
+    workdir = tempfile.mkdtemp(prefix='writer_bench_')
+    writer = WriteQueue()
+    try:
+        app = make_app(os.path.join(workdir, 'bench.db'), use_queue)
+        writer.init_app(app)
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {'latency': [], 'ops': 0, 'locked': 0}
+
+        def worker(index):
+            sequence = 0
+            with app.app_context():
+                while not stop.is_set():
+                    sequence += 1
+                    start = time.perf_counter()
+                    try:
+                        if use_queue:
+                            writer.execute(insert_rows, index, sequence, rows)
+                        else:
+                            insert_rows(index, sequence, rows)
+                            db.session.commit()
+                    except OperationalError:
+                        db.session.rollback()
+                        with lock:
+                            stats['locked'] += 1
+                        continue
+                    with lock:
+                        stats['latency'].append(time.perf_counter() - start)
+                        stats['ops'] += 1
+                db.session.remove()
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for thread in workers:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in workers:
+            thread.join()
+        writer.stop()
+        with app.app_context():
+            db.engine.dispose()
+        stats['writer'] = writer.get_stats()
+        return stats
+    finally:
+        for filename in os.listdir(workdir):
+            os.remove(os.path.join(workdir, filename))
+        os.rmdir(workdir)
+
+
+def percentile_ms(values, q):
+    return np.percentile(values, q) * 1000 if values else float('nan')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='单写线程合并提交基准测试')
+    parser.add_argument('--seconds', type=float, default=10, help='每轮持续时间（秒）')
+    parser.add_argument('--threads', type=int, default=32, help='并发写线程数')
+    parser.add_argument('--rows', type=int, default=5, help='每个写操作插入的行数')
+    args = parser.parse_args()
+
+    print(f"并发写线程 {args.threads}，每个写操作 {args.rows} 行，每轮 {args.seconds}s")
+    print(f"{'模式':<10} {'写操作/秒':>10} {'行/秒':>9} {'p50':>9} {'p99':>9} {'锁错误':>6} {'操作/提交':>9}")
+    for name, use_queue in (('直接提交', False), ('写队列', True)):
+        stats = run_mode(use_queue, args.seconds, args.threads, args.rows)
+        per_commit = stats['writer']['ops_per_commit'] if use_queue else 1
+        print(f"{name:<10} {stats['ops'] / args.seconds:>10.0f} {stats['ops'] * args.rows / args.seconds:>9.0f} "
+              f"{percentile_ms(stats['latency'], 50):>7.1f}ms {percentile_ms(stats['latency'], 99):>7.1f}ms "
+              f"{stats['locked']:>6} {per_commit:>9}")
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+整理正文内容存储
+
+引用数由触发器维护，应用中删除数据时会随即删除无引用的正文；直接在数据库中删除数据等情况下
+残留的无引用正文由本脚本清理（content_store.collect_garbage），可选执行 VACUUM 回收磁盘空间。
+
+用法:
+    python compact_content_store.py
+    python compact_content_store.py --vacuum
+"""
+import argparse
+import os
+
+from app import create_app, db
+from app.content_store import collect_garbage
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='整理正文内容存储')
+    parser.add_argument('--vacuum', action='store_true', help='清理后执行 VACUUM，使数据库文件变小')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        removed = collect_garbage()
+        db.session.commit()
+        print(f"已删除 {removed} 条无引用的正文")
+
+        if args.vacuum:
+            path = db.engine.url.database
+            before = os.path.getsize(path)
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                conn.exec_driver_sql('VACUUM')
+            print(f"VACUUM 完成: {before / 1024 / 1024:.1f}MB -> {os.path.getsize(path) / 1024 / 1024:.1f}MB")
@@ -19,6 +19,21 @@ class Config:
     # 数据库配置
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app/data/app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite 连接参数（每个新连接执行一次，见 app/sqlite_profile.py），设为空字典则使用SQLite默认值
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',       # 读写并发，读不阻塞写、写不阻塞读
+        'synchronous': 'NORMAL',     # WAL模式下提交时不逐次fsync
+        'busy_timeout': 5000,        # 写锁被占用时最多等待5秒（毫秒）
+        'cache_size': -64000,        # 页缓存约64MB（负数表示KB）
+        'mmap_size': 256 * 1024 * 1024,  # 内存映射读取256MB
+        'temp_store': 'MEMORY',      # 排序等临时数据放在内存中
+    }
+    # 是否由单写线程合并提交写操作（见 app/writer.py），False 时各请求自行提交
+    WRITE_QUEUE_ENABLED = True
+    # 单次提交合并的最大写操作数
+    WRITE_GROUP_MAX_OPS = 256
+    # 取到第一个写操作后继续等待其他写操作的时间（秒），0表示只合并已积压的操作
+    WRITE_GROUP_DELAY = 0.0
     
     # 会话配置
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
@@ -30,6 +45,57 @@ class Config:
     # PDF生成配置
     PDF_FOLDER = 'app/pdfs'
     
+    # 正文内容存储：不小于该字节数的正文用 zlib 压缩保存（见 app/content_store.py），0 表示不压缩
+    CONTENT_COMPRESS_MIN_BYTES = 512
+    
+    # 报告关键词分析的分词进程数（见 app/segmentation.py），0 表示使用CPU核数，1 表示不使用多进程
+    ANALYSIS_WORKERS = 0
+    
+    # 数据仓库、搜索结果、报告列表每页显示的条数（滚动时继续加载）
+    PAGE_SIZE = 50
+    
+    # ====== 数据抓取配置 ======
+    
+    # 启用的数据源（见 app/sources.py），每次抓取并行请求所有数据源
+    # '百度网页' 经 HTTP 缓存和按主机限速器抓取真实页面；'百度' 为不访问网络的模拟数据，只用于离线演示
+    SCRAPE_SOURCES = ['百度网页']
+    # 百度网页搜索数据源的搜索地址
+    BAIDU_SEARCH_URL = 'https://www.baidu.com/s'
+    # 入库管道每批提交的行数
+    SCRAPE_BATCH_SIZE = 500
+    # 管道各阶段之间队列的最大长度（背压阈值）
+    SCRAPE_QUEUE_SIZE = 1000
+    # 批量抓取（batch_scrape.py）默认的并发抓取线程数，可用 --workers 覆盖
+    SCRAPE_FETCH_WORKERS = 8
+    # 后台抓取任务的工作线程数
+    SCRAPE_JOB_WORKERS = 4
+    # 是否抓取搜索结果原文并提取正文写入content
+    SCRAPE_FETCH_ARTICLES = False
+    # 正文抓取线程数及单页大小上限（字节）
+    ARTICLE_FETCH_WORKERS = 8
+    ARTICLE_MAX_BYTES = 2 * 1024 * 1024
+    # 按主机的自适应限速（见 app/scraper.py 的 HostRateLimiter），所有网页抓取共用：初始、最低、最高速率（次/秒）
+    SCRAPE_RATE_LIMIT_ENABLED = True
+    SCRAPE_RATE_INITIAL = 5.0
+    SCRAPE_RATE_MIN = 0.5
+    SCRAPE_RATE_MAX = 50.0
+    # 爬虫HTTP响应磁盘缓存（见 app/http_cache.py），目录为 None 时使用 app/data/http_cache
+    HTTP_CACHE_ENABLED = True
+    HTTP_CACHE_DIR = None
+    HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+    # 关键词抓取结果的共享缓存时间（秒），0表示只合并并发请求、不缓存
+    SCRAPE_RESULT_TTL = 300
+    # 是否启用入库去重的内存布隆过滤器（命中即跳过，存在 SCRAPE_BLOOM_ERROR_RATE 的误判率）
+    SCRAPE_DEDUP_BLOOM = False
+    SCRAPE_BLOOM_CAPACITY = 100000
+    SCRAPE_BLOOM_ERROR_RATE = 0.001
+    # 是否启动关键词定期重新抓取的调度线程
+    RECRAWL_ENABLED = False
+    # 新跟踪关键词的初始抓取间隔及间隔上下限（秒）
+    RECRAWL_INITIAL_INTERVAL = 3600
+    RECRAWL_MIN_INTERVAL = 300
+    RECRAWL_MAX_INTERVAL = 7 * 24 * 3600
+    
     # ====== 网络访问配置 ======
     
     # 主机配置 - '0.0.0.0' 允许所有网络接口访问
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬虫抓取引擎压测
+
+在本地模拟搜索服务器上以指定并发度抓取 关键词数 x 页数 个结果页，
+分别统计抓取（网络I/O + 解码）和解析（parse_baidu_results）的耗时，报告：
+- 抓取吞吐量（页/秒、MB/秒）与错误数
+- 抓取延迟 p50/p99
+- 每页解析耗时 平均/p99，以及解析在总耗时中的占比
+
+也可以用 --url 指向已运行的服务器（此时模拟参数无效）。
+
+用法:
+    python load_test_scraper.py --keywords 200 --pages 2 --workers 16 --latency 0.05
+    python load_test_scraper.py --error-rate 0.05 --page-encoding gbk --page-bytes 200000 --adaptive
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.scraper import ScrapeEngine, HostRateLimiter, parse_baidu_results
+from mock_search_server import start_mock_server
+
+
+class LoadStats:
+    """线程安全的压测计数"""
+
+    def __init__(self):
+        self.fetch_latencies = []
+        self.parse_seconds = []
+        self.bytes = 0
+        self.results = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record_page(self, fetch_seconds, parse_seconds, size, results):
+        with self._lock:
+            self.fetch_latencies.append(fetch_seconds)
+            self.parse_seconds.append(parse_seconds)
+            self.bytes += size
+            self.results += results
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+
+def run_load(search_url, keywords, pages, workers, adaptive=False):
+    """以 workers 并发抓取并解析全部页面，返回 (耗时, LoadStats)"""
+    engine = ScrapeEngine(
+        max_workers=workers,
+        per_host_limit=workers,
+        search_url=search_url,
+        rate_limiter=HostRateLimiter(initial_rate=workers * 10, max_rate=workers * 100) if adaptive else None
+    )
+    stats = LoadStats()
+
+    def task(keyword, page):
+        start = time.perf_counter()
+        try:
+            html = engine.fetch_html(keyword, page)
+        except Exception:
+            stats.record_error()
+            return
+        fetched_at = time.perf_counter()
+        results = parse_baidu_results(html)
+        stats.record_page(fetched_at - start, time.perf_counter() - fetched_at, len(html.encode('utf-8')), len(results))
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for keyword in keywords:
+                for page in range(pages):
+                    executor.submit(task, keyword, page)
+    finally:
+        engine.close()
+    return time.perf_counter() - start, stats
+
+
+def print_report(elapsed, stats, server=None):
+    pages = len(stats.fetch_latencies)
+    fetch_ms = np.array(stats.fetch_latencies) * 1000 if pages else np.zeros(1)
+    parse_ms = np.array(stats.parse_seconds) * 1000 if pages else np.zeros(1)
+    print(f"页面: 成功 {pages}，失败 {stats.errors}，结果 {stats.results} 条，耗时 {elapsed:.2f}s")
+    print(f"吞吐量: {pages / elapsed:.1f} 页/秒，{stats.bytes / elapsed / 1024 / 1024:.2f} MB/秒")
+    print(f"抓取延迟(ms): p50 {np.percentile(fetch_ms, 50):.1f}  p99 {np.percentile(fetch_ms, 99):.1f}  "
+          f"max {fetch_ms.max():.1f}")
+    print(f"解析耗时(ms/页): 平均 {parse_ms.mean():.2f}  p99 {np.percentile(parse_ms, 99):.2f}  "
+          f"占单页总耗时 {parse_ms.sum() / max(fetch_ms.sum() + parse_ms.sum(), 1e-9) * 100:.1f}%")
+    if server is not None:
+        print(f"服务器: 请求 {server.request_count}，限流 {server.throttled_count}，注入错误 {server.error_count}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='爬虫抓取引擎压测')
+    parser.add_argument('--keywords', type=int, default=100, help='关键词数量')
+    parser.add_argument('--pages', type=int, default=2, help='每个关键词抓取页数')
+    parser.add_argument('--workers', type=int, default=16, help='并发度')
+    parser.add_argument('--adaptive', action='store_true', help='启用 HostRateLimiter 自适应限速与重试')
+    parser.add_argument('--url', default=None, help='已运行的搜索服务器地址（如 http://127.0.0.1:8090/s），不指定时启动内置模拟服务器')
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟服务器响应延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='随机增加的最大延迟（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='模拟服务器随机返回500的概率')
+    parser.add_argument('--throttle-rps', type=float, default=0.0, help='模拟服务器限流阈值（次/秒）')
+    parser.add_argument('--results-per-page', type=int, default=10, help='每页结果数')
+    parser.add_argument('--page-bytes', type=int, default=0, help='结果页大小（字节）')
+    parser.add_argument('--page-encoding', default='utf-8', help='结果页编码')
+    args = parser.parse_args()
+
+    keywords = [f'关键词{i}' for i in range(args.keywords)]
+    server = None
+    search_url = args.url
+    if search_url is None:
+        server, base_url = start_mock_server(
+            latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+            throttle_rps=args.throttle_rps, results_per_page=args.results_per_page,
+            page_bytes=args.page_bytes, page_encoding=args.page_encoding, seed=0
+        )
+        search_url = f'{base_url}/s'
+
+    print(f"目标: {search_url}，{args.keywords} 个关键词 x {args.pages} 页，并发 {args.workers}")
+    try:
+        elapsed, stats = run_load(search_url, keywords, args.pages, args.workers, args.adaptive)
+        print_report(elapsed, stats, server)
+    finally:
+        if server is not None:
+            server.shutdown()
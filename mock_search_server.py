@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地模拟搜索引擎服务器
+
+提供类似百度的搜索结果页 /s?wd=关键词&pn=偏移量，以及结果指向的文章页
+/article/<序号>?wd=关键词（带导航、页脚等样板内容，可选 UTF-8/GBK 编码），
+用于在本地评估爬虫性能，避免直接请求真实搜索引擎。
+可配置响应延迟及抖动、随机错误率、服务端限流、每页结果数、页面大小以及结果页/文章页编码。
+
+用法:
+    python mock_search_server.py --port 8090 --latency 0.05
+    python mock_search_server.py --latency 0.1 --jitter 0.05 --error-rate 0.02 --page-encoding gbk --page-bytes 100000
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+
+
+class MockSearchHandler(BaseHTTPRequestHandler):
+    """模拟搜索请求处理器，配置通过 server 属性传入"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # 压测时不输出访问日志
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.startswith('/article/'):
+            self.serve_article(parsed)
+            return
+        if parsed.path != '/s':
+            self.send_error(404)
+            return
+
+        query = parse_qs(parsed.query)
+        keyword = query.get('wd', [''])[0]
+        offset = int(query.get('pn', ['0'])[0] or 0)
+
+        # 超出限流阈值时返回429
+        if not self.server.allow_request():
+            self.send_response(429)
+            if self.server.retry_after:
+                self.send_header('Retry-After', str(self.server.retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.server.simulate_latency()
+
+        # 按错误率随机返回500
+        if self.server.should_fail():
+            self.send_error(500)
+            return
+
+        base_url = f"http://{self.headers.get('Host', '127.0.0.1')}"
+        encoding = self.server.page_encoding
+        body = render_results_page(keyword, offset, self.server.results_per_page, base_url,
+                                   encoding, self.server.page_bytes).encode(encoding)
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        self.server.record_request()
+
+        # 支持条件请求，页面未变化时返回304
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', f'max-age={self.server.max_age}')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', f'text/html; charset={encoding}')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', f'max-age={self.server.max_age}')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def serve_article(self, parsed):
+        """文章页：编码只在 meta 中声明，用于检验编码识别"""
+        try:
+            index = int(parsed.path.rsplit('/', 1)[-1])
+        except ValueError:
+            self.send_error(404)
+            return
+        keyword = parse_qs(parsed.query).get('wd', [''])[0]
+        self.server.simulate_latency()
+        if self.server.should_fail():
+            self.send_error(500)
+            return
+        self.server.record_request()
+
+        encoding = self.server.article_encoding
+        body = render_article_page(keyword, index, self.server.article_paragraphs, encoding).encode(encoding)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def render_results_page(keyword, offset, results_per_page=10, base_url='https://example.com',
+                        encoding='utf-8', page_bytes=0):
+    """
+    生成一页类百度搜索结果HTML
+
+    page_bytes 大于0时在页面中补充脚本、样式等样板内容，使页面接近该大小（按UTF-8估算）。
+    """
+    items = []
+    for i in range(offset, offset + results_per_page):
+        title = escape(f'{keyword} 相关结果 {i + 1}')
+        abstract = escape(f'这是关于{keyword}的第{i + 1}条搜索结果摘要，包含行业动态和技术分析。')
+        url = f'{base_url}/article/{i + 1}?wd={quote(keyword)}'
+        items.append(
+            f'<div class="result c-container" id="{i + 1}">'
+            f'<h3 class="t"><a href="{url}">{title}</a></h3>'
+            f'<div class="c-abstract">{abstract}</div>'
+            f'</div>'
+        )
+    page = (
+        f'<!DOCTYPE html><html><head><meta charset="{encoding}">'
+        f'<title>{escape(keyword)}_百度搜索</title>{{padding}}</head>'
+        f'<body><div id="content_left">{"".join(items)}</div></body></html>'
+    )
+    padding = ''
+    missing = page_bytes - len(page.encode('utf-8'))
+    if missing > 0:
+        filler = '.c-container{margin:0 0 14px;padding:0;font-size:13px;line-height:1.54}\n'
+        padding = '<style>' + filler * (missing // len(filler) + 1) + '</style>'
+    return page.replace('{padding}', padding)
+
+
+def render_article_page(keyword, index, paragraphs=8, encoding='utf-8'):
+    """生成带样板内容（导航、推荐链接、页脚）的文章页HTML"""
+    nav = ''.join(f'<li><a href="/channel/{n}">频道{n}</a></li>' for n in range(1, 11))
+    related = ''.join(f'<li><a href="/article/{n}?wd={quote(keyword)}">{escape(keyword)} 相关阅读 {n}</a></li>'
+                      for n in range(1, 8))
+    body = ''.join(
+        f'<p>{escape(keyword)}第{index}篇正文第{n + 1}段：随着技术不断发展，{escape(keyword)}在各行业的应用日益广泛，'
+        f'相关企业持续加大研发投入，市场规模稳步增长，产业链上下游协同效应逐步显现。</p>'
+        for n in range(paragraphs)
+    )
+    return (
+        f'<!DOCTYPE html><html><head><meta charset="{encoding}">'
+        f'<title>{escape(keyword)} 相关结果 {index}</title>'
+        '<script>var tracker = {page: "article"};</script><style>body{margin:0}</style></head><body>'
+        f'<div class="header"><ul class="nav">{nav}</ul></div>'
+        f'<div class="main"><h1>{escape(keyword)} 相关结果 {index}</h1>'
+        f'<div class="article">{body}</div></div>'
+        f'<div class="sidebar"><h3>相关阅读</h3><ul>{related}</ul></div>'
+        '<div class="footer"><p>版权所有 &copy; 模拟站点</p><a href="/about">关于我们</a></div>'
+        '</body></html>'
+    )
+
+
+class MockSearchServer(ThreadingHTTPServer):
+    """
+    带请求计数的多线程模拟服务器
+
+    throttle_rps 大于0时模拟服务端限流：超过该速率（允许约0.2秒的突发）的请求返回429，
+    retry_after 不为空时随429返回 Retry-After 头。
+    jitter 为在 latency 基础上随机增加的最大延迟（秒），error_rate 为随机返回500的概率，
+    page_encoding / page_bytes 控制结果页的编码和大小，seed 固定随机序列便于复现。
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, results_per_page=10, max_age=0,
+                 throttle_rps=0.0, retry_after=None, article_encoding='utf-8', article_paragraphs=8,
+                 jitter=0.0, error_rate=0.0, page_encoding='utf-8', page_bytes=0, seed=None):
+        super().__init__(address, MockSearchHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.page_encoding = page_encoding
+        self.page_bytes = page_bytes
+        self.results_per_page = results_per_page
+        self.max_age = max_age
+        self.article_encoding = article_encoding
+        self.article_paragraphs = article_paragraphs
+        self.throttle_rps = throttle_rps
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.throttled_count = 0
+        self.error_count = 0
+        self._count_lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._capacity = max(1.0, throttle_rps * 0.2)
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+
+    def record_request(self):
+        with self._count_lock:
+            self.request_count += 1
+
+    def simulate_latency(self):
+        delay = self.latency
+        if self.jitter:
+            with self._count_lock:
+                delay += self._random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def should_fail(self):
+        """按 error_rate 判断本次请求是否返回500"""
+        if not self.error_rate:
+            return False
+        with self._count_lock:
+            if self._random.random() < self.error_rate:
+                self.error_count += 1
+                return True
+            return False
+
+    def allow_request(self):
+        """服务端令牌桶，判断当前请求是否在限流阈值内"""
+        if not self.throttle_rps:
+            return True
+        with self._count_lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self.throttle_rps)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.throttled_count += 1
+            return False
+
+
+def start_mock_server(host='127.0.0.1', port=0, latency=0.0, results_per_page=10, max_age=0,
+                      throttle_rps=0.0, retry_after=None, article_encoding='utf-8', article_paragraphs=8,
+                      jitter=0.0, error_rate=0.0, page_encoding='utf-8', page_bytes=0, seed=None):
+    """
+    在后台线程启动模拟服务器
+
+    port 为 0 时自动分配端口，返回 (server, base_url)，
+    使用完毕后调用 server.shutdown() 关闭。
+    max_age 为响应 Cache-Control 中的 max-age（秒）；throttle_rps 为服务端限流阈值（次/秒）；
+    article_encoding / article_paragraphs 控制文章页的编码和正文段落数；
+    jitter、error_rate、page_encoding、page_bytes、seed 见 MockSearchServer。
+    """
+    server = MockSearchServer((host, port), latency, results_per_page, max_age,
+                              throttle_rps, retry_after, article_encoding, article_paragraphs,
+                              jitter, error_rate, page_encoding, page_bytes, seed)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f'http://{host}:{server.server_address[1]}'
+    return server, base_url
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='本地模拟搜索引擎服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.05, help='每个请求的模拟延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='在延迟基础上随机增加的最大延迟（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='随机返回500的概率（0~1）')
+    parser.add_argument('--results-per-page', type=int, default=10, help='每页结果数')
+    parser.add_argument('--page-bytes', type=int, default=0, help='结果页大小（字节），0表示不填充')
+    parser.add_argument('--page-encoding', default='utf-8', help='结果页编码，如 utf-8、gbk')
+    parser.add_argument('--max-age', type=int, default=0, help='响应的 Cache-Control max-age（秒）')
+    parser.add_argument('--throttle-rps', type=float, default=0.0, help='服务端限流阈值（次/秒），0表示不限流')
+    parser.add_argument('--retry-after', type=int, default=None, help='429响应的 Retry-After（秒）')
+    parser.add_argument('--article-encoding', default='utf-8', help='文章页编码，如 utf-8、gbk、gb18030')
+    parser.add_argument('--article-paragraphs', type=int, default=8, help='文章页正文段落数')
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.host, args.port, args.latency,
+                                         results_per_page=args.results_per_page, max_age=args.max_age,
+                                         throttle_rps=args.throttle_rps, retry_after=args.retry_after,
+                                         article_encoding=args.article_encoding,
+                                         article_paragraphs=args.article_paragraphs,
+                                         jitter=args.jitter, error_rate=args.error_rate,
+                                         page_encoding=args.page_encoding, page_bytes=args.page_bytes)
+    print(f"模拟搜索服务器运行在 {base_url}/s?wd=关键词")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试正文内容寻址存储
+
+在临时 SQLite 数据库中验证：相同的正文只保存一份并由触发器维护引用数，
+ORM 读取时自动解压，删除行后无引用的正文可被清理。
+"""
+from sqlalchemy import text
+
+from app import content_store, db
+from app.dedup import prepare_row, upsert_scraped_rows
+from app.models import ScrapedData
+from tests_support import temp_app
+
+LONG_BODY = '内容寻址存储测试的长正文，' * 200
+
+
+def insert_rows(user_id, bodies):
+    upsert_scraped_rows([prepare_row({
+        'keyword': '存储', 'title': f'存储测试{i}', 'content': body, 'url': f'https://example.com/{user_id}/{i}',
+        'source': '百度', 'saved': False, 'user_id': user_id
+    }) for i, body in enumerate(bodies)])
+    db.session.commit()
+
+
+def blobs():
+    return {row[0]: (row[1], bool(row[2])) for row in db.session.execute(text(
+        f"SELECT hash, refcount, compressed FROM {content_store.BLOB_TABLE}"
+    ))}
+
+
+def test_identical_bodies_stored_once():
+    """相同正文只保存一份，长正文压缩保存，ORM 读取到原文"""
+    with temp_app():
+        insert_rows(1, [LONG_BODY, LONG_BODY, '短正文'])
+        insert_rows(2, [LONG_BODY])
+        stored = blobs()
+        long_hash = content_store.encode_body(LONG_BODY)[0]
+        assert len(stored) == 2
+        assert stored[long_hash] == (3, True)
+        db.session.expunge_all()
+        assert [item.content for item in ScrapedData.query.order_by(ScrapedData.id)] == \
+            [LONG_BODY, LONG_BODY, '短正文', LONG_BODY]
+        assert db.session.execute(text("SELECT COUNT(*) FROM scraped_data WHERE content IS NOT NULL")).scalar() == 0
+
+
+def test_refcount_follows_deletes():
+    """删除行后引用数随之减少，无引用的正文由 purge_unreferenced / collect_garbage 删除"""
+    with temp_app():
+        insert_rows(1, [LONG_BODY, LONG_BODY, '短正文'])
+        long_hash = content_store.encode_body(LONG_BODY)[0]
+        short_hash = content_store.encode_body('短正文')[0]
+        ScrapedData.query.filter(ScrapedData.title.in_(['存储测试0', '存储测试2'])).delete(synchronize_session=False)
+        db.session.commit()
+        assert blobs() == {long_hash: (1, True), short_hash: (0, False)}
+        assert content_store.purge_unreferenced([long_hash]) == 0
+        assert content_store.collect_garbage() == 1
+        db.session.commit()
+        assert set(blobs()) == {long_hash}
+
+
+if __name__ == '__main__':
+    print("测试1: 相同正文只保存一份")
+    test_identical_bodies_stored_once()
+    print("\n测试2: 引用计数与清理")
+    test_refcount_follows_deletes()
+    print("\n✅ 内容存储测试通过")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试数据分析的不同执行方式
+
+在临时 SQLite 数据库中写入一批数据（含无效数据、缺失来源和正文、已分词和未分词的数据），
+验证流式分析（perform_streaming_analysis）、列式分析（ColumnarAnalyzer.perform_columnar_analysis）
+与加载全部数据后分析（perform_full_analysis）的结果一致；
+使用入库时保存的长度时，未清洗和清洗后数据的文本长度统计与逐条计算相同。
+"""
+import random
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import db, features
+from app.columnar import ColumnarAnalyzer
+from app.data_analyzer import DataAnalyzer
+from app.dedup import prepare_row, upsert_scraped_rows
+from app.models import ScrapedData
+from tests_support import temp_app
+
+TOPICS = ['人工智能', '新能源汽车', '半导体', '区块链', '云计算', '大数据']
+SENTENCES = ['关于{kw}的最新新闻报道，涵盖行业动态、技术发展和市场分析。',
+             '{kw}的详细市场分析和预测，包括增长趋势和竞争格局。',
+             '学习和有效使用{kw}的分步教程和综合指南。']
+
+
+def make_row(rng, user_id, title, url, now):
+    return prepare_row({
+        'keyword': '分析测试', 'title': title, 'url': url,
+        'content': '' if rng.random() < 0.1 else
+        ''.join(rng.choice(SENTENCES).format(kw=rng.choice(TOPICS)) for _ in range(rng.randint(1, 8))),
+        'source': rng.choice(['百度', '必应', '新闻', '']),
+        'created_at': now - timedelta(hours=rng.randint(0, 24 * 10)), 'saved': True, 'user_id': user_id
+    })
+
+
+def build(count=400, seed=0):
+    """
+    用户1：标题互不相同（没有重复数据）；用户2：部分数据与前面的数据标题、URL、来源相同而正文不同（重复数据）
+    两个用户都有标题过短、既没有正文也没有URL的无效数据，约一半的数据保存时已分词
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        title = f'{rng.choice(TOPICS)}行业观察第{i}期' if i % 20 else '短标题'
+        rows.append(make_row(rng, 1, title, '' if i % 25 == 0 else f'https://example.com/1/{i}', now))
+    for i in range(count):
+        j = rng.randrange(i) if i and i % 5 == 0 else i
+        row = make_row(rng, 2, f'{TOPICS[j % len(TOPICS)]}专题报道第{j}期', f'https://example.com/2/{j}', now)
+        row['source'] = '百度'
+        rows.append(row)
+    upsert_scraped_rows(rows)
+    ids = [row_id for (row_id,) in db.session.query(ScrapedData.id).order_by(ScrapedData.id)]
+    for user_id in (1, 2):
+        user_ids = [row_id for (row_id,) in db.session.query(ScrapedData.id).filter_by(user_id=user_id)]
+        features.store_terms(features.segment_rows(user_id, user_ids[::2]))
+    db.session.commit()
+    return ids
+
+
+def summarize(result):
+    """分析结果中用于比较的部分（内容摘要按标题和正文比较）"""
+    summary = {key: result[key] for key in ('raw_count', 'cleaned_count', 'time_distribution',
+                                            'source_distribution', 'text_length_stats', 'insights')}
+    summary['keywords'] = result['keywords'].get('top_keywords_with_freq')
+    summary['keyword_report'] = result['keywords'].get('keyword_report')
+    summary['key_summaries'] = [(item.title, item.content) for item in result['key_summaries']]
+    return summary
+
+
+def full_analysis(query):
+    result = summarize(DataAnalyzer(workers=1).perform_full_analysis(query.all()))
+    # perform_full_analysis 会补全数据对象的字段，比较后丢弃这些修改
+    db.session.rollback()
+    return result
+
+
+def run_in_app(check):
+    with temp_app():
+        build()
+        check()
+
+
+def user_query(user_id):
+    return ScrapedData.query.filter_by(user_id=user_id, saved=True).order_by(ScrapedData.id)
+
+
+def test_streaming_matches_full_analysis():
+    """按ID排序时流式分析（在数据库中去重）与全部加载后分析的结果相同，包括重复数据（都保留最后一条）"""
+    def check():
+        for query in (user_query(1), user_query(2)):
+            streamed = summarize(DataAnalyzer(workers=1).perform_streaming_analysis(query, yield_per=50))
+            db.session.rollback()
+            expected = full_analysis(query)
+            print(f"原始 {expected['raw_count']} 条，清洗后 {expected['cleaned_count']} 条")
+            assert 0 < expected['cleaned_count'] < expected['raw_count']
+            assert expected['keywords']
+            assert streamed == expected
+        # 缺少去重键的数据在内存中去重
+        db.session.execute(text("UPDATE scraped_data SET dedup_key = NULL WHERE user_id = 1 AND id % 7 = 0"))
+        db.session.commit()
+        streamed = summarize(DataAnalyzer(workers=1).perform_streaming_analysis(user_query(1), yield_per=50))
+        db.session.rollback()
+        assert streamed == full_analysis(user_query(1))
+    run_in_app(check)
+
+
+def test_streaming_empty_query():
+    def check():
+        result = DataAnalyzer(workers=1).perform_streaming_analysis(user_query(999), yield_per=50)
+        assert result['raw_count'] == result['cleaned_count'] == 0
+        assert result['keywords'] == {'top_keywords': [], 'keyword_report': '暂无数据'}
+    run_in_app(check)
+
+
+def test_columnar_matches_full_analysis():
+    """列式分析与全部加载后分析的结果相同，包括重复数据（都保留最后一条）和缺少入库特征的数据"""
+    def check():
+        # 模拟迁移前写入、未补算特征的数据，由列式分析逐条补算
+        db.session.execute(text("UPDATE scraped_data SET title_length = NULL, dedup_key = NULL WHERE id % 7 = 0"))
+        db.session.commit()
+        analyzer = ColumnarAnalyzer(workers=1)
+        for query in (user_query(1), user_query(2), ScrapedData.query.order_by(ScrapedData.created_at.desc())):
+            columnar = summarize(analyzer.perform_columnar_analysis(query))
+            db.session.rollback()
+            expected = full_analysis(query)
+            print(f"原始 {expected['raw_count']} 条，清洗后 {expected['cleaned_count']} 条")
+            assert columnar == expected
+        assert summarize(analyzer.perform_columnar_analysis(user_query(2)))['cleaned_count'] < user_query(2).count()
+    run_in_app(check)
+
+
+def test_columnar_empty_query():
+    def check():
+        result = ColumnarAnalyzer(workers=1).perform_columnar_analysis(user_query(999))
+        assert result['raw_count'] == result['cleaned_count'] == 0
+        assert result['text_length_stats'] == {'title_stats': None, 'content_stats': None}
+        assert result['key_summaries'] == []
+    run_in_app(check)
+
+
+def test_text_length_uses_raw_content_length():
+    """没有正文的数据保存的长度为0，未清洗时长度统计不计代替文本，清洗后与逐条计算相同"""
+    with temp_app():
+        now = datetime.utcnow()
+        upsert_scraped_rows([prepare_row({
+            'keyword': '长度', 'title': f'文本长度测试第{i}条', 'content': '' if i % 2 else '正文内容' * (i + 3),
+            'url': f'https://example.com/{i}', 'source': '百度', 'created_at': now, 'saved': True, 'user_id': 1
+        }) for i in range(6)])
+        db.session.commit()
+        items = user_query(1).all()
+        assert [item.content_length for item in items][1::2] == [0, 0, 0]
+        analyzer = DataAnalyzer(workers=1)
+        plain = [SimpleNamespace(title=item.title, content=item.content, url=item.url, source=item.source)
+                 for item in items]
+        assert analyzer.analyze_text_length(items) == analyzer.analyze_text_length(plain)
+        assert analyzer.analyze_text_length(items[1::2])['content_stats'] is None
+        cleaned = analyzer.analyze_text_length(analyzer.clean_data(items))
+        assert cleaned == analyzer.analyze_text_length(analyzer.clean_data(plain))
+        print(f"清洗后正文长度: {cleaned['content_stats']}")
+        db.session.rollback()
+
+
+if __name__ == '__main__':
+    print("测试1: 流式分析与全部加载后分析一致")
+    test_streaming_matches_full_analysis()
+    print("\n测试2: 流式分析空数据")
+    test_streaming_empty_query()
+    print("\n测试3: 列式分析与全部加载后分析一致")
+    test_columnar_matches_full_analysis()
+    print("\n测试4: 列式分析空数据")
+    test_columnar_empty_query()
+    print("\n测试5: 按原始正文长度统计")
+    test_text_length_uses_raw_content_length()
+    print("\n✅ 数据分析测试通过")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试入库去重
+
+在临时 SQLite 数据库中验证：同一条数据（包括URL写法不同的同一页面）重复入库只保存一行，
+入库管道重复抓取同一关键词不会重复写入，去重窗口之外的重复条目由唯一索引忽略。
+"""
+from app import db
+from app.dedup import canonicalize_url, prepare_row, upsert_scraped_rows
+from app.ingest import IngestPipeline
+from app.models import ScrapedData
+from tests_support import temp_app
+
+RESULTS = [{'title': f'去重测试结果{i}', 'content': f'第{i}条结果的摘要内容', 'url': f'https://example.com/news/{i}'}
+           for i in range(5)]
+
+
+def make_row(url, user_id=1):
+    return prepare_row({'keyword': '去重', 'title': '同一条新闻', 'content': '新闻摘要', 'url': url,
+                        'source': '百度', 'saved': False, 'user_id': user_id})
+
+
+def test_canonicalize_url():
+    """大小写、默认端口、片段、跟踪参数和参数顺序不同的URL规范化后相同"""
+    assert canonicalize_url('HTTPS://Example.com:443/a/?b=2&a=1&utm_source=x#top') == 'https://example.com/a?a=1&b=2'
+    assert canonicalize_url('https://example.com/a?a=1&b=2&spm=abc') == 'https://example.com/a?a=1&b=2'
+    # 可能决定页面内容的参数保留
+    assert canonicalize_url('https://example.com/a?from=news&ref=1') == 'https://example.com/a?from=news&ref=1'
+    assert canonicalize_url('https://example.com/a?source=a') != canonicalize_url('https://example.com/a?source=b')
+
+
+def test_same_row_ingested_twice():
+    """同一条数据入库两次只保存一行，不同用户各自保存一行"""
+    with temp_app():
+        assert upsert_scraped_rows([make_row('https://example.com/a?x=1')]) == 1
+        assert upsert_scraped_rows([make_row('https://EXAMPLE.com/a/?x=1&utm_medium=feed#p')]) == 0
+        assert upsert_scraped_rows([make_row('https://example.com/a?x=1', user_id=2)]) == 1
+        db.session.commit()
+        assert ScrapedData.query.filter_by(user_id=1).count() == 1
+        assert ScrapedData.query.count() == 2
+
+
+def test_pipeline_rescrape_inserts_once():
+    """重复抓取同一关键词（每页结果相同）只写入一次，去重窗口很小时由唯一索引兜底"""
+    with temp_app() as app:
+        def fetcher(keyword, page):
+            return RESULTS
+
+        for _ in range(2):
+            pipeline = IngestPipeline(app, 1, fetcher=fetcher, parser=None, batch_size=2, dedup_window=1)
+            pipeline.run(['去重'], pages=3)
+            assert not pipeline.errors
+        assert ScrapedData.query.filter_by(user_id=1).count() == len(RESULTS)
+
+
+if __name__ == '__main__':
+    print("测试1: URL规范化")
+    test_canonicalize_url()
+    print("\n测试2: 同一条数据重复入库")
+    test_same_row_ingested_twice()
+    print("\n测试3: 入库管道重复抓取")
+    test_pipeline_rescrape_inserts_once()
+    print("\n✅ 入库去重测试通过")
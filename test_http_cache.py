@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试爬虫HTTP响应磁盘缓存
+
+使用本地模拟搜索服务器（带 ETag 和 Cache-Control），验证网页数据源挂载缓存后：
+新鲜期内直接命中缓存，过期后用条件请求重新验证，304时返回缓存的页面内容；
+写入不留下临时文件，与元数据不匹配的响应体不会被当作命中返回。
+"""
+import os
+import tempfile
+
+from flask import Flask
+
+from app.http_cache import HttpCache, init_http_cache
+from app.sources import BaiduWebSource
+from mock_search_server import start_mock_server
+
+
+def test_revalidation_returns_cached_body():
+    """max-age=0 时每次都重新验证，页面未变化返回304，结果与首次抓取相同"""
+    server, base_url = start_mock_server(max_age=0)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = HttpCache(cache_dir)
+        source = BaiduWebSource({'BAIDU_SEARCH_URL': f'{base_url}/s'}, cache=cache)
+        try:
+            first = source.engine._fetch_response('缓存测试')
+            second = source.engine._fetch_response('缓存测试')
+            results = source.search('缓存测试')
+        finally:
+            source.close()
+            server.shutdown()
+        stats = cache.stats()
+    print(f"缓存统计: {stats}")
+    assert first.cache_status == 'miss'
+    assert second.cache_status == 'revalidated'
+    assert second.text == first.text
+    assert len(results) == 10
+    assert stats['misses'] == 1
+    assert stats['revalidated'] == 2
+    assert stats['bytes_downloaded'] == len(first.content)
+    assert server.request_count == 3
+
+
+def test_fresh_entry_skips_network():
+    """新鲜期内的请求直接由缓存返回，不访问服务器"""
+    server, base_url = start_mock_server(max_age=60)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = HttpCache(cache_dir)
+        source = BaiduWebSource({'BAIDU_SEARCH_URL': f'{base_url}/s'}, cache=cache)
+        try:
+            source.search('新鲜期测试')
+            response = source.engine._fetch_response('新鲜期测试')
+        finally:
+            source.close()
+            server.shutdown()
+    assert response.cache_status == 'hit'
+    assert server.request_count == 1
+
+
+def test_mismatched_body_not_served():
+    """响应体与元数据记录的大小不一致（如写入中断）时视为未缓存并删除条目"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = HttpCache(cache_dir)
+        url = 'https://example.com/page'
+        cache.put(url, {'url': url, 'stored_at': 0, 'max_age': 0}, b'x' * 1000)
+        assert sorted(name.rsplit('.', 1)[1] for name in os.listdir(cache_dir)) == ['body', 'json']
+        assert cache.get(url)[1] == b'x' * 1000
+        body_path, _ = cache._paths(cache.make_key(url))
+        with open(body_path, 'wb') as f:
+            f.write(b'x' * 10)
+        assert cache.get(url) is None
+        assert os.listdir(cache_dir) == []
+        print(cache.summary())
+
+
+def test_init_http_cache_from_config():
+    """应用按配置创建共用的缓存，未启用时为 None"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app = Flask(__name__)
+        app.config.update(HTTP_CACHE_ENABLED=True, HTTP_CACHE_DIR=cache_dir, HTTP_CACHE_MAX_BYTES=1024)
+        cache = init_http_cache(app)
+        assert app.extensions['http_cache'] is cache
+        assert cache.cache_dir == cache_dir and cache.max_bytes == 1024
+
+        app = Flask(__name__)
+        app.config.update(HTTP_CACHE_ENABLED=False)
+        assert init_http_cache(app) is None
+        assert app.extensions['http_cache'] is None
+
+
+if __name__ == '__main__':
+    print("测试1: 条件请求重新验证")
+    test_revalidation_returns_cached_body()
+    print("\n测试2: 新鲜期内命中缓存")
+    test_fresh_entry_skips_network()
+    print("\n测试3: 不返回不匹配的响应体")
+    test_mismatched_body_not_served()
+    print("\n测试4: 按配置创建缓存")
+    test_init_http_cache_from_config()
+    print("\n✅ HTTP缓存测试通过")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试数据库结构迁移
+
+在临时 SQLite 数据库中验证：新数据库从版本0升级到最新版本，已是最新版本时不再执行迁移，
+版本号被重置为0后重新执行全部迁移不会出错，也不会改变已有数据及其派生数据
+（全文索引、用户词频、正文引用计数）；未导入 app.models 时单独调用 migrate() 也能建立完整结构。
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from sqlalchemy import text
+
+from app import db, features, search_index
+from app.dedup import prepare_row, upsert_scraped_rows
+from app.migrations import LATEST_VERSION, MIGRATIONS, get_version, migrate
+from app.models import ScrapedData
+from tests_support import temp_app
+
+
+def version():
+    with db.engine.connect() as conn:
+        return get_version(conn)
+
+
+def snapshot():
+    """数据及派生数据的快照"""
+    queries = {
+        'rows': "SELECT id, title, saved, body_hash, title_length, content_length, dedup_key, token_count "
+                "FROM scraped_data ORDER BY id",
+        'blobs': "SELECT hash, refcount FROM content_blob ORDER BY hash",
+        'data_terms': "SELECT data_id, term_id, count FROM data_terms ORDER BY data_id, term_id",
+        'user_terms': "SELECT user_id, term_id, count FROM user_terms ORDER BY user_id, term_id",
+        'fts': f"SELECT rowid, owner FROM {search_index.FTS_TABLE} ORDER BY rowid",
+    }
+    return {name: db.session.execute(text(sql)).fetchall() for name, sql in queries.items()}
+
+
+def add_saved_rows():
+    upsert_scraped_rows([prepare_row({
+        'keyword': '迁移', 'title': f'迁移测试数据{i}', 'content': '相同的正文内容' if i % 2 else f'正文{i}',
+        'url': f'https://example.com/{i}', 'source': '百度', 'saved': False, 'user_id': 1
+    }) for i in range(6)])
+    ids = [row_id for (row_id,) in db.session.query(ScrapedData.id).order_by(ScrapedData.id)]
+    saved = ids[:4]
+    ScrapedData.query.filter(ScrapedData.id.in_(saved)).update({'saved': True}, synchronize_session=False)
+    search_index.index_rows(saved)
+    features.store_terms(features.segment_rows(1, saved))
+    db.session.commit()
+
+
+def test_migrate_from_zero_is_idempotent():
+    with temp_app(migrated=False):
+        assert version() == 0
+        assert migrate() == len(MIGRATIONS)
+        assert version() == LATEST_VERSION
+        assert migrate() == 0
+
+        add_saved_rows()
+        before = snapshot()
+        assert before['user_terms'] and before['fts'] and before['blobs']
+
+        # 旧数据库的版本号为0但结构可能已经存在，全部迁移需要可重复执行
+        with db.engine.begin() as conn:
+            conn.execute(text("PRAGMA user_version = 0"))
+        db.session.remove()
+        assert migrate() == len(MIGRATIONS)
+        assert version() == LATEST_VERSION
+        assert snapshot() == before
+
+
+def test_migrate_without_models_imported():
+    """在只导入迁移模块的新进程中执行迁移（create_all 需要的模型由 migrate 自行导入）"""
+    script = (
+        "import sys\n"
+        "from flask import Flask\n"
+        "from app import db\n"
+        "from app.migrations import LATEST_VERSION, migrate\n"
+        "assert 'app.models' not in sys.modules\n"
+        "app = Flask(__name__)\n"
+        "app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + sys.argv[1]\n"
+        "app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False\n"
+        "db.init_app(app)\n"
+        "with app.app_context():\n"
+        "    assert migrate() == LATEST_VERSION\n"
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run([sys.executable, '-c', script, os.path.join(workdir, 'test.db')],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    print(result.stdout.strip())
+    assert result.returncode == 0, result.stderr
+
+
+if __name__ == '__main__':
+    print("测试1: 从版本0重复执行迁移")
+    test_migrate_from_zero_is_idempotent()
+    print("\n测试2: 未导入模型时执行迁移")
+    test_migrate_without_models_imported()
+    print("\n✅ 数据库迁移测试通过")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试按主机的自适应限速器
+
+使用本地模拟搜索服务器注入限流（429），验证爬虫能自动降速、
+在限流阈值附近稳定运行，并在没有限流时逐步恢复速率。
+"""
+import sys
+import threading
+import time
+
+from flask import Flask
+
+from app.scraper import TokenBucket, HostRateLimiter, ScrapeEngine, init_rate_limiter
+from app.sources import create_sources
+from mock_search_server import start_mock_server
+
+
+def test_token_bucket_rate():
+    """令牌桶应按设定速率放行请求"""
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.perf_counter()
+    for _ in range(21):
+        bucket.acquire()
+    elapsed = time.perf_counter() - start
+    print(f"21个令牌耗时 {elapsed:.2f}s（期望约0.40s）")
+    assert 0.35 <= elapsed <= 0.6
+
+
+def test_backoff_and_recovery():
+    """遇到限流时乘性降速，成功后逐步恢复"""
+    limiter = HostRateLimiter(initial_rate=10, min_rate=1, max_rate=20, increase=2, cooldown=0)
+    url = 'http://example.com/s'
+    limiter.on_throttle(url)
+    assert limiter.rate(url) == 5
+    limiter.on_throttle(url)
+    assert limiter.rate(url) == 2.5
+    for _ in range(20):
+        limiter.on_success(url)
+    print(f"20次成功后速率恢复到 {limiter.rate(url):.2f} 次/秒")
+    assert 2.5 < limiter.rate(url) <= 20
+
+
+def test_concurrent_adjustments_not_lost(threads=8, rounds=2000):
+    """多个线程同时调整同一主机的速率时，每次加性增都生效，结果与依次执行相同"""
+    limiter = HostRateLimiter(initial_rate=1, max_rate=1e9, increase=1)
+    url = 'http://example.com/s'
+    expected = 1.0
+    for _ in range(threads * rounds):
+        expected += 1 / expected
+
+    def worker():
+        for _ in range(rounds):
+            limiter.on_success(url)
+
+    # 缩短线程切换间隔，使读取与写回之间更容易发生切换
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    print(f"{threads * rounds} 次并发加性增后速率 {limiter.rate(url):.4f}（依次执行 {expected:.4f}）")
+    assert abs(limiter.rate(url) - expected) < 1e-6
+
+
+def test_adapts_to_server_throttling(tolerance=20, pages=120):
+    """针对限流阈值为 tolerance 次/秒的服务器，抓取应全部成功且速率贴近阈值"""
+    server, base_url = start_mock_server(throttle_rps=tolerance)
+    limiter = HostRateLimiter(initial_rate=5, max_rate=200, increase=5)
+    engine = ScrapeEngine(
+        max_workers=8,
+        per_host_limit=8,
+        search_url=f'{base_url}/s',
+        rate_limiter=limiter,
+        max_retries=5
+    )
+    try:
+        start = time.perf_counter()
+        keywords = [f'限流测试{i}' for i in range(pages)]
+        total = sum(len(results) for _, _, results in engine.scrape_many(keywords))
+        elapsed = time.perf_counter() - start
+    finally:
+        engine.close()
+        server.shutdown()
+
+    achieved = pages / elapsed
+    throttled_ratio = server.throttled_count / (server.request_count + server.throttled_count)
+    print(f"抓取 {pages} 页耗时 {elapsed:.2f}s，实际 {achieved:.1f} 页/秒（阈值 {tolerance}）")
+    print(f"被限流请求 {server.throttled_count} 次，占比 {throttled_ratio:.1%}，限速器状态: {limiter.stats()}")
+    assert total == pages * 10
+    assert achieved >= tolerance * 0.5
+    assert throttled_ratio < 0.3
+
+
+def test_app_limiter_shared_by_sources(tolerance=10, pages=40):
+    """按配置创建的应用级限速器传给网页数据源后，遇到限流会降速，且多个数据源实例共享同一主机的速率"""
+    server, base_url = start_mock_server(throttle_rps=tolerance)
+    app = Flask(__name__)
+    app.config.update(SCRAPE_RATE_LIMIT_ENABLED=True, SCRAPE_RATE_INITIAL=50, SCRAPE_RATE_MIN=1,
+                      SCRAPE_RATE_MAX=50, BAIDU_SEARCH_URL=f'{base_url}/s')
+    limiter = init_rate_limiter(app)
+    assert app.extensions['rate_limiter'] is limiter
+    sources = [create_sources(['百度网页'], app.config, rate_limiter=limiter)[0] for _ in range(2)]
+    try:
+        total = sum(len(sources[i % 2].search(f'共享限速{i}')) for i in range(pages))
+    finally:
+        for source in sources:
+            source.close()
+        server.shutdown()
+    stats = limiter.stats()[base_url.split('//', 1)[1]]
+    print(f"限速器状态: {stats}")
+    assert all(source.engine.rate_limiter is limiter for source in sources)
+    assert total == pages * 10
+    assert stats['throttled'] > 0
+    assert stats['rate'] < 50
+
+
+if __name__ == '__main__':
+    print("测试1: 令牌桶速率")
+    test_token_bucket_rate()
+    print("\n测试2: 降速与恢复")
+    test_backoff_and_recovery()
+    print("\n测试3: 并发调整速率")
+    test_concurrent_adjustments_not_lost()
+    print("\n测试4: 适应服务端限流")
+    test_adapts_to_server_throttling()
+    print("\n测试5: 数据源共享应用级限速器")
+    test_app_limiter_shared_by_sources()
+    print("\n✅ 限速器测试通过")
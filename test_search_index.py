@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试数据仓库全文索引
+
+在临时 SQLite 数据库中为两个用户保存内容相同的数据，验证检索只返回本用户的数据，
+且删除数据、取消保存后对应的索引行由触发器同步删除。
+"""
+from sqlalchemy import text
+
+from app import db, search_index
+from app.dedup import prepare_row, upsert_scraped_rows
+from app.models import ScrapedData
+from tests_support import temp_app
+
+
+def save_rows(user_id, titles):
+    """按保存数据的方式写入并索引，返回数据ID列表"""
+    upsert_scraped_rows([prepare_row({
+        'keyword': '全文检索', 'title': title, 'content': f'{title}的详细报道，涵盖行业动态和市场分析。',
+        'url': f'https://example.com/{user_id}/{i}', 'source': '百度', 'saved': False, 'user_id': user_id
+    }) for i, title in enumerate(titles)])
+    ids = [row_id for (row_id,) in db.session.query(ScrapedData.id).filter_by(user_id=user_id)]
+    ScrapedData.query.filter(ScrapedData.id.in_(ids)).update({'saved': True}, synchronize_session=False)
+    search_index.index_rows(ids)
+    db.session.commit()
+    return ids
+
+
+def indexed_ids():
+    return {row[0] for row in db.session.execute(text(f"SELECT rowid FROM {search_index.FTS_TABLE}"))}
+
+
+def test_search_is_isolated_per_user():
+    """两个用户保存相同内容的数据，检索只返回各自的数据"""
+    with temp_app():
+        assert search_index.available()
+        first = save_rows(1, ['人工智能产业报告', '新能源汽车销量'])
+        second = save_rows(2, ['人工智能产业报告'])
+        print(f"用户1: {search_index.search_ids(1, '人工智能')}，用户2: {search_index.search_ids(2, '人工智能')}")
+        assert search_index.search_ids(1, '人工智能') == [first[0]]
+        assert search_index.search_ids(2, '人工智能') == second
+        assert search_index.search_ids(2, '新能源汽车') == []
+        assert search_index.search_ids(3, '人工智能') == []
+
+
+def test_delete_and_unsave_remove_index_rows():
+    """删除数据、取消保存后索引行随之删除，不再被检索到"""
+    with temp_app():
+        ids = save_rows(1, ['人工智能产业报告', '人工智能芯片进展', '人工智能医疗应用'])
+        assert indexed_ids() == set(ids)
+        ScrapedData.query.filter_by(id=ids[0]).delete()
+        ScrapedData.query.filter_by(id=ids[1]).update({'saved': False})
+        db.session.commit()
+        assert indexed_ids() == {ids[2]}
+        assert search_index.search_ids(1, '人工智能') == [ids[2]]
+
+
+def test_migration_removes_stale_index_rows():
+    """触发器建立前遗留的过期索引行在迁移时清理"""
+    with temp_app():
+        ids = save_rows(1, ['人工智能产业报告', '人工智能芯片进展'])
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP TRIGGER trg_scraped_data_fts_delete"))
+            conn.execute(text("DELETE FROM scraped_data WHERE id = :id"), {'id': ids[0]})
+            assert search_index.create_sync_triggers(conn) == 1
+        assert indexed_ids() == {ids[1]}
+
+
+if __name__ == '__main__':
+    print("测试1: 按用户隔离检索结果")
+    test_search_is_isolated_per_user()
+    print("\n测试2: 删除和取消保存同步索引")
+    test_delete_and_unsave_remove_index_rows()
+    print("\n测试3: 迁移清理过期索引行")
+    test_migration_removes_stale_index_rows()
+    print("\n✅ 全文索引测试通过")
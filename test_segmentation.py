@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试多进程分词
+
+验证文本分块后交给进程池分词，合并得到的词频及词的顺序与单进程整体分词完全相同，
+并且停用词、单字和非中文词都被过滤。
+"""
+import random
+
+from app.segmentation import STOP_WORDS, count_chunk, count_words, shutdown
+
+TOPICS = ['人工智能', '新能源汽车', '半导体', '云计算', '大数据', '生物医药']
+SENTENCES = ['关于{kw}的最新新闻报道，涵盖行业动态、技术发展和市场分析。',
+             '{kw}的详细市场分析和预测，包括增长趋势和竞争格局。',
+             '专家认为{kw}在未来五年将保持高速增长，产业链上下游企业加快布局。',
+             'Version 2.0 of {kw} released 现在可以下载']
+
+
+def make_texts(count, seed=0):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(SENTENCES).format(kw=rng.choice(TOPICS)) for _ in range(rng.randint(1, 6)))
+            for _ in range(count)]
+
+
+def test_parallel_matches_single_process():
+    texts = make_texts(2000)
+    single = count_chunk(texts, STOP_WORDS)
+    try:
+        parallel = count_words(texts, STOP_WORDS, workers=2, chunk_chars=5000, min_parallel_chars=0)
+    finally:
+        shutdown()
+    print(f"共 {len(single)} 个词，前5个: {single.most_common(5)}")
+    assert parallel == single
+    assert list(parallel) == list(single)
+    assert parallel.most_common(20) == single.most_common(20)
+
+
+def test_filters_stop_words_and_non_chinese():
+    counts = count_words(['我们的人工智能 AI 技术，现在可以下载 2.0 版本'], STOP_WORDS, workers=1)
+    assert '人工智能' in counts
+    assert not [word for word in counts if word in STOP_WORDS or len(word) < 2 or not '一' <= word[0] <= '龥']
+
+
+if __name__ == '__main__':
+    print("测试1: 多进程与单进程结果一致")
+    test_parallel_matches_single_process()
+    print("\n测试2: 过滤停用词和非中文词")
+    test_filters_stop_words_and_non_chinese()
+    print("\n✅ 分词测试通过")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试 SQLite 连接参数
+
+验证按配置注册的连接钩子会在每个新连接上执行 PRAGMA（包括注册前已存在、随后被丢弃重建的连接），
+非法的 PRAGMA 名称和值会被拒绝。
+"""
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+
+from app.sqlite_profile import apply_sqlite_profile
+from config import Config
+
+
+def raises_value_error(fn, *args):
+    try:
+        fn(*args)
+    except ValueError as e:
+        print(f"已拒绝: {e}")
+        return True
+    return False
+
+
+def pragma(conn, name):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_profile_applied_to_new_connections():
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine('sqlite:///' + os.path.join(workdir, 'test.db'))
+        try:
+            with engine.connect() as conn:
+                assert pragma(conn, 'journal_mode') == 'delete'
+            apply_sqlite_profile(engine, Config.SQLITE_PRAGMAS)
+            for _ in range(2):
+                with engine.connect() as conn:
+                    assert pragma(conn, 'journal_mode') == 'wal'
+                    assert pragma(conn, 'synchronous') == 1
+                    assert pragma(conn, 'busy_timeout') == 5000
+                    assert pragma(conn, 'cache_size') == -64000
+                    assert pragma(conn, 'temp_store') == 2
+                engine.dispose()
+        finally:
+            engine.dispose()
+
+
+def test_invalid_pragmas_rejected():
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine('sqlite:///' + os.path.join(workdir, 'test.db'))
+        try:
+            assert raises_value_error(apply_sqlite_profile, engine, {'writable_schema': 1})
+            apply_sqlite_profile(engine, {'journal_mode': 'WAL; DROP TABLE x'})
+            assert raises_value_error(engine.connect)
+        finally:
+            engine.dispose()
+
+
+def test_empty_profile_keeps_defaults():
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine('sqlite:///' + os.path.join(workdir, 'test.db'))
+        try:
+            apply_sqlite_profile(engine, {})
+            with engine.connect() as conn:
+                assert pragma(conn, 'journal_mode') == 'delete'
+        finally:
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    print("测试1: 新连接执行 PRAGMA")
+    test_profile_applied_to_new_connections()
+    print("\n测试2: 拒绝非法 PRAGMA")
+    test_invalid_pragmas_rejected()
+    print("\n测试3: 空配置保持默认值")
+    test_empty_profile_keeps_defaults()
+    print("\n✅ SQLite 连接参数测试通过")
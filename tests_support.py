@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试和基准测试共用的临时数据库应用
+
+make_app 创建使用指定 SQLite 文件的最小 Flask 应用（不启动写线程、调度器，也不创建默认用户）；
+temp_app 在临时目录中创建应用并进入应用上下文，默认先执行数据库迁移，退出时释放会话和连接。
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+from flask import Flask
+
+from app import db
+from app.migrations import migrate
+
+
+def make_app(path, **config):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.update(config)
+    db.init_app(app)
+    return app
+
+
+@contextmanager
+def temp_app(migrated=True, **config):
+    with tempfile.TemporaryDirectory() as workdir:
+        app = make_app(os.path.join(workdir, 'test.db'), **config)
+        with app.app_context():
+            try:
+                if migrated:
+                    migrate()
+                yield app
+            finally:
+                db.session.remove()
+                db.engine.dispose()